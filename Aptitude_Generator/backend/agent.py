@@ -1,85 +1,365 @@
 import os
 import json
-from groq import Groq
+import asyncio
+from groq import AsyncGroq
+from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
+from question_bank import question_hash
 
 # Load environment variables
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, "../../.env"))
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
 
-def generate_aptitude_questions(jd_text: str):
-    """
-    Analyzes the Job Description and generates 25 MCQ questions and 4 Coding questions.
-    """
-    
-    prompt = f"""
-    Create a recruitment assessment JSON for the following Job Description.
-    
-    REQUIRED JSON STRUCTURE:
-    {{
+MODEL = "llama-3.3-70b-versatile"
+MCQ_SHARD_SIZE = 5
+MAX_SHARD_ATTEMPTS = 3
+MCQ_TOKENS_EACH = 300
+# Each MCQ shard gets its own angle, so concurrent shards do not repeat each other
+MCQ_FOCUS = [
+    "core technical concepts named in the JD",
+    "tools, frameworks and libraries from the JD",
+    "debugging, problem solving and edge cases in the JD's domain",
+    "logical and quantitative aptitude in a workplace setting for this role",
+    "architecture, best practices and trade-offs for this role",
+]
+
+class MCQ(BaseModel):
+    id: str = ""
+    question: str
+    options: list[str]
+    answer: str
+
+class TestCase(BaseModel):
+    input: str
+    output: str
+
+class CodingQuestion(BaseModel):
+    title: str
+    description: str
+    constraints: str = ""
+    example_input: str = ""
+    example_output: str = ""
+    test_cases: list[TestCase]
+
+class MCQShard(BaseModel):
+    mcqs: list[MCQ]
+
+class CodingShard(BaseModel):
+    coding_questions: list[CodingQuestion]
+
+MCQ_SCHEMA = """{
       "mcqs": [
-        {{
+        {
           "id": "Q1",
           "question": "text",
           "options": ["A", "B", "C", "D"],
           "answer": "correct option text"
-        }}
-      ],
+        }
+      ]
+    }"""
+
+CODING_SCHEMA = """{
       "coding_questions": [
-        {{
+        {
           "title": "Title of DSA Problem",
           "description": "Clear problem statement and requirements",
           "constraints": "Complexity and input limits",
           "example_input": "sample input string",
           "example_output": "sample output string",
           "test_cases": [
-            {{"input": "in1", "output": "out1"}},
-            {{"input": "in2", "output": "out2"}}
+            {"input": "in1", "output": "out1"},
+            {"input": "in2", "output": "out2"}
           ]
-        }}
+        }
       ]
-    }}
+    }"""
+
+def mcq_prompt(jd_text: str, count: int, focus: str) -> str:
+    return f"""
+    Create multiple-choice questions for a recruitment assessment for the following Job Description.
+
+    REQUIRED JSON STRUCTURE:
+    {MCQ_SCHEMA}
 
     RULES:
-    1. Generate 25 MCQs.
-    2. If the JD is technical (CS/IT), generate 4 Coding Questions. Otherwise, "coding_questions" must be [].
-    3. Coding questions must be role-agnostic DSA (MNC style).
+    1. Generate exactly {count} MCQs, focused on {focus}.
+    2. Each MCQ has 4 options and "answer" is the exact text of the correct option.
+    3. OUTPUT ONLY THE JSON. NO EXPLANATION.
+
+    JOB DESCRIPTION:
+    {jd_text}
+    """
+
+def coding_prompt(jd_text: str, count: int = None) -> str:
+    if count is None:
+        rule = 'If the JD is technical (CS/IT), generate 4 Coding Questions. Otherwise, "coding_questions" must be [].'
+    else:
+        rule = f"Generate exactly {count} Coding Questions."
+    return f"""
+    Create coding questions for a recruitment assessment for the following Job Description.
+
+    REQUIRED JSON STRUCTURE:
+    {CODING_SCHEMA}
+
+    RULES:
+    1. {rule}
+    2. Coding questions must be role-agnostic DSA (MNC style), with at least 2 test cases each.
+    3. Solutions read from stdin and print to stdout: every "input" is the exact stdin text and every "output" the exact expected stdout (also for the examples).
     4. OUTPUT ONLY THE JSON. NO EXPLANATION.
 
     JOB DESCRIPTION:
     {jd_text}
     """
 
-    print(f"\n--- 🚀 AGENT START: Analysing Job Description ---")
+async def run_shard(name: str, prompt: str, shard_model, expected: int = None, max_tokens: int = 1500) -> list:
+    """
+    One generation request, validated against `shard_model`. A shard whose JSON is
+    truncated, off-schema or short is retried on its own; the other shards are kept.
+    """
+    for attempt in range(1, MAX_SHARD_ATTEMPTS + 1):
+        try:
+            completion = await client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a JSON-only generator. You honeslty follow the requested schema and never omit fields."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.0 if attempt == 1 else 0.3,
+                max_tokens=max_tokens,
+                response_format={ "type": "json_object" }
+            )
+            shard = shard_model.model_validate(json.loads(completion.choices[0].message.content))
+            # Shard models have a single list field ("mcqs" or "coding_questions")
+            items = [item.model_dump() for item in getattr(shard, next(iter(shard_model.model_fields)))]
+            if expected is not None and len(items) < expected:
+                raise ValueError(f"expected {expected} items, got {len(items)}")
+            print(f"DEBUG: Shard {name} OK ({len(items)} items, attempt {attempt})")
+            return items
+        except (ValueError, ValidationError) as e:
+            # json.JSONDecodeError is a ValueError
+            print(f"⚠️ Shard {name} failed validation (attempt {attempt}): {e}")
+        except Exception as e:
+            print(f"⚠️ Shard {name} request failed (attempt {attempt}): {e}")
+    raise RuntimeError(f"Shard {name} failed after {MAX_SHARD_ATTEMPTS} attempts")
+
+class JsonArrayItemParser:
+    """
+    Incremental parser for a streamed JSON object of the form {"key": [{...}, {...}], ...}.
+    feed() takes raw text chunks and returns (key, item) for every array element
+    object that has been fully received so far.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []         # open containers: "{" or "["
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_key = None    # last string seen directly inside the top-level object
+        self.array_key = None
+        self.item_start = None
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        items = []
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.stack == ["{"]:
+                        self.last_key = self.buffer[self.string_start + 1:self.pos]
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif ch in "{[":
+                if ch == "[" and self.stack == ["{"]:
+                    self.array_key = self.last_key
+                elif ch == "{" and self.stack == ["{", "["]:
+                    self.item_start = self.pos
+                self.stack.append(ch)
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if ch == "}" and self.stack == ["{", "["] and self.item_start is not None:
+                    try:
+                        items.append((self.array_key, json.loads(self.buffer[self.item_start:self.pos + 1])))
+                    except ValueError:
+                        pass
+                    self.item_start = None
+            self.pos += 1
+        return items
+
+ITEM_MODELS = {"mcqs": MCQ, "coding_questions": CodingQuestion}
+
+async def stream_shard(name: str, prompt_for, key: str, expected: int, queue: asyncio.Queue, max_tokens: int):
+    """
+    Streamed version of run_shard(): puts each valid, complete item on `queue` as soon
+    as its closing brace arrives. If the stream ends short (truncated or off-schema
+    items), only the shortfall is requested again. `prompt_for(count)` builds the prompt.
+    Returns whether the shard delivered everything it was asked for.
+    """
+    remaining = expected
+    for attempt in range(1, MAX_SHARD_ATTEMPTS + 1):
+        parser = JsonArrayItemParser()
+        received = 0
+        try:
+            stream = await client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a JSON-only generator. You honeslty follow the requested schema and never omit fields."},
+                    {"role": "user", "content": prompt_for(remaining)}
+                ],
+                temperature=0.0 if attempt == 1 else 0.3,
+                max_tokens=max_tokens,
+                response_format={ "type": "json_object" },
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                for item_key, item in parser.feed(delta or ""):
+                    if item_key != key or (remaining is not None and received >= remaining):
+                        continue
+                    try:
+                        await queue.put((key, ITEM_MODELS[key].model_validate(item).model_dump()))
+                        received += 1
+                    except ValidationError as e:
+                        print(f"⚠️ Shard {name}: dropped an off-schema item: {e}")
+        except Exception as e:
+            print(f"⚠️ Shard {name} request failed (attempt {attempt}): {e}")
+            if remaining is None:
+                # The model decides the count, so a broken stream cannot be topped up
+                return False
+        if remaining is None:
+            return True  # Model decides the count (coding questions for non-technical JDs may be none)
+        remaining -= received
+        if remaining <= 0:
+            print(f"DEBUG: Shard {name} OK (attempt {attempt})")
+            return True
+        print(f"⚠️ Shard {name} ended {remaining} short (attempt {attempt})")
+    print(f"⚠️ Shard {name} failed after {MAX_SHARD_ATTEMPTS} attempts")
+    return False
+
+async def stream_aptitude_questions(jd_text: str, mcq_count: int = 25, coding_count: int = None):
+    """
+    Streaming counterpart of generate_aptitude_questions(): the same shards run
+    concurrently and each MCQ / coding question is yielded as ("mcq" | "coding", question)
+    as soon as it is complete, deduplicated, with MCQ ids assigned in arrival order.
+    Ends with ("done", {"coding_count", "complete"}), as generate_aptitude_questions() reports.
+    """
+    print(f"\n--- 🚀 AGENT START (streaming): Analysing Job Description ---")
+    queue = asyncio.Queue()
+    tasks = []
+    for i, start in enumerate(range(0, mcq_count, MCQ_SHARD_SIZE)):
+        size = min(MCQ_SHARD_SIZE, mcq_count - start)
+        focus = MCQ_FOCUS[i % len(MCQ_FOCUS)]
+        tasks.append(asyncio.create_task(stream_shard(
+            f"mcq-{i + 1}", lambda n, focus=focus: mcq_prompt(jd_text, n, focus), "mcqs", size, queue,
+            max_tokens=MCQ_TOKENS_EACH * size + 200
+        )))
+    if coding_count is None or coding_count > 0:
+        tasks.append(asyncio.create_task(stream_shard(
+            "coding", lambda n: coding_prompt(jd_text, n), "coding_questions", coding_count, queue, max_tokens=3000
+        )))
+
+    async def close_when_done():
+        await asyncio.gather(*tasks)
+        await queue.put(None)
+
+    closer = asyncio.create_task(close_when_done())
+    seen = set()
+    mcq_number = coding_number = 0
     try:
-        print(f"Step 1: Connecting to Groq AI (Llama-3.3-70b)...")
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a JSON-only generator. You honeslty follow the requested schema and never omit fields."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0,
-            max_tokens=4000,
-            response_format={ "type": "json_object" }
-        )
-        
-        print(f"Step 2: Receiving AI response and parsing JSON...")
-        response_content = completion.choices[0].message.content
-        data = json.loads(response_content)
-        
-        # Log keys for verification
-        if data.get("coding_questions") and len(data["coding_questions"]) > 0:
-            print(f"DEBUG: Coding Question Keys: {list(data['coding_questions'][0].keys())}")
-        
-        mcqs = data.get("mcqs", [])
-        coding = data.get("coding_questions", [])
-        
-        print(f"✅ SUCCESS: Generated {len(mcqs)} professional MCQs and {len(coding)} Coding questions.")
-        return {"mcqs": mcqs, "coding_questions": coding}
-
-    except Exception as e:
-        print(f"❌ AGENT ERROR: {e}")
-        raise e
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                break
+            key, question = entry
+            q_key = question_hash(question)
+            if q_key in seen:
+                continue
+            seen.add(q_key)
+            if key == "mcqs":
+                mcq_number += 1
+                yield "mcq", dict(question, id=f"Q{mcq_number}")
+            else:
+                coding_number += 1
+                yield "coding", question
+        shards_ok = [task.result() for task in tasks]
+    finally:
+        # Client went away or the consumer stopped early: stop the remaining shards
+        for task in tasks + [closer]:
+            task.cancel()
+    print(f"✅ SUCCESS (streaming): {mcq_number} MCQs and {coding_number} Coding questions.")
+    coding_ok = shards_ok[-1] if coding_count is None or coding_count > 0 else True
+    intended = coding_count if coding_count is not None else (coding_number if coding_ok else None)
+    yield "done", {
+        "coding_count": intended,
+        "complete": all(shards_ok) and mcq_number >= mcq_count and intended is not None and coding_number >= intended
+    }
+
+def dedupe(questions: list) -> list:
+    seen, unique = set(), []
+    for question in questions:
+        key = question_hash(question)
+        if key not in seen:
+            seen.add(key)
+            unique.append(question)
+    return unique
+
+async def generate_aptitude_questions(jd_text: str, mcq_count: int = 25, coding_count: int = None):
+    """
+    Analyzes the Job Description and generates 25 MCQ questions and 4 Coding questions.
+    MCQs are requested in concurrent shards of 5 and coding questions in their own shard.
+    `coding_count=None` lets the model decide (4 for technical JDs, otherwise none);
+    an explicit count is used when topping up questions missing from the bank.
+    Also returns the intended `coding_count` (None if the coding shard failed before the
+    model decided) and `complete`: False when any shard failed or came up short.
+    """
+    print(f"\n--- 🚀 AGENT START: Analysing Job Description ---")
+    print(f"Step 1: Connecting to Groq AI (Llama-3.3-70b)...")
+
+    mcq_shards = []
+    for i, start in enumerate(range(0, mcq_count, MCQ_SHARD_SIZE)):
+        size = min(MCQ_SHARD_SIZE, mcq_count - start)
+        mcq_shards.append(run_shard(f"mcq-{i + 1}", mcq_prompt(jd_text, size, MCQ_FOCUS[i % len(MCQ_FOCUS)]), MCQShard, size,
+                                    max_tokens=MCQ_TOKENS_EACH * size + 200))
+    coding_shards = []
+    if coding_count is None or coding_count > 0:
+        coding_shards.append(run_shard("coding", coding_prompt(jd_text, coding_count), CodingShard, coding_count, max_tokens=3000))
+
+    print(f"Step 2: Running {len(mcq_shards) + len(coding_shards)} shards concurrently...")
+    results = await asyncio.gather(*mcq_shards, *coding_shards, return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures and len(failures) == len(results):
+        print(f"❌ AGENT ERROR: {failures[0]}")
+        raise failures[0]
+    for failure in failures:
+        print(f"⚠️ {failure}")
+
+    mcqs = dedupe([q for r in results[:len(mcq_shards)] if not isinstance(r, Exception) for q in r])
+    coding = dedupe([q for r in results[len(mcq_shards):] if not isinstance(r, Exception) for q in r])
+
+    # One refill for MCQs lost to failed shards or duplicates
+    missing = mcq_count - len(mcqs)
+    if missing > 0:
+        try:
+            extra = await run_shard("mcq-refill", mcq_prompt(jd_text, missing, "topics not covered by typical questions"),
+                                    MCQShard, max_tokens=MCQ_TOKENS_EACH * missing + 200)
+            mcqs = dedupe(mcqs + extra)
+        except RuntimeError as e:
+            print(f"⚠️ {e}")
+
+    mcqs = [dict(q, id=f"Q{i}") for i, q in enumerate(mcqs[:mcq_count], start=1)]
+    coding_failed = bool(coding_shards) and isinstance(results[-1], Exception)
+    intended = coding_count if coding_count is not None else (None if coding_failed else len(coding))
+    complete = not failures and len(mcqs) >= mcq_count and intended is not None and len(coding) >= intended
+    print(f"✅ SUCCESS: Generated {len(mcqs)} professional MCQs and {len(coding)} Coding questions{'' if complete else ' (incomplete)'}.")
+    return {"mcqs": mcqs, "coding_questions": coding, "coding_count": intended, "complete": complete}
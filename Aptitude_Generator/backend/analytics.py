@@ -0,0 +1,122 @@
+import threading
+from bisect import insort
+from collections import Counter
+
+PERCENTILES = (25, 75, 90)
+
+def submission_scores(submission: dict) -> tuple:
+    """(mcq_score, coding_score); legacy submissions only carry `score`. Raises on non-numeric scores."""
+    mcq = submission.get("mcq_score", submission.get("score", 0)) or 0
+    coding = submission.get("coding_score", 0) or 0
+    return int(mcq), int(coding)
+
+def percentile(sorted_values: list, pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))  # ceil without float error
+    return sorted_values[int(rank) - 1]
+
+def median(sorted_values: list):
+    n = len(sorted_values)
+    if n == 0:
+        return None
+    mid = n // 2
+    return sorted_values[mid] if n % 2 else (sorted_values[mid - 1] + sorted_values[mid]) / 2
+
+class ScoreStats:
+    """Running count/sum plus a sorted copy of the scores, so mean, median and percentiles are O(1) reads."""
+
+    def __init__(self):
+        self.total = 0
+        self.values = []
+
+    def add(self, value):
+        self.total += value
+        insort(self.values, value)
+
+    def summary(self) -> dict:
+        n = len(self.values)
+        stats = {
+            "mean": round(self.total / n, 2) if n else None,
+            "median": median(self.values),
+            "max": self.values[-1] if n else None
+        }
+        for pct in PERCENTILES:
+            stats[f"p{pct}"] = percentile(self.values, pct)
+        return stats
+
+class TokenAggregates:
+    def __init__(self):
+        self.count = 0
+        # Sorted on (-combined score, submission time, arrival order): best first, earlier submission wins ties
+        self.leaderboard = []
+        self.last_submission = None
+        self.mcq = ScoreStats()
+        self.coding = ScoreStats()
+        self.suspicious = Counter()
+
+    def add(self, submission: dict):
+        # Everything that can fail on a bad record is read before any aggregate changes
+        mcq, coding = submission_scores(submission)
+        timestamp = float(submission.get("timestamp") or 0)
+        self.count += 1
+        insort(self.leaderboard, (-(mcq + coding), timestamp, self.count, submission))
+        self.mcq.add(mcq)
+        self.coding.add(coding)
+        self.suspicious[str(submission.get("suspicious", "Normal"))] += 1
+        self.last_submission = max(self.last_submission or 0, timestamp)
+
+    def summary(self) -> dict:
+        return {
+            "submissions": self.count,
+            "last_submission": self.last_submission,
+            "mcq": self.mcq.summary(),
+            "coding": self.coding.summary(),
+            "suspicious": dict(self.suspicious),
+            "flagged": self.count - self.suspicious.get("Normal", 0)
+        }
+
+class AnalyticsIndex:
+    """
+    Per-assessment-token aggregates, updated on each submission instead of being
+    recomputed from the full history on every dashboard load.
+    """
+
+    def __init__(self, submissions: list = ()):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        for submission in submissions:
+            try:
+                self.add(submission)
+            except (KeyError, TypeError, ValueError) as e:
+                # A malformed record saved before submissions were validated must not stop startup
+                print(f"⚠️ Skipping malformed submission in analytics ({e!r}): {submission.get('token')}/{submission.get('email')}")
+
+    def add(self, submission: dict):
+        with self._lock:
+            aggregates = self._tokens.get(submission["token"]) or TokenAggregates()
+            aggregates.add(submission)
+            self._tokens[submission["token"]] = aggregates
+
+    def drop(self, token: str):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+    def top(self, token: str, k: int) -> list:
+        """Best `k` submissions for a token; a slice of the maintained order, so O(k)."""
+        with self._lock:
+            aggregates = self._tokens.get(token)
+            entries = aggregates.leaderboard[:k] if aggregates else []
+        return [dict(submission, rank=rank, combined_score=-neg_score)
+                for rank, (neg_score, _, _, submission) in enumerate(entries, start=1)]
+
+    def summary(self, token: str) -> dict:
+        with self._lock:
+            aggregates = self._tokens.get(token)
+            return aggregates.summary() if aggregates else TokenAggregates().summary()
+
+    def count(self, token: str) -> int:
+        with self._lock:
+            aggregates = self._tokens.get(token)
+            return aggregates.count if aggregates else 0
@@ -0,0 +1,182 @@
+import os
+import sys
+import shutil
+import signal
+import asyncio
+import hashlib
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CPU_SECONDS = int(os.getenv("GRADER_CPU_SECONDS", 2))
+MEMORY_MB = int(os.getenv("GRADER_MEMORY_MB", 256))
+WALL_SECONDS = float(os.getenv("GRADER_WALL_SECONDS", 5))
+WORKERS = int(os.getenv("GRADER_WORKERS", os.cpu_count() or 2))
+MAX_OUTPUT = 2000
+# Without bubblewrap, candidate code could read server files (.env) and open connections,
+# so running it bare must be switched on explicitly (local development only)
+ALLOW_UNSANDBOXED = os.getenv("GRADER_ALLOW_UNSANDBOXED", "false").lower() in ("1", "true", "yes")
+BWRAP = shutil.which("bwrap")
+SANDBOX_UID = 65534  # nobody
+
+# Runs first inside the sandbox: applies the rlimits (no further processes: RLIMIT_NPROC=0),
+# then replaces itself with the candidate program
+LAUNCHER = """
+import os, sys, resource
+cpu, memory = int(sys.argv[1]), int(sys.argv[2])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+resource.setrlimit(resource.RLIMIT_FSIZE, (1 << 20, 1 << 20))
+resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+os.execv(sys.argv[3], sys.argv[3:])
+"""
+
+# language -> (source file name, interpreter command). Python only for now; each language gets its own pool
+LANGUAGES = {"python": ("main.py", [sys.executable, "-I", "main.py"])}
+
+class GraderUnavailable(Exception):
+    """No sandbox to run candidate code in (bubblewrap missing, unsandboxed runs not allowed)."""
+
+def sandbox_available() -> bool:
+    return os.name == "posix" and (BWRAP is not None or ALLOW_UNSANDBOXED)
+
+def _sandbox_prefix(workdir: str) -> list:
+    """
+    bubblewrap: new user/pid/net/ipc/uts namespaces, runs as `nobody`, sees only the
+    read-only system and Python install plus its own work dir, and dies with the grader.
+    """
+    prefix = [BWRAP, "--unshare-all", "--die-with-parent", "--new-session", "--clearenv",
+              "--uid", str(SANDBOX_UID), "--gid", str(SANDBOX_UID),
+              "--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp"]
+    mounts = {"/usr", "/bin", "/lib", "/lib64", "/lib32", sys.prefix, sys.base_prefix}
+    for path in sorted(mounts):
+        if os.path.exists(path):
+            prefix += ["--ro-bind", path, path]
+    return prefix + ["--bind", workdir, "/sandbox", "--chdir", "/sandbox",
+                     "--setenv", "PATH", "/usr/bin:/bin", "--setenv", "HOME", "/sandbox"]
+
+def normalize_output(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+def run_case(language: str, code: str, stdin: str) -> dict:
+    """Run one program on one input inside the sandbox with CPU, memory, process and wall-clock limits."""
+    if not sandbox_available():
+        raise GraderUnavailable("No sandbox for candidate code: install bubblewrap (bwrap) or set GRADER_ALLOW_UNSANDBOXED for local use.")
+    filename, command = LANGUAGES[language]
+    with tempfile.TemporaryDirectory(prefix="grader_") as workdir:
+        os.chmod(workdir, 0o777)  # Writable for the sandbox's `nobody`
+        with open(os.path.join(workdir, filename), "w", encoding="utf-8") as f:
+            f.write(code)
+        launcher = [sys.executable, "-I", "-c", LAUNCHER, str(CPU_SECONDS), str(MEMORY_MB * 1024 * 1024)] + command
+        if BWRAP:
+            argv, cwd, env = _sandbox_prefix(workdir) + launcher, None, {}
+        else:
+            argv, cwd, env = launcher, workdir, {"PATH": "/usr/bin:/bin", "HOME": workdir}
+        process = subprocess.Popen(
+            argv, cwd=cwd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            start_new_session=True, text=True
+        )
+        try:
+            stdout, stderr = process.communicate(stdin, timeout=WALL_SECONDS)
+            if process.returncode == 0:
+                status = "ok"
+            elif process.returncode in (-signal.SIGXCPU, -signal.SIGKILL):
+                status = "time_limit"  # CPU rlimit hit
+            else:
+                status = "runtime_error"
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            try:
+                stdout, stderr = process.communicate(timeout=1)
+            except subprocess.TimeoutExpired:
+                # Something still holds the pipes open; give up on the output rather than the worker
+                for pipe in (process.stdin, process.stdout, process.stderr):
+                    pipe.close()
+                stdout, stderr = "", ""
+            status = "time_limit"
+    return {"status": status, "stdout": stdout[:MAX_OUTPUT], "stderr": stderr[-MAX_OUTPUT:]}
+
+def question_key(question: dict) -> str:
+    return hashlib.sha256(repr((question.get("title"), question.get("test_cases"))).encode("utf-8")).hexdigest()
+
+class Grader:
+    """
+    Server-side grading of coding answers against each question's `test_cases`.
+    Programs read the test input on stdin and print the answer; output is compared
+    after trimming trailing whitespace. Every (question, test case) run is a separate
+    subprocess under bubblewrap (see run_case), dispatched through a bounded worker pool per language, so
+    many submissions and test cases are graded in parallel. Results are cached by
+    (language, code hash, question).
+    """
+
+    def __init__(self, workers: int = WORKERS, cache_size: int = 5000):
+        self.pools = {lang: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"grader-{lang}") for lang in LANGUAGES}
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _store(self, key, result: dict):
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def grade_question(self, language: str, code: str, question: dict) -> dict:
+        cases = question.get("test_cases") or []
+        if not code.strip() or not cases:
+            return {"title": question.get("title"), "passed": 0, "total": len(cases), "solved": False, "cases": []}
+        key = (language, hashlib.sha256(code.encode("utf-8")).hexdigest(), question_key(question))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        runs = await asyncio.gather(*(
+            loop.run_in_executor(self.pools[language], run_case, language, code, str(case.get("input", "")))
+            for case in cases
+        ))
+        results = []
+        for case, run in zip(cases, runs):
+            passed = run["status"] == "ok" and normalize_output(run["stdout"]) == normalize_output(str(case.get("output", "")))
+            results.append({"passed": passed, "status": run["status"]})
+        passed = sum(r["passed"] for r in results)
+        result = {"title": question.get("title"), "passed": passed, "total": len(cases), "solved": passed == len(cases), "cases": results}
+        self._store(key, result)
+        return result
+
+    async def grade(self, language: str, solutions: dict, coding_questions: list) -> dict:
+        """solutions: {question index (as str or int): code}. A question counts when all its test cases pass."""
+        if not sandbox_available():
+            raise GraderUnavailable("No sandbox for candidate code: install bubblewrap (bwrap) or set GRADER_ALLOW_UNSANDBOXED for local use.")
+        if language not in LANGUAGES:
+            raise ValueError(f"Unsupported language '{language}'. Supported: {', '.join(LANGUAGES)}")
+        results = await asyncio.gather(*(
+            self.grade_question(language, solutions.get(str(i), solutions.get(i, "")) or "", question)
+            for i, question in enumerate(coding_questions)
+        ))
+        return {
+            "coding_score": sum(r["solved"] for r in results),
+            "coding_total": len(coding_questions),
+            "language": language,
+            "results": results
+        }
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+grader = Grader()
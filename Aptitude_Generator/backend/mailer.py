@@ -0,0 +1,236 @@
+import os
+import queue
+import smtplib
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Compiled once at import; an assessment's invite body is rendered once and shared by all recipients
+_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), trim_blocks=True, lstrip_blocks=True, autoescape=True)
+_invite_template = _env.get_template("assessment_invite.html.j2")
+
+def render_invite(job_title: str, mcq_count: int, coding_count: int, assessment_link: str) -> tuple:
+    """(subject, html body) for an assessment invite."""
+    subject = f"Career Opportunity | {job_title} Technical Evaluation"
+    body = _invite_template.render(
+        job_title=job_title, mcq_count=mcq_count, coding_count=coding_count, assessment_link=assessment_link
+    )
+    return subject, body
+
+class SMTPPool:
+    """
+    Up to `size` reusable SMTP connections. A connection that errors is dropped
+    and a fresh one is opened on the next checkout.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str, starttls: bool = True, size: int = 4, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+
+    def _open(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        # Local stand-ins (e.g. aiosmtpd) usually run without auth
+        if self.password:
+            server.login(self.user, self.password)
+        return server
+
+    @contextmanager
+    def connection(self):
+        self._slots.get()
+        try:
+            server = self._idle.get_nowait()
+        except queue.Empty:
+            server = None
+        try:
+            if server is None:
+                server = self._open()
+            yield server
+        except Exception:
+            if server is not None:
+                try:
+                    server.close()
+                except Exception:
+                    pass
+            server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put(server)
+            self._slots.put(None)
+
+    def close(self):
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+class OutboxSender:
+    """
+    Background sender that drains the persistent outbox in AssessmentStore.
+    Messages go out concurrently over pooled connections, at most `rate_per_minute`.
+    A failed recipient is retried with exponential backoff up to `max_attempts`,
+    then marked 'failed'; other recipients are unaffected.
+    """
+
+    def __init__(self, store, pool: SMTPPool, sender: str, rate_per_minute: int = 60,
+                 max_attempts: int = 5, backoff_seconds: float = 30, concurrency: int = 4, poll_seconds: float = 2):
+        self.store = store
+        self.pool = pool
+        self.sender = sender
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._next_slot = 0.0
+        # body_id -> rendered HTML, read once per body; each message gets its own MIMEText,
+        # since a MIME part attached to several messages is not safe to flatten on several threads
+        self._bodies = OrderedDict()
+        self._task = None
+        self._wakeup = None
+
+    async def _throttle(self):
+        # Called from one task at a time per message; slots are spaced `interval` apart
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _body_html(self, message: dict) -> str:
+        body_id = message.get("body_id")
+        if not body_id:
+            return message["body"]
+        html = self._bodies.get(body_id)
+        if html is None:
+            html = self.store.get_email_body(body_id)
+            self._bodies[body_id] = html
+            if len(self._bodies) > 32:
+                self._bodies.popitem(last=False)
+        return html
+
+    def _prepare(self, batch: list) -> list:
+        """Assemble MIME messages for a claimed batch; the body HTML is shared, the MIME parts are not."""
+        prepared = []
+        for message in batch:
+            msg = MIMEMultipart()
+            msg['From'] = self.sender
+            msg['To'] = message["email"]
+            msg['Subject'] = message["subject"]
+            msg.attach(MIMEText(self._body_html(message), 'html'))
+            prepared.append((message, msg))
+        return prepared
+
+    def _send(self, msg: MIMEMultipart):
+        with self.pool.connection() as server:
+            server.send_message(msg)
+
+    async def _deliver(self, message: dict, msg: MIMEMultipart, limit: asyncio.Semaphore):
+        async with limit:
+            await self._throttle()
+            attempts = message["attempts"] + 1
+            try:
+                await asyncio.to_thread(self._send, msg)
+                await asyncio.to_thread(self.store.update_email, message["id"], "sent", attempts)
+            except Exception as e:
+                if attempts >= self.max_attempts:
+                    print(f"❌ SMTP Error: giving up on {message['email']} after {attempts} attempts: {e}")
+                    await asyncio.to_thread(self.store.update_email, message["id"], "failed", attempts, 0, str(e))
+                else:
+                    retry_at = time.time() + self.backoff_seconds * 2 ** (attempts - 1)
+                    print(f"⚠️ SMTP Warning: {message['email']} attempt {attempts} failed, retrying: {e}")
+                    await asyncio.to_thread(self.store.update_email, message["id"], "queued", attempts, retry_at, str(e))
+
+    async def _run(self):
+        requeued = await asyncio.to_thread(self.store.requeue_stale_emails)
+        if requeued:
+            print(f"DEBUG: Re-queued {requeued} emails interrupted by a restart")
+        limit = asyncio.Semaphore(self.concurrency)
+        while True:
+            batch = []
+            try:
+                batch = await asyncio.to_thread(self.store.claim_due_emails, self.concurrency * 4)
+                if batch:
+                    prepared = await asyncio.to_thread(self._prepare, batch)
+                    await asyncio.gather(*(self._deliver(m, msg, limit) for m, msg in prepared))
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Outbox Warning: {e}")
+                # Claimed messages would otherwise sit in 'sending' until the next restart
+                try:
+                    released = await asyncio.to_thread(
+                        self.store.release_claimed_emails, [m["id"] for m in batch], str(e),
+                        time.time() + self.backoff_seconds, self.max_attempts
+                    )
+                    if released:
+                        print(f"DEBUG: Re-queued {released} claimed emails after the error")
+                except Exception as release_error:
+                    print(f"⚠️ Outbox Warning: could not re-queue claimed emails: {release_error}")
+            # Sleep until the next poll, or until notify() reports new mail
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.pool.close)
+
+def sender_from_env(store) -> OutboxSender:
+    user = os.getenv("SMTP_USER")
+    pool = SMTPPool(
+        host=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        port=int(os.getenv("SMTP_PORT", 587)),
+        user=user,
+        password=os.getenv("SMTP_PASSWORD"),
+        starttls=os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes"),
+        size=int(os.getenv("SMTP_POOL_SIZE", 4))
+    )
+    return OutboxSender(
+        store,
+        pool,
+        sender=user,
+        rate_per_minute=int(os.getenv("SMTP_RATE_PER_MINUTE", 60)),
+        max_attempts=int(os.getenv("SMTP_MAX_ATTEMPTS", 5)),
+        backoff_seconds=float(os.getenv("SMTP_BACKOFF_SECONDS", 30)),
+        concurrency=int(os.getenv("SMTP_POOL_SIZE", 4))
+    )
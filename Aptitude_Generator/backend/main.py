@@ -1,13 +1,17 @@
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from agent import generate_aptitude_questions
+from agent import generate_aptitude_questions, stream_aptitude_questions
+from storage import AssessmentStore, SubmissionLog
+from mailer import render_invite, sender_from_env
+from analytics import AnalyticsIndex
+from question_bank import QuestionBank, question_hash
+from grader import grader, run_case, normalize_output, LANGUAGES, GraderUnavailable
 
+import asyncio
 import json
 import time
 import uuid
@@ -16,33 +20,60 @@ import uuid
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, "../../.env"))
 
-# Database file at root level
+# Database at root level (assessments_db.json is the legacy store, imported once on startup)
 DB_FILE = os.path.abspath(os.path.join(basedir, "../../assessments_db.json"))
+SQLITE_FILE = os.path.abspath(os.path.join(basedir, "../../assessments.db"))
+SUBMISSION_LOG = os.path.abspath(os.path.join(basedir, "../../submissions_log.jsonl"))
+QUESTION_BANK_FILE = os.path.abspath(os.path.join(basedir, "../../question_bank.db"))
+# Cosine similarity of JD topic vectors above which a banked JD counts as near-identical
+QUESTION_BANK_THRESHOLD = float(os.getenv("QUESTION_BANK_THRESHOLD", 0.9))
+# Fold the submission log into SQLite every N seconds, or sooner once it holds this many entries
+COMPACT_INTERVAL = float(os.getenv("SUBMISSION_COMPACT_SECONDS", 300))
+COMPACT_MAX_ENTRIES = int(os.getenv("SUBMISSION_COMPACT_ENTRIES", 1000))
 BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:5500") # Default for local
 
 def init_db():
     try:
-        if not os.path.exists(DB_FILE):
-            print(f"DEBUG: Creating new database at {DB_FILE}")
-            with open(DB_FILE, "w") as f:
-                json.dump({"assessments": [], "submissions": []}, f)
-        else:
-            print(f"DEBUG: Database found at {DB_FILE}")
+        print(f"DEBUG: Opening database at {SQLITE_FILE}")
+        db = AssessmentStore(SQLITE_FILE)
+        db.migrate_from_json(DB_FILE)
+        return db
     except Exception as e:
         print(f"CRITICAL: Failed to initialize DB: {e}")
+        raise
 
-def get_db():
-    init_db()
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
-
-def save_db(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-    print(f"DEBUG: Database saved successfully to {DB_FILE}")
+db = init_db()
+submissions = SubmissionLog(SUBMISSION_LOG, db)
+analytics = AnalyticsIndex(submissions.all())
+question_bank = QuestionBank(QUESTION_BANK_FILE, QUESTION_BANK_THRESHOLD)
+mail_sender = sender_from_env(db)
 
 app = FastAPI(title="Aptitude Generator API")
 
+async def compaction_loop():
+    last = time.monotonic()
+    while True:
+        await asyncio.sleep(min(COMPACT_INTERVAL, 10))
+        if submissions.pending >= COMPACT_MAX_ENTRIES or time.monotonic() - last >= COMPACT_INTERVAL:
+            try:
+                await asyncio.to_thread(submissions.compact)
+            except Exception as e:
+                print(f"⚠️ Compaction Warning: {e}")
+            last = time.monotonic()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    app.state.compaction_task = asyncio.create_task(compaction_loop())
+    mail_sender.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    app.state.compaction_task.cancel()
+    await mail_sender.stop()
+    grader.shutdown()
+    submissions.compact()
+    submissions.close()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -54,6 +85,17 @@ app.add_middleware(
 
 class JDRequest(BaseModel):
     jd_text: str
+    use_bank: bool = True   # Serve repeat / near-identical JDs from the question bank
+    top_up: bool = False    # On a partial bank hit, generate only the missing questions
+
+class SubmissionRequest(BaseModel):
+    token: str
+    email: str
+    mcq_score: int = 0
+    mcq_total: int = 0
+    suspicious: str = "Normal"
+    language: str = "python"
+    code_solutions: dict[str, str] = {}  # question index -> code
 
 class EmailRequest(BaseModel):
     emails: list[str]
@@ -71,141 +113,258 @@ async def generate_aptitude(request: JDRequest):
         raise HTTPException(status_code=400, detail="Job Description text is empty")
     
     try:
-        result = generate_aptitude_questions(request.jd_text)
-        return result # returns {"mcqs": [...], "coding_questions": [...]}
+        if request.use_bank:
+            banked = question_bank.lookup(request.jd_text)
+            if banked["matched"] and banked["missing_mcqs"] <= 0 and banked["missing_coding"] <= 0:
+                print(f"⚡ Served {len(banked['mcqs'])} MCQs and {len(banked['coding_questions'])} Coding questions from the question bank")
+                return {"mcqs": number_mcqs(banked["mcqs"]), "coding_questions": banked["coding_questions"], "source": "bank"}
+            if banked["matched"] and request.top_up:
+                print(f"DEBUG: Topping up {banked['missing_mcqs']} MCQs and {banked['missing_coding']} Coding questions")
+                extra = await generate_aptitude_questions(
+                    request.jd_text, mcq_count=max(banked["missing_mcqs"], 0), coding_count=max(banked["missing_coding"], 0)
+                )
+                mcqs = merge_questions(banked["mcqs"], extra["mcqs"])
+                coding = merge_questions(banked["coding_questions"], extra["coding_questions"])
+                if extra["complete"]:
+                    question_bank.add(request.jd_text, mcqs, coding,
+                                      coding_count=len(banked["coding_questions"]) + banked["missing_coding"])
+                return {"mcqs": number_mcqs(mcqs), "coding_questions": coding, "source": "bank+llm"}
+
+        result = await generate_aptitude_questions(request.jd_text)
+        if not result["mcqs"]:
+            raise RuntimeError("No MCQs could be generated")
+        # Partial generations are served but not banked, so a failed shard is not replayed for every similar JD
+        if result["complete"]:
+            question_bank.add(request.jd_text, result["mcqs"], result["coding_questions"], coding_count=result["coding_count"])
+        else:
+            print("⚠️ Incomplete generation; not banked")
+        return {"mcqs": result["mcqs"], "coding_questions": result["coding_questions"], "complete": result["complete"], "source": "llm"}
     except Exception as e:
         print(f"Error generating content: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/send-assessment")
-async def send_assessment(request: EmailRequest, background_tasks: BackgroundTasks):
-    print(f"\n--- 📧 REQUEST: Send Assessment to {len(request.emails)} candidates ---")
-    
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    if not all([smtp_user, smtp_password]):
-        raise HTTPException(status_code=500, detail="SMTP credentials not configured.")
+@app.post("/generate-aptitude/stream")
+async def generate_aptitude_stream(request: JDRequest):
+    """
+    Server-sent events: one `mcq` / `coding` event per question as soon as it is complete,
+    then `done` with the counts (or `error`). Bank hits are streamed straight from the bank.
+    Only complete generations are banked; `done` carries `complete: false` otherwise.
+    """
+    print(f"\n--- 🤖 REQUEST: Generate Aptitude & Coding (streaming) ---")
+    if not request.jd_text.strip():
+        raise HTTPException(status_code=400, detail="Job Description text is empty")
 
-    def update_db_task():
+    async def events():
+        mcqs, coding = [], []
         try:
-            token = request.assessment_link.split("token=")[-1]
-            db = get_db()
-            db["assessments"].append({
-                "id": str(uuid.uuid4()),
-                "token": token,
-                "job_title": request.job_title,
-                "emails": request.emails,
-                "mcqs": request.mcqs,
-                "coding_questions": request.coding_questions,
-                "timestamp": time.time(),
-                "status": "Sent"
-            })
-            save_db(db)
+            banked = question_bank.lookup(request.jd_text) if request.use_bank else None
+            if banked and banked["matched"] and banked["missing_mcqs"] <= 0 and banked["missing_coding"] <= 0:
+                for question in number_mcqs(banked["mcqs"]):
+                    yield sse("mcq", question)
+                for question in banked["coding_questions"]:
+                    yield sse("coding", question)
+                yield sse("done", {"mcqs": len(banked["mcqs"]), "coding_questions": len(banked["coding_questions"]), "source": "bank"})
+                return
+
+            summary = {}
+            async for kind, question in stream_aptitude_questions(request.jd_text):
+                if kind == "done":
+                    summary = question
+                    continue
+                (mcqs if kind == "mcq" else coding).append(question)
+                yield sse(kind, question)
+            if not mcqs:
+                raise RuntimeError("No MCQs could be generated")
+            if summary.get("complete"):
+                question_bank.add(request.jd_text, mcqs, coding, coding_count=summary["coding_count"])
+            else:
+                print("⚠️ Incomplete generation; not banked")
+            yield sse("done", {"mcqs": len(mcqs), "coding_questions": len(coding), "complete": bool(summary.get("complete")), "source": "llm"})
         except Exception as e:
-            print(f"⚠️ DB Warning: {e}")
+            print(f"Error streaming content: {e}")
+            yield sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def merge_questions(*groups) -> list:
+    """Concatenate question lists, dropping duplicates (same normalized question text)."""
+    seen, merged = set(), []
+    for group in groups:
+        for question in group:
+            key = question_hash(question)
+            if key not in seen:
+                seen.add(key)
+                merged.append(question)
+    return merged
 
-    background_tasks.add_task(update_db_task)
+def number_mcqs(mcqs: list) -> list:
+    # Banked MCQs may come from several generations, so ids are reassigned in order
+    return [dict(q, id=f"Q{i}") for i, q in enumerate(mcqs, start=1)]
+
+@app.post("/send-assessment")
+async def send_assessment(request: EmailRequest):
+    print(f"\n--- 📧 REQUEST: Send Assessment to {len(request.emails)} candidates ---")
+
+    if not os.getenv("SMTP_USER"):
+        raise HTTPException(status_code=500, detail="SMTP credentials not configured.")
 
+    # Saved and queued here; the outbox sender delivers in the background
+    token = request.assessment_link.split("token=")[-1]
     try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-
-        format_info = ""
-        if request.mcq_count > 0: format_info += f"<li><strong>Aptitude:</strong> {request.mcq_count} MCQs</li>"
-        if request.coding_count > 0: format_info += f"<li><strong>Coding:</strong> {request.coding_count} DSA Questions</li>"
-
-        for email in request.emails:
-            msg = MIMEMultipart()
-            msg['From'] = smtp_user
-            msg['To'] = email
-            msg['Subject'] = f"Career Opportunity | {request.job_title} Technical Evaluation"
-
-            body = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <h2 style="color: #6366f1;">Congratulations!</h2>u
-                <p>Dear Candidate,</p>
-                <p>Your profile for the <strong>{request.job_title}</strong> role has been shortlisted. Please complete the following technical assessment.</p>
-                
-                <div style="background: #f4f4f9; padding: 20px; border-radius: 10px; border-left: 5px solid #6366f1; margin: 20px 0;">
-                    <p><strong>Assessment Details:</strong></p>
-                    <ul>
-                        {format_info}
-                        <li><strong>Environment:</strong> Online IDE (Multiple Languages Supported)</li>
-                        <li><strong>Estimated Time:</strong> 1 Hour</li>
-                    </ul>
-
-                    <div style="background: #fff5f5; border: 1px solid #feb2b2; padding: 15px; border-radius: 8px; margin-top: 15px;">
-                        <p style="color: #c53030; margin-top: 0;"><strong>⚠️ PROCTORING RULES:</strong></p>
-                        <p style="font-size: 0.9rem; margin-bottom: 0;">Camera must stay ON. Tab switching and head movement are strictly monitored by AI.</p>
-                    </div>
-
-                    <p style="text-align: center; margin-top: 25px;">
-                        <a href="{request.assessment_link}" style="background: #6366f1; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; font-weight: bold;">Enter Test Environment</a>
-                    </p>
-                </div>
-                <p>Best Regards,<br><strong>Talent Acquisition Team</strong><br>RecruitAI</p>
-            </body>
-            </html>
-            """
-            msg.attach(MIMEText(body, 'html'))
-            server.send_message(msg)
-        
-        server.quit()
-        return {"status": "success"}
+        db.add_assessment({
+            "id": str(uuid.uuid4()),
+            "token": token,
+            "job_title": request.job_title,
+            "emails": request.emails,
+            "mcqs": request.mcqs,
+            "coding_questions": request.coding_questions,
+            "timestamp": time.time(),
+            "status": "Sent"
+        })
+        subject, body = render_invite(request.job_title, request.mcq_count, request.coding_count, request.assessment_link)
+        db.enqueue_emails(token, request.emails, subject, body)
     except Exception as e:
-        print(f"❌ SMTP Error: {e}")
+        print(f"❌ Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    mail_sender.notify()
+    print(f"DEBUG: Queued {len(request.emails)} emails for {token}")
+    return {"status": "queued", "token": token, "queued": len(request.emails)}
+
+@app.get("/delivery-status/{token}")
+async def delivery_status(token: str):
+    return db.delivery_status(token)
+
 @app.get("/get-assessment/{token}")
 async def get_assessment(token: str):
-    db = get_db()
-    assessment = next((a for a in db["assessments"] if a["token"] == token), None)
+    assessment = db.get_assessment(token)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
+    # Test cases stay on the server for grading; candidates only see the example
+    coding = [{k: v for k, v in q.items() if k != "test_cases"} for q in assessment.get("coding_questions", [])]
     return {
         "mcqs": assessment.get("mcqs", []), 
-        "coding": assessment.get("coding_questions", []), 
+        "coding": coding, 
         "job_title": assessment["job_title"]
     }
 
 @app.post("/submit-assessment")
-async def submit_assessment(data: dict):
-    # data: { token, email, mcq_score, mcq_total, coding_score, coding_total, suspicious }
-    print(f"\n--- 📝 REQUEST: Candidate Submission ({data.get('email')}) ---")
+async def submit_assessment(data: SubmissionRequest):
+    # Scores are validated by the model before anything is written, so the log only holds well-formed records
+    print(f"\n--- 📝 REQUEST: Candidate Submission ({data.email}) ---")
     try:
-        db = get_db()
-        db["submissions"].append({
-            "token": data["token"],
-            "email": data["email"],
-            "mcq_score": data.get("mcq_score", 0),
-            "mcq_total": data.get("mcq_total", 0),
-            "coding_score": data.get("coding_score", 0),
-            "coding_total": data.get("coding_total", 0),
+        # Coding answers are graded here against the stored test cases; a client-reported coding_score is ignored
+        assessment = db.get_assessment(data.token)
+        coding_questions = assessment.get("coding_questions", []) if assessment else []
+        graded = {"coding_score": 0, "coding_total": len(coding_questions), "results": []}
+        coding_graded = True
+        if coding_questions:
+            try:
+                graded = await grader.grade(data.language, data.code_solutions, coding_questions)
+                print(f"DEBUG: Graded coding answers: {graded['coding_score']}/{graded['coding_total']}")
+            except GraderUnavailable as e:
+                # Keep the submission; coding is left ungraded rather than run outside a sandbox
+                print(f"⚠️ Coding answers not graded: {e}")
+                coding_graded = False
+
+        submission = {
+            "token": data.token,
+            "email": data.email,
+            "mcq_score": data.mcq_score,
+            "mcq_total": data.mcq_total,
+            "coding_score": graded["coding_score"],
+            "coding_total": graded["coding_total"],
+            "coding_results": [{"title": r["title"], "passed": r["passed"], "total": r["total"]} for r in graded["results"]],
+            "coding_graded": coding_graded,
             "timestamp": time.time(),
-            "suspicious": data.get("suspicious", "Normal")
-        })
-        save_db(db)
+            "suspicious": data.suspicious
+        }
+        submissions.append(submission)
+        analytics.add(submission)
         return {"status": "success"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"❌ Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class RunCodeRequest(BaseModel):
+    token: str
+    question_index: int
+    language: str = "python"
+    code: str
+
+@app.post("/run-code")
+async def run_code(request: RunCodeRequest):
+    """Run a candidate's code on the question's visible example (hidden test cases are only used at submission)."""
+    if request.language not in LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language '{request.language}'")
+    assessment = db.get_assessment(request.token)
+    coding_questions = assessment.get("coding_questions", []) if assessment else []
+    if not 0 <= request.question_index < len(coding_questions):
+        raise HTTPException(status_code=404, detail="Coding question not found")
+    question = coding_questions[request.question_index]
+    try:
+        run = await asyncio.get_running_loop().run_in_executor(
+            grader.pools[request.language], run_case, request.language, request.code, str(question.get("example_input", ""))
+        )
+    except GraderUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    expected = str(question.get("example_output", ""))
+    return dict(run, expected=expected, passed=run["status"] == "ok" and normalize_output(run["stdout"]) == normalize_output(expected))
+
 @app.get("/get-analytics")
 async def get_analytics():
-    db = get_db()
-    return db
+    return {"assessments": db.list_assessments(), "submissions": submissions.all()}
+
+@app.get("/analytics")
+async def get_analytics_page(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=200),
+    job_title: str = None,
+    since: float = None,
+    until: float = None
+):
+    # Aggregates only; raw submissions come from /analytics/{token}/submissions
+    matches, rows = db.list_assessment_summaries(job_title, since, until, (page - 1) * page_size, page_size)
+    for row in rows:
+        row.update(analytics.summary(row["token"]))
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": len(matches),
+        "total_invited": sum(invited for _, invited in matches),
+        "total_submissions": sum(analytics.count(token) for token, _ in matches),
+        "items": rows
+    }
+
+@app.get("/leaderboard/{token}")
+async def get_leaderboard(token: str, k: int = Query(10, ge=1, le=500)):
+    if not db.get_assessment(token):
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return {"token": token, "k": k, "submissions": analytics.count(token), "leaderboard": analytics.top(token, k)}
+
+@app.get("/analytics/{token}/submissions")
+async def get_token_submissions(token: str):
+    assessment = db.get_assessment(token)
+    if not assessment:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    return {
+        "token": token,
+        "job_title": assessment["job_title"],
+        "emails": assessment.get("emails", []),
+        "summary": analytics.summary(token),
+        "submissions": submissions.for_token(token)
+    }
 
 @app.delete("/delete-assessment/{token}")
 async def delete_assessment(token: str):
-    db = get_db()
-    db["assessments"] = [a for a in db["assessments"] if a["token"] != token]
-    db["submissions"] = [s for s in db["submissions"] if s["token"] != token]
-    save_db(db)
+    db.delete_assessment(token)
+    submissions.delete_token(token)
+    analytics.drop(token)
     return {"status": "success"}
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+import re
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jds (
+    jd_hash       TEXT PRIMARY KEY,
+    vector        TEXT NOT NULL,
+    coding_count  INTEGER NOT NULL,
+    created_at    REAL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    jd_hash   TEXT NOT NULL REFERENCES jds(jd_hash),
+    kind      TEXT NOT NULL,
+    q_hash    TEXT NOT NULL,
+    payload   TEXT NOT NULL,
+    UNIQUE (jd_hash, q_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_jd ON questions(jd_hash, kind);
+"""
+
+VECTOR_DIM = 2048
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "our", "that", "the", "to", "we", "will", "with", "you", "your", "this", "have", "has", "who", "their"
+}
+
+def normalize_jd(jd_text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace, so trivially different copies hash alike."""
+    return " ".join(re.findall(r"[a-z0-9+#]+", jd_text.lower()))
+
+def jd_hash(jd_text: str) -> str:
+    return hashlib.sha256(normalize_jd(jd_text).encode("utf-8")).hexdigest()
+
+def topic_vector(jd_text: str) -> dict:
+    """Hashed bag-of-words (log term frequency), L2-normalised; sparse {bucket: weight}."""
+    counts = {}
+    for word in normalize_jd(jd_text).split():
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        bucket = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "little") % VECTOR_DIM
+        counts[bucket] = counts.get(bucket, 0) + 1
+    vector = {b: 1 + math.log(c) for b, c in counts.items()}
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+    return {b: w / norm for b, w in vector.items()}
+
+def cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(k, 0.0) for k, w in a.items())
+
+def question_hash(question: dict) -> str:
+    text = question.get("question") or question.get("title") or json.dumps(question, sort_keys=True)
+    return hashlib.sha256(normalize_jd(text).encode("utf-8")).hexdigest()
+
+class QuestionBank:
+    """
+    Generated MCQs and coding problems, indexed by normalized-JD hash and by a hashed
+    bag-of-words topic vector of the JD. Exact or near-identical JDs (cosine >= `threshold`)
+    are served from the bank; lookup() also reports how many questions are still missing
+    so the caller can top up only those through the LLM.
+    """
+
+    def __init__(self, db_path: str, threshold: float = 0.9):
+        self.db_path = db_path
+        self.threshold = threshold
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+        # Vectors are small and sparse; keep them all in memory for the similarity scan
+        self._vectors = {
+            h: {int(k): w for k, w in json.loads(v).items()}
+            for h, v in self._conn().execute("SELECT jd_hash, vector FROM jds")
+        }
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _similar(self, key: str, vector: dict) -> list:
+        """[(similarity, jd_hash)] at or above the threshold, best first; an exact hash match ranks first."""
+        with self._lock:
+            matches = [(cosine(vector, v), h) for h, v in self._vectors.items() if h != key]
+            exact = key in self._vectors
+        matches = sorted((m for m in matches if m[0] >= self.threshold), reverse=True)
+        return ([(1.0, key)] if exact else []) + matches
+
+    def lookup(self, jd_text: str, mcq_count: int = 25) -> dict:
+        """
+        Questions banked for this JD or near-identical ones, deduplicated, best match first.
+        Returns {mcqs, coding_questions, missing_mcqs, missing_coding, matched}.
+        """
+        key = jd_hash(jd_text)
+        similar = self._similar(key, topic_vector(jd_text))
+        if not similar:
+            return {"mcqs": [], "coding_questions": [], "missing_mcqs": mcq_count, "missing_coding": None, "matched": 0}
+
+        conn = self._conn()
+        coding_count = conn.execute("SELECT coding_count FROM jds WHERE jd_hash = ?", (similar[0][1],)).fetchone()[0]
+        picked = {"mcq": [], "coding": []}
+        seen = set()
+        wanted = {"mcq": mcq_count, "coding": coding_count}
+        for _, h in similar:
+            for kind, q_hash, payload in conn.execute(
+                "SELECT kind, q_hash, payload FROM questions WHERE jd_hash = ? ORDER BY id", (h,)
+            ):
+                if q_hash not in seen and len(picked[kind]) < wanted[kind]:
+                    seen.add(q_hash)
+                    picked[kind].append(json.loads(payload))
+            if all(len(picked[k]) >= wanted[k] for k in picked):
+                break
+        return {
+            "mcqs": picked["mcq"],
+            "coding_questions": picked["coding"],
+            "missing_mcqs": mcq_count - len(picked["mcq"]),
+            "missing_coding": coding_count - len(picked["coding"]),
+            "matched": len(similar)
+        }
+
+    def add(self, jd_text: str, mcqs: list, coding_questions: list, coding_count: int):
+        """
+        Bank a complete generation for this JD. `coding_count` is how many coding questions
+        the JD calls for, as decided at generation time (never inferred from what arrived).
+        """
+        key = jd_hash(jd_text)
+        vector = topic_vector(jd_text)
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jds (jd_hash, vector, coding_count, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(vector), coding_count, time.time())
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (jd_hash, kind, q_hash, payload) VALUES (?, ?, ?, ?)",
+                [(key, "mcq", question_hash(q), json.dumps(q)) for q in mcqs]
+                + [(key, "coding", question_hash(q), json.dumps(q)) for q in coding_questions]
+            )
+        with self._lock:
+            self._vectors[key] = vector
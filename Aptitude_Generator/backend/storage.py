@@ -0,0 +1,429 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    token      TEXT PRIMARY KEY,
+    id         TEXT,
+    timestamp  REAL,
+    data       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assessment_emails (
+    token  TEXT NOT NULL REFERENCES assessments(token) ON DELETE CASCADE,
+    email  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_assessment_emails_email ON assessment_emails(email);
+CREATE INDEX IF NOT EXISTS idx_assessment_emails_token ON assessment_emails(token);
+CREATE TABLE IF NOT EXISTS submissions (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    token      TEXT NOT NULL,
+    email      TEXT,
+    timestamp  REAL,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_token ON submissions(token);
+CREATE INDEX IF NOT EXISTS idx_submissions_email ON submissions(email);
+CREATE TABLE IF NOT EXISTS email_bodies (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject  TEXT NOT NULL,
+    body     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    token         TEXT NOT NULL,
+    email         TEXT NOT NULL,
+    subject       TEXT NOT NULL,
+    body          TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'queued',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    next_attempt  REAL NOT NULL DEFAULT 0,
+    last_error    TEXT,
+    updated_at    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt);
+CREATE INDEX IF NOT EXISTS idx_outbox_token ON outbox(token);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT
+);
+"""
+
+class AssessmentStore:
+    """
+    SQLite storage for assessments and submissions (WAL mode).
+    Each record is kept as its original JSON document in `data`, with the lookup
+    fields (token, email, timestamp) pulled out into indexed columns, so reads by
+    token/email are index lookups and every write touches a single row.
+    One connection per thread; SQLite serialises writers.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            # Outbox rows written before shared bodies existed carry their own body
+            columns = [r[1] for r in conn.execute("PRAGMA table_info(outbox)")]
+            if "body_id" not in columns:
+                conn.execute("ALTER TABLE outbox ADD COLUMN body_id INTEGER REFERENCES email_bodies(id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # --- Assessments ---
+
+    def add_assessment(self, assessment: dict):
+        """
+        Saves an assessment under its token. Re-sending a token keeps the original
+        id and adds the new recipients to the existing ones instead of replacing them.
+        """
+        conn = self._conn()
+        with conn:
+            # Take the write lock before reading so two sends of one token can't race
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id, data FROM assessments WHERE token = ?", (assessment["token"],)).fetchone()
+            emails = list(assessment.get("emails", []))
+            if row:
+                existing = json.loads(row[1]).get("emails", [])
+                seen = {e.lower() for e in existing}
+                emails = existing + [e for e in emails if e.lower() not in seen]
+                assessment = {**assessment, "id": row[0]}
+            assessment = {**assessment, "emails": emails}
+            conn.execute(
+                "INSERT INTO assessments (token, id, timestamp, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(token) DO UPDATE SET timestamp = excluded.timestamp, data = excluded.data",
+                (assessment["token"], assessment.get("id"), assessment.get("timestamp"), json.dumps(assessment))
+            )
+            known = {r[0] for r in conn.execute("SELECT email FROM assessment_emails WHERE token = ?", (assessment["token"],))}
+            conn.executemany(
+                "INSERT INTO assessment_emails (token, email) VALUES (?, ?)",
+                [(assessment["token"], e) for e in dict.fromkeys(email.lower() for email in emails) if e not in known]
+            )
+        return assessment
+
+    def get_assessment(self, token: str):
+        row = self._conn().execute("SELECT data FROM assessments WHERE token = ?", (token,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def assessments_for_email(self, email: str) -> list:
+        rows = self._conn().execute(
+            "SELECT a.data FROM assessments a JOIN assessment_emails e ON e.token = a.token "
+            "WHERE e.email = ? ORDER BY a.timestamp", (email.lower(),)
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def list_assessments(self) -> list:
+        rows = self._conn().execute("SELECT data FROM assessments ORDER BY timestamp").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def list_assessment_summaries(self, job_title: str = None, since: float = None, until: float = None,
+                                  offset: int = 0, limit: int = 20) -> tuple:
+        """
+        ([(token, invited)] for every match, page of assessment metadata without the
+        question payloads), newest first.
+        """
+        where, params = [], []
+        if job_title:
+            where.append("json_extract(data, '$.job_title') LIKE ?")
+            params.append(f"%{job_title}%")
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp <= ?")
+            params.append(until)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        conn = self._conn()
+        matches = conn.execute(
+            f"SELECT token, COALESCE(json_array_length(data, '$.emails'), 0) FROM assessments {clause}", params
+        ).fetchall()
+        rows = conn.execute(
+            "SELECT token, json_extract(data, '$.job_title'), timestamp, json_extract(data, '$.status'), "
+            "json_array_length(data, '$.emails'), "
+            "COALESCE(json_array_length(data, '$.mcqs'), json_array_length(data, '$.questions'), 0), "
+            "COALESCE(json_array_length(data, '$.coding_questions'), 0) "
+            f"FROM assessments {clause} ORDER BY timestamp DESC LIMIT ? OFFSET ?", params + [limit, offset]
+        ).fetchall()
+        keys = ("token", "job_title", "timestamp", "status", "invited", "mcq_count", "coding_count")
+        return matches, [dict(zip(keys, r)) for r in rows]
+
+    def delete_assessment(self, token: str):
+        # Submissions for the token are dropped through a SubmissionLog tombstone
+        with self._conn() as conn:
+            conn.execute("DELETE FROM assessments WHERE token = ?", (token,))
+
+    # --- Submissions (compacted snapshot; new ones arrive through SubmissionLog) ---
+
+    def list_submissions(self) -> list:
+        """[(seq, record)] in submission order."""
+        rows = self._conn().execute("SELECT seq, data FROM submissions ORDER BY seq").fetchall()
+        return [(r[0], json.loads(r[1])) for r in rows]
+
+    def compacted_seq(self) -> int:
+        """Highest log sequence number already folded into this snapshot."""
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'log_compacted_seq'").fetchone()
+        max_seq = conn.execute("SELECT MAX(seq) FROM submissions").fetchone()[0] or 0
+        return max(int(row[0]) if row else 0, max_seq)
+
+    def apply_log(self, entries: list):
+        """Fold submission log entries into the snapshot in one transaction."""
+        compacted = self.compacted_seq()
+        entries = [e for e in entries if e["seq"] > compacted]
+        if not entries:
+            return
+        with self._conn() as conn:
+            for entry in entries:
+                if entry["op"] == "add":
+                    record = entry["record"]
+                    conn.execute(
+                        "INSERT OR REPLACE INTO submissions (seq, token, email, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                        (entry["seq"], record["token"], record.get("email"), record.get("timestamp"), json.dumps(record))
+                    )
+                elif entry["op"] == "delete":
+                    conn.execute("DELETE FROM submissions WHERE token = ? AND seq < ?", (entry["token"], entry["seq"]))
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('log_compacted_seq', ?)", (str(entries[-1]["seq"]),)
+            )
+
+    # --- Email outbox (drained by mailer.OutboxSender) ---
+
+    def enqueue_emails(self, token: str, emails: list, subject: str, body: str):
+        """Queue one message per recipient; the rendered body is stored once and shared."""
+        now = time.time()
+        with self._conn() as conn:
+            body_id = conn.execute("INSERT INTO email_bodies (subject, body) VALUES (?, ?)", (subject, body)).lastrowid
+            conn.executemany(
+                "INSERT INTO outbox (token, email, subject, body, body_id, next_attempt, updated_at) VALUES (?, ?, ?, '', ?, ?, ?)",
+                [(token, email, subject, body_id, now, now) for email in emails]
+            )
+
+    def claim_due_emails(self, limit: int) -> list:
+        """Mark up to `limit` due messages as 'sending' and return them, grouped by shared body."""
+        now = time.time()
+        with self._conn() as conn:
+            rows = conn.execute(
+                "SELECT id, token, email, subject, body, attempts, body_id FROM outbox "
+                "WHERE status = 'queued' AND next_attempt <= ? ORDER BY next_attempt LIMIT ?", (now, limit)
+            ).fetchall()
+            conn.executemany("UPDATE outbox SET status = 'sending', updated_at = ? WHERE id = ?", [(now, r[0]) for r in rows])
+        rows.sort(key=lambda r: r[6] or 0)
+        return [dict(zip(("id", "token", "email", "subject", "body", "attempts", "body_id"), r)) for r in rows]
+
+    def get_email_body(self, body_id: int) -> str:
+        row = self._conn().execute("SELECT body FROM email_bodies WHERE id = ?", (body_id,)).fetchone()
+        return row[0] if row else ""
+
+    def requeue_stale_emails(self) -> int:
+        """Messages left in 'sending' by a crash are sent again."""
+        with self._conn() as conn:
+            return conn.execute("UPDATE outbox SET status = 'queued' WHERE status = 'sending'").rowcount
+
+    def release_claimed_emails(self, msg_ids: list, error: str, retry_at: float, max_attempts: int) -> int:
+        """
+        Put messages of a batch that broke down before delivery back in the queue, counting
+        the attempt ('failed' once `max_attempts` is reached). Messages already settled are left alone.
+        """
+        if not msg_ids:
+            return 0
+        placeholders = ",".join("?" * len(msg_ids))
+        with self._conn() as conn:
+            return conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END, "
+                f"next_attempt = ?, last_error = ?, updated_at = ? WHERE status = 'sending' AND id IN ({placeholders})",
+                (max_attempts, retry_at, error, time.time(), *msg_ids)
+            ).rowcount
+
+    def update_email(self, msg_id: int, status: str, attempts: int, next_attempt: float = 0, error: str = None):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, attempts, next_attempt, error, time.time(), msg_id)
+            )
+
+    def delivery_status(self, token: str) -> dict:
+        rows = self._conn().execute(
+            "SELECT email, status, attempts, last_error, updated_at FROM outbox WHERE token = ? ORDER BY id", (token,)
+        ).fetchall()
+        counts = {}
+        for r in rows:
+            counts[r[1]] = counts.get(r[1], 0) + 1
+        return {
+            "token": token,
+            "counts": counts,
+            "recipients": [dict(zip(("email", "status", "attempts", "last_error", "updated_at"), r)) for r in rows]
+        }
+
+    # --- One-time migration from assessments_db.json ---
+
+    def migrate_from_json(self, json_path: str) -> bool:
+        """Import the legacy JSON database once (recorded in `meta`). Returns True if it ran."""
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return False
+        if not os.path.exists(json_path):
+            return False
+
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        with conn:
+            for assessment in data.get("assessments", []):
+                if assessment.get("token"):
+                    conn.execute(
+                        "INSERT OR REPLACE INTO assessments (token, id, timestamp, data) VALUES (?, ?, ?, ?)",
+                        (assessment["token"], assessment.get("id"), assessment.get("timestamp"), json.dumps(assessment))
+                    )
+                    conn.executemany(
+                        "INSERT INTO assessment_emails (token, email) VALUES (?, ?)",
+                        [(assessment["token"], e.lower()) for e in assessment.get("emails", [])]
+                    )
+            conn.executemany(
+                "INSERT INTO submissions (token, email, timestamp, data) VALUES (?, ?, ?, ?)",
+                [(s["token"], s.get("email"), s.get("timestamp"), json.dumps(s)) for s in data.get("submissions", []) if s.get("token")]
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (os.path.abspath(json_path),))
+        print(f"DEBUG: Migrated {len(data.get('assessments', []))} assessments and "
+              f"{len(data.get('submissions', []))} submissions from {json_path}")
+        return True
+
+class SubmissionLog:
+    """
+    Append-only, fsync'd JSONL log of submission events in front of the SQLite snapshot.
+    - append() writes one line and fsyncs it, so a submission costs the same whatever the history size.
+    - delete_token() appends a tombstone instead of rewriting anything.
+    - On startup the snapshot is loaded and the log replayed into an in-memory index.
+    - compact() rotates the log and folds the rotated part into SQLite; the
+      snapshot records the last folded sequence number, so a crash mid-compaction
+      just replays (and re-folds) the same entries.
+    """
+
+    def __init__(self, path: str, store: AssessmentStore):
+        self.path = path
+        self.compacting_path = path + ".compacting"
+        self.store = store
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._records = {}   # seq -> submission, in submission order
+        self._by_token = {}  # token -> [seq]
+        self.pending = 0     # entries not yet folded into the snapshot
+
+        # A compaction interrupted by a crash is finished before loading the snapshot
+        if os.path.exists(self.compacting_path):
+            self._fold(self.compacting_path)
+        self._seq = store.compacted_seq()
+        for seq, record in store.list_submissions():
+            self._index_add(seq, record)
+        for entry in self._read(self.path):
+            self._apply(entry)
+        self._file = open(self.path, "a", encoding="utf-8")
+        print(f"DEBUG: Submission log replayed ({len(self._records)} submissions, {self.pending} pending compaction)")
+
+    # --- In-memory index ---
+
+    def _index_add(self, seq: int, record: dict):
+        self._records[seq] = record
+        self._by_token.setdefault(record["token"], []).append(seq)
+        self._seq = max(self._seq, seq)
+
+    def _apply(self, entry: dict):
+        if entry["seq"] <= self._seq:
+            return  # Already in the snapshot
+        if entry["op"] == "add":
+            self._index_add(entry["seq"], entry["record"])
+        elif entry["op"] == "delete":
+            for seq in self._by_token.pop(entry["token"], []):
+                self._records.pop(seq, None)
+            self._seq = entry["seq"]
+        self.pending += 1
+
+    # --- Log file ---
+
+    def _read(self, path: str) -> list:
+        entries = []
+        if not os.path.exists(path):
+            return entries
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Torn final line from a crash mid-append; it was never acknowledged
+                    print(f"DEBUG: Skipping unreadable line in {path}")
+        return entries
+
+    def _write(self, entry: dict):
+        with self._lock:
+            self._seq += 1
+            entry["seq"] = self._seq
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending += 1
+            if entry["op"] == "add":
+                self._index_add(entry["seq"], entry["record"])
+            else:
+                for seq in self._by_token.pop(entry["token"], []):
+                    self._records.pop(seq, None)
+
+    def append(self, submission: dict):
+        self._write({"op": "add", "record": submission})
+
+    def delete_token(self, token: str):
+        self._write({"op": "delete", "token": token})
+
+    # --- Reads ---
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._records.values())
+
+    def for_token(self, token: str) -> list:
+        with self._lock:
+            return [self._records[seq] for seq in self._by_token.get(token, [])]
+
+    # --- Compaction ---
+
+    def _fold(self, path: str):
+        self.store.apply_log(self._read(path))
+        os.remove(path)
+
+    def compact(self) -> int:
+        """Fold the log into the SQLite snapshot. Returns the number of entries folded."""
+        with self._compact_lock:
+            with self._lock:
+                if self.pending == 0:
+                    return 0
+                folded = self.pending
+                self._file.close()
+                os.replace(self.path, self.compacting_path)
+                self._file = open(self.path, "a", encoding="utf-8")
+                self.pending = 0
+            # Submissions keep appending to the fresh log while this runs
+            self._fold(self.compacting_path)
+        print(f"DEBUG: Compacted {folded} submission log entries into the snapshot")
+        return folded
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+if __name__ == "__main__":
+    # Manual migration: python storage.py [json_path] [db_path]
+    import sys
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    json_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(basedir, "../../assessments_db.json")
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(basedir, "../../assessments.db")
+    store = AssessmentStore(db_path)
+    if not store.migrate_from_json(json_path):
+        print("Nothing to migrate (already migrated or JSON file missing).")
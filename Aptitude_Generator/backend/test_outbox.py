@@ -0,0 +1,64 @@
+"""
+Outbox sender against a local aiosmtpd server (no real SMTP account needed).
+Run from Aptitude_Generator/backend: python -m pytest test_outbox.py
+"""
+import asyncio
+import os
+import socket
+import time
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Message
+
+from mailer import OutboxSender, SMTPPool, render_invite
+from storage import AssessmentStore
+
+class Inbox(Message):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def handle_message(self, message):
+        self.messages.append(message)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    try:
+        yield controller, inbox
+    finally:
+        controller.stop()
+
+def test_outbox_delivers_queued_invites(tmp_path, smtp_server):
+    controller, inbox = smtp_server
+    store = AssessmentStore(os.path.join(tmp_path, "assessments.db"))
+    subject, body = render_invite("Backend Engineer", 25, 4, "http://localhost/test.html?token=abc")
+    store.enqueue_emails("abc", ["first@example.com", "second@example.com"], subject, body)
+
+    pool = SMTPPool(controller.hostname, controller.port, "hr@example.com", None, starttls=False, size=2)
+    sender = OutboxSender(store, pool, sender="hr@example.com", rate_per_minute=0, poll_seconds=0.1)
+
+    async def run():
+        sender.start()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if store.delivery_status("abc")["counts"].get("sent") == 2:
+                break
+            await asyncio.sleep(0.05)
+        await sender.stop()
+
+    asyncio.run(run())
+
+    assert store.delivery_status("abc")["counts"] == {"sent": 2}
+    assert sorted(m["To"] for m in inbox.messages) == ["first@example.com", "second@example.com"]
+    assert all(m["Subject"] == subject for m in inbox.messages)
@@ -109,7 +109,7 @@ function setupEventListeners() {
         showLoader(true);
         
         try {
-            const response = await fetch('http://127.0.0.1:8002/generate-aptitude', {
+            const response = await fetch('http://127.0.0.1:8002/generate-aptitude/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ jd_text: jdText })
@@ -117,17 +117,29 @@ function setupEventListeners() {
 
             if (!response.ok) throw new Error("Failed to generate questions");
 
-            const data = await response.json();
-            console.log("DEBUG: Received Data:", data);
-            allMcqs = data.mcqs || [];
-            allCodingQuestions = data.coding_questions || [];
-            
-            renderMcqsToSelect();
-            renderCodingToSelect();
-
-            showLoader(false);
-            showSection(selectionSection);
-            selectionSection.scrollIntoView({ behavior: 'smooth' });
+            // Questions arrive one by one; show the selection list as soon as the first is in
+            allMcqs = [];
+            allCodingQuestions = [];
+            let shown = false;
+            await readEventStream(response, (event, data) => {
+                if (event === 'error') throw new Error(data.detail || "Failed to generate questions");
+                if (event === 'mcq') {
+                    allMcqs.push(data);
+                    renderMcqsToSelect();
+                } else if (event === 'coding') {
+                    allCodingQuestions.push(data);
+                    renderCodingToSelect();
+                } else if (event === 'done') {
+                    console.log("DEBUG: Generation complete:", data);
+                }
+                if (!shown && (event === 'mcq' || event === 'coding')) {
+                    shown = true;
+                    showLoader(false);
+                    showSection(selectionSection);
+                    selectionSection.scrollIntoView({ behavior: 'smooth' });
+                }
+            });
+            if (!shown) throw new Error("No questions were generated");
         } catch (error) {
             console.error("GENERATION ERROR:", error);
             alert(`Error: ${error.message}\n\nPlease ensure the backend is running on port 8002 and your network allows the connection.`);
@@ -231,7 +243,8 @@ function setupEventListeners() {
                 throw new Error(err.detail || "Failed to send emails");
             }
 
-            await showCustomAlert("✅ Success!", `Assessments have been delivered to ${emailsArray.length} candidates successfully.`);
+            const result = await response.json();
+            await showCustomAlert("✅ Success!", `Assessment invites for ${result.queued} candidates are queued and being delivered in the background.`);
             emailModal.classList.add('hidden');
             receiverEmailsInput.value = '';
         } catch (error) {
@@ -456,6 +469,29 @@ function renderFinalLists() {
     });
 }
 
+// Minimal server-sent events reader for a fetch() response (EventSource cannot POST)
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message', data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : null);
+        }
+    }
+}
+
 function showLoader(show) {
     if (show) loader.classList.remove('hidden');
     else loader.classList.add('hidden');
@@ -558,6 +594,19 @@ function formatProctoringDate(timestamp) {
     return `${date} : ${time}`;
 }
 
+// Every page of /analytics (the endpoint caps page_size at 200), merged into one result
+async function fetchAllAnalytics(pageSize = 200) {
+    let merged = null;
+    for (let page = 1; ; page++) {
+        const response = await fetch(`http://127.0.0.1:8002/analytics?page=${page}&page_size=${pageSize}`);
+        if (!response.ok) throw new Error("Backend not reachable");
+        const data = await response.json();
+        if (!merged) merged = data;
+        else merged.items.push(...data.items);
+        if (data.items.length < pageSize || merged.items.length >= data.total) return merged;
+    }
+}
+
 async function showAnalysisDashboard() {
     mainGeneratorCard.classList.add('hidden');
     selectionSection.classList.add('hidden');
@@ -578,22 +627,19 @@ async function showAnalysisDashboard() {
     table.classList.remove('hidden');
 
     try {
-        const response = await fetch('http://127.0.0.1:8002/get-analytics');
-        if (!response.ok) throw new Error("Backend not reachable");
-        
-        const db = await response.json();
+        const data = await fetchAllAnalytics();
         
-        if (!db.assessments || db.assessments.length === 0) {
+        if (!data.items || data.items.length === 0) {
             table.classList.add('hidden');
             emptyState.classList.remove('hidden');
             return;
         }
 
         // Update Stats
-        const totalSent = db.assessments.reduce((acc, curr) => acc + curr.emails.length, 0);
+        const totalSent = data.total_invited;
         totalSentStat.textContent = totalSent;
         
-        const totalAttempted = db.submissions.length;
+        const totalAttempted = data.total_submissions;
         const rate = totalSent > 0 ? Math.round((totalAttempted / totalSent) * 100) : 0;
         completionRateStat.textContent = rate + '%';
 
@@ -607,13 +653,13 @@ async function showAnalysisDashboard() {
         }
 
         // Render Roles Table
-        rolesTbody.innerHTML = db.assessments.map(a => {
-            const attempted = db.submissions.filter(s => s.token === a.token).length;
-            const pending = a.emails.length - attempted;
+        rolesTbody.innerHTML = data.items.map(a => {
+            const attempted = a.submissions;
+            const pending = a.invited - attempted;
             const sentDate = formatProctoringDate(a.timestamp);
             
-            const mcqCount = a.mcqs ? a.mcqs.length : (a.questions ? a.questions.length : 0);
-            const codeCount = a.coding_questions ? a.coding_questions.length : 0;
+            const mcqCount = a.mcq_count;
+            const codeCount = a.coding_count;
 
             return `
                 <tr>
@@ -622,7 +668,7 @@ async function showAnalysisDashboard() {
                         <div style="font-size: 0.7rem; color: #94a3b8;">${mcqCount} MCQ | ${codeCount} Code</div>
                     </td>
                     <td><span class="status-badge status-sent">Sent</span></td>
-                    <td>${a.emails.length}</td>
+                    <td>${a.invited}</td>
                     <td>${attempted}</td>
                     <td>${new Date(a.timestamp * 1000).toLocaleDateString()}</td>
                     <td class="actions-cell">
@@ -674,13 +720,10 @@ window.viewCandidateDetails = async function(jobTitle, token) {
     candidateList.innerHTML = '<tr><td colspan="5" style="text-align:center; padding:20px;">Loading candidates...</td></tr>';
 
     try {
-        const response = await fetch('http://127.0.0.1:8002/get-analytics');
-        const db = await response.json();
-        
-        const assessment = db.assessments.find(a => a.token === token);
-        const submissions = db.submissions.filter(s => s.token === token);
-
-        if (!assessment) return;
+        const response = await fetch(`http://127.0.0.1:8002/analytics/${token}/submissions`);
+        if (!response.ok) return;
+        const assessment = await response.json();
+        const submissions = assessment.submissions;
 
         candidateList.innerHTML = assessment.emails.map(email => {
             const sub = submissions.find(s => s.email === email);
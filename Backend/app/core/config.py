@@ -21,6 +21,9 @@ class Settings(BaseSettings):
     text_format_weight: int = 5
     visual_weight: int = 30
     
+    # Keyword scorer: "exact" (substring match per JD keyword) or "bm25" (inverted index)
+    keyword_scorer: str = "exact"
+    
     # Thresholds
     visual_threshold: float = 40.0
     text_max_score: int = 70
@@ -32,6 +35,47 @@ class Settings(BaseSettings):
     enable_skill_exp: bool = True
     enable_project_complexity: bool = True
     
+    # Concurrency: threads for CPU-bound pipeline stages (PDF parsing, NLP, embeddings)
+    cpu_workers: int = min(4, os.cpu_count() or 1)
+    
+    # Admission control: concurrent /analyze jobs, buffered upload bytes, Groq calls per minute
+    max_concurrent_jobs: int = 2
+    max_inflight_mb: float = 512.0
+    max_queued_jobs: int = 8
+    queue_timeout_seconds: float = 120.0
+    llm_calls_per_minute: int = 30
+    
+    # Candidate Funnel (prefilter -> embeddings + scoring -> LLM); opt-in, since the prefilter drops resumes unscored
+    enable_funnel: bool = False
+    prefilter_keep_percent: float = 30.0
+    prefilter_min_candidates: int = 50
+    llm_not_selected_limit: int = 10
+    
+    # Profiling (opt-in per request via `profile` form field or `X-Profile` header)
+    enable_profiling: bool = False
+    profiling_interval_ms: float = 5.0
+    
+    # Gmail pre-ingestion: background poller that downloads, parses and embeds new resumes ahead of time
+    enable_gmail_ingest: bool = False
+    ingest_poll_interval_seconds: float = 300.0
+    ingest_lookback_days: int = 14
+    feature_cache_memory_entries: int = 512
+    
+    # Report storage: campaigns untouched for longer are removed by `report_store gc`
+    report_retention_days: int = 30
+    # Extracted features and cached embeddings unused for longer are removed by the same gc
+    cache_retention_days: int = 30
+    
+    # Logging (queue-based; JSON lines in a size-rotated file)
+    log_level: str = "INFO"
+    log_module_levels: str = ""
+    log_to_console: bool = True
+    log_to_file: bool = True
+    log_file: str = "backend.log"
+    log_json: bool = True
+    log_max_mb: float = 10.0
+    log_backup_count: int = 5
+    
     # Paths (Flexible)
     data_dir: str = "data"
     resume_dir: str = "data/resumes"
@@ -60,10 +104,51 @@ class Settings(BaseSettings):
             self.text_format_weight = config.getint('scoring', 'text_format_weight', fallback=self.text_format_weight)
             self.visual_weight = config.getint('scoring', 'visual_analysis_weight', fallback=self.visual_weight)
             self.location_weight = config.getint('scoring', 'location_weight', fallback=self.location_weight)
+            self.keyword_scorer = config.get('scoring', 'keyword_scorer', fallback=self.keyword_scorer).strip().lower()
             
         if 'advanced' in config:
             self.enable_anonymization = config.getboolean('advanced', 'enable_anonymization', fallback=self.enable_anonymization)
 
+        if 'performance' in config:
+            self.cpu_workers = config.getint('performance', 'cpu_workers', fallback=self.cpu_workers)
+
+        if 'admission' in config:
+            self.max_concurrent_jobs = config.getint('admission', 'max_concurrent_jobs', fallback=self.max_concurrent_jobs)
+            self.max_inflight_mb = config.getfloat('admission', 'max_inflight_mb', fallback=self.max_inflight_mb)
+            self.max_queued_jobs = config.getint('admission', 'max_queued_jobs', fallback=self.max_queued_jobs)
+            self.queue_timeout_seconds = config.getfloat('admission', 'queue_timeout_seconds', fallback=self.queue_timeout_seconds)
+            self.llm_calls_per_minute = config.getint('admission', 'llm_calls_per_minute', fallback=self.llm_calls_per_minute)
+
+        if 'funnel' in config:
+            self.enable_funnel = config.getboolean('funnel', 'enable_funnel', fallback=self.enable_funnel)
+            self.prefilter_keep_percent = config.getfloat('funnel', 'prefilter_keep_percent', fallback=self.prefilter_keep_percent)
+            self.prefilter_min_candidates = config.getint('funnel', 'prefilter_min_candidates', fallback=self.prefilter_min_candidates)
+            self.llm_not_selected_limit = config.getint('funnel', 'llm_not_selected_limit', fallback=self.llm_not_selected_limit)
+
+        if 'profiling' in config:
+            self.enable_profiling = config.getboolean('profiling', 'enable_profiling', fallback=self.enable_profiling)
+            self.profiling_interval_ms = config.getfloat('profiling', 'interval_ms', fallback=self.profiling_interval_ms)
+
+        if 'logging' in config:
+            self.log_level = config.get('logging', 'log_level', fallback=self.log_level)
+            self.log_module_levels = config.get('logging', 'module_levels', fallback=self.log_module_levels)
+            self.log_to_console = config.getboolean('logging', 'log_to_console', fallback=self.log_to_console)
+            self.log_to_file = config.getboolean('logging', 'log_to_file', fallback=self.log_to_file)
+            self.log_file = config.get('logging', 'log_file', fallback=self.log_file)
+            self.log_json = config.getboolean('logging', 'json_format', fallback=self.log_json)
+            self.log_max_mb = config.getfloat('logging', 'max_file_mb', fallback=self.log_max_mb)
+            self.log_backup_count = config.getint('logging', 'backup_count', fallback=self.log_backup_count)
+
+        if 'ingest' in config:
+            self.enable_gmail_ingest = config.getboolean('ingest', 'enable_gmail_ingest', fallback=self.enable_gmail_ingest)
+            self.ingest_poll_interval_seconds = config.getfloat('ingest', 'poll_interval_seconds', fallback=self.ingest_poll_interval_seconds)
+            self.ingest_lookback_days = config.getint('ingest', 'lookback_days', fallback=self.ingest_lookback_days)
+            self.feature_cache_memory_entries = config.getint('ingest', 'feature_cache_memory_entries', fallback=self.feature_cache_memory_entries)
+
+        if 'reports' in config:
+            self.report_retention_days = config.getint('reports', 'retention_days', fallback=self.report_retention_days)
+            self.cache_retention_days = config.getint('reports', 'cache_retention_days', fallback=self.cache_retention_days)
+
 @lru_cache()
 def get_settings():
     settings = Settings()
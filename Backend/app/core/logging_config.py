@@ -0,0 +1,99 @@
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# Trace ID of the request/job currently being handled (propagates into tasks and worker threads)
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+
+_listener = None
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+class TraceIdFilter(logging.Filter):
+    """Stamps each record with the caller's trace ID. Attached to the QueueHandler so it runs in the calling thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, trace_id, thread, msg."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        # QueueHandler.prepare() already folded any traceback into the message text
+        return json.dumps(entry, ensure_ascii=False)
+
+def parse_module_levels(spec: str) -> dict:
+    """'ResumeAgent=INFO, app.services.gmail_service=WARNING' -> {name: level}."""
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(settings):
+    """
+    Queue-based logging: callers (event loop, worker threads) only enqueue records;
+    a QueueListener thread formats them and does the console/file I/O.
+    File output is JSON lines with size-based rotation.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handlers = []
+    if settings.log_to_console:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - [%(trace_id)s] %(message)s"))
+        handlers.append(console)
+    if settings.log_to_file:
+        file_handler = logging.handlers.RotatingFileHandler(
+            settings.log_file,
+            maxBytes=int(settings.log_max_mb * 1024 * 1024),
+            backupCount=settings.log_backup_count,
+            encoding="utf-8"
+        )
+        if settings.log_json:
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - [%(trace_id)s] %(message)s"))
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(TraceIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.log_level.upper())
+    for name, level in parse_module_levels(settings.log_module_levels).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records (called at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,34 +1,44 @@
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
+import asyncio
+import contextvars
+import functools
+import time
 import shutil
 import os
 import json
 import logging
 import warnings
 import re
+import weakref
 from datetime import datetime
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 from .core.config import get_settings
-from .services import pdf_service, vector_service, ai_service, utils, gmail_service
+from .core import logging_config
+from .services import pdf_service, vector_service, ai_service, utils, gmail_service, profile_service, funnel_service, bm25_service, campaign_service, report_store, report_service, zip_stream, admission_service, job_service, ingest_service
 from .services.score_service import calculate_score
 from .models.schemas import LLMOutput
 
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Print to console
-        logging.FileHandler("backend.log", encoding="utf-8")  # Save to file
-    ]
-)
+# Configure Logging (non-blocking: records are queued, a listener thread writes console + rotating JSON file)
+logging_config.setup_logging(get_settings())
 logger = logging.getLogger("ResumeAgent")
 
 app = FastAPI(title="Resume Screening Agent API", version="2.2")
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Give every request a trace ID (client's X-Request-ID if sent) for its log lines."""
+    trace_id = request.headers.get("x-request-id") or logging_config.new_trace_id()
+    logging_config.trace_id_var.set(trace_id)
+    response = await call_next(request)
+    response.headers["X-Trace-ID"] = trace_id
+    return response
+
 # Allow CORS
 app.add_middleware(
     CORSMiddleware,
@@ -40,13 +50,99 @@ app.add_middleware(
 
 settings = get_settings()
 
+# CPU-bound stages (pypdf, spaCy, embeddings, scoring) run here, off the event loop.
+# Blocking I/O (Gmail, disk) goes through run_io: asyncio.to_thread and the loop's default executor.
+cpu_executor = ThreadPoolExecutor(max_workers=settings.cpu_workers, thread_name_prefix="analysis-cpu")
+
+async def run_cpu(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Copy the context so worker-thread log lines keep the request's trace ID;
+    # the thread is tagged with it too, so a per-request profiler samples only this job's work
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(cpu_executor, functools.partial(
+        ctx.run, profile_service.run_tagged, logging_config.trace_id_var.get(), fn, *args, **kwargs
+    ))
+
+async def run_io(fn, *args, **kwargs):
+    # Same tagging as run_cpu, so report writes, Gmail fetches and vector deletes show up in the job's profile
+    return await asyncio.to_thread(profile_service.run_tagged, logging_config.trace_id_var.get(), fn, *args, **kwargs)
+
+@app.on_event("startup")
+async def start_ingest_daemon():
+    if not settings.enable_gmail_ingest:
+        return
+    if not gmail_service.gmail_service.creds:
+        logger.warning("Gmail pre-ingestion enabled but no Gmail token (run setup_gmail_auth.py). Poller not started.")
+        return
+    logger.info(f"📬 Starting Gmail pre-ingestion (every {settings.ingest_poll_interval_seconds:g}s, last {settings.ingest_lookback_days} days)")
+    ingest_service.ingest_daemon.start(gmail_service.gmail_service)
+
+@app.on_event("shutdown")
+async def stop_ingest_daemon():
+    await ingest_service.ingest_daemon.stop()
+
+@app.get("/ingest/status")
+async def ingest_status():
+    """Gmail pre-ingestion poller state and cache hit counters."""
+    return dict(ingest_service.ingest_daemon.status(), enabled=settings.enable_gmail_ingest)
+
 @app.get("/")
-def root():
+async def root():
     return {"message": "Resume Screening Agent API is running."}
 
+@app.get("/admission")
+async def admission_status():
+    """Current load for monitoring: running jobs, queued jobs, buffered bytes, LLM budget."""
+    return dict(admission_service.admission_controller.snapshot(), **admission_service.llm_rate_limiter.snapshot())
+
+def _request_bytes(request: Request) -> int:
+    """Upload size of a request (multipart body length), used for in-flight byte accounting."""
+    try:
+        return int(request.headers.get("content-length", 0))
+    except ValueError:
+        return 0
+
+async def _watch_disconnect(request: Request, token: job_service.CancelToken, interval: float = 0.25):
+    """Cancel the job as soon as the client goes away (tab closed, request aborted)."""
+    while not token.cancelled:
+        if await request.is_disconnected():
+            logger.warning(f"🔌 Client disconnected, cancelling job {token.job_id}")
+            token.cancel("client disconnected")
+            return
+        await asyncio.sleep(interval)
+
+def _start_job(request: Request, job_id: str = None):
+    """Register a cancellable job (client-chosen id or a fresh one) and watch for client disconnects."""
+    token = job_service.job_registry.register(job_id)
+    # Log lines of this job carry its id, so DELETE /jobs/{id} and the log can be matched up
+    logging_config.trace_id_var.set(token.job_id)
+    watcher = asyncio.create_task(_watch_disconnect(request, token))
+    return token, watcher
+
+def _busy_response(e: admission_service.AdmissionRejected) -> JSONResponse:
+    logger.warning(f"⛔ Admission rejected: {e}")
+    return JSONResponse(
+        status_code=429,
+        content={"status": "error", "message": str(e), "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+@app.get("/jobs")
+async def list_jobs():
+    return {"jobs": job_service.job_registry.list()}
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a running /analyze or append job; work stops at the next checkpoint."""
+    if not job_service.job_registry.cancel(job_id):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} is not running.")
+    return {"status": "cancelling", "job_id": job_id}
+
 @app.post("/open_report")
 def open_report(path: str = Form(...)):
     try:
+        if not hasattr(os, "startfile"):
+            return {"status": "error", "message": "Opening folders is only supported on a Windows server. Use /campaigns/{campaign_id}/download."}
         if os.path.exists(path):
             os.startfile(path)
             return {"status": "success"}
@@ -54,273 +150,626 @@ def open_report(path: str = Form(...)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-async def _run_analysis_pipeline(jd_text: str, file_buffers: Dict[str, bytes], top_n: int, jd_source_name: str):
+# --- Pipeline stages (synchronous; executed in cpu_executor / worker threads) ---
+
+# Small enough that one batch embeds well within the 1 s cancel target on CPU
+EMBED_BATCH_SIZE = 16
+
+def _checkpoint(token: job_service.CancelToken = None):
+    """Cooperative cancellation point (raises JobCancelled once the job is cancelled)."""
+    if token is not None:
+        token.check()
+
+def _prepare_jd(jd_text: str):
+    jd_clean = utils.clean_text(jd_text)
+    logger.info(f"   JD Length: {len(jd_clean)} chars")
+
+    # Extract JD Metadata
+    jd_keywords = utils.extract_keywords(jd_clean)
+    jd_years = utils.extract_years_of_experience(jd_clean)
+    logger.info(f"   Extracted {len(jd_keywords)} Keywords | Required Exp: {jd_years} Years")
+
+    jd_data = {
+        "keywords": jd_keywords,
+        "required_years": jd_years,
+        "location": "Remote" if "remote" in jd_clean.lower() else ""
+    }
+    return jd_clean, jd_data
+
+def _early_rejection(fname: str, reason: str, text: str = "") -> dict:
+    logger.debug(f"   ❌ REJECTED (pre-pass): {fname} | Reason: {reason}")
+    return {
+        "filename": fname,
+        "name": utils.extract_name(text, filename=fname),
+        "reason": reason,
+        "score": 0
+    }
+
+def _extract_resumes(file_buffers: Dict[str, bytes], token: job_service.CancelToken = None):
+    """
+    Page-count pre-pass + text extraction (see ingest_service.extract_features).
+    Features are cached by file hash, so resumes pre-ingested from Gmail or seen in
+    an earlier campaign skip PDF parsing entirely.
+    """
+    resume_texts = {}
+    resume_pages = {}
+    early_rejections = []
+    for fname, content in file_buffers.items():
+        _checkpoint(token)
+        features = ingest_service.feature_cache.features(fname, content)
+        if features["reason"]:
+            early_rejections.append(_early_rejection(fname, features["reason"], features["text"]))
+            continue
+        resume_texts[fname] = features["text"]
+        resume_pages[fname] = features["pages"]
+
+    if early_rejections:
+        logger.info(f"   Pre-pass: {len(early_rejections)} resumes hard-rejected by page count (skipped extraction & embedding).")
+    return resume_texts, resume_pages, early_rejections
+
+def _apply_prefilter(resume_texts: Dict[str, str], jd_data: dict, keyword_ratios: Dict[str, float] = None):
+    """Funnel stage 1: drop resumes with low JD keyword overlap before embedding."""
+    kept, dropped = funnel_service.lexical_prefilter(
+        resume_texts, jd_data["keywords"],
+        keep_percent=settings.prefilter_keep_percent,
+        min_keep=settings.prefilter_min_candidates,
+        scores=keyword_ratios
+    )
+    prefiltered = [{
+        "filename": fname,
+        "name": utils.extract_name("", filename=fname),  # filename only: skip NER for drop-outs
+        "lexical_score": round(score, 4),
+        "reason": f"Below keyword prefilter cutoff (top {settings.prefilter_keep_percent:g}% kept)"
+    } for fname, score in dropped]
+    return {fname: resume_texts[fname] for fname in kept}, prefiltered
+
+def _compute_semantic_scores(jd_clean: str, resume_texts: Dict[str, str], campaign_id: str,
+                             token: job_service.CancelToken = None, added_ids: list = None) -> Dict[str, float]:
+    """`added_ids` (if given) collects the vector ids as each batch is added, so a cancelled append can remove them."""
+    resume_docs = list(resume_texts.values())
+    resume_metas = [{"filename": fname} for fname in resume_texts]
+    if not resume_docs:
+        return {}
+
+    # Add to the campaign's own Vector DB collection (kept for incremental appends)
+    logger.info(f"   Creating Vector Embeddings for {len(resume_docs)} documents...")
+    with vector_service.vector_service.job_collection(campaign_id, keep=True) as job_db:
+        # Embed in batches so a cancelled job stops within one batch
+        try:
+            for i in range(0, len(resume_docs), EMBED_BATCH_SIZE):
+                _checkpoint(token)
+                ids = job_db.add_texts(resume_docs[i:i + EMBED_BATCH_SIZE], resume_metas[i:i + EMBED_BATCH_SIZE])
+                if added_ids is not None:
+                    added_ids.extend(ids)
+            _checkpoint(token)
+        except job_service.JobCancelled:
+            # The awaiting task may have given up before this thread's last batch landed
+            if added_ids:
+                job_db.delete_ids(added_ids)
+            raise
+
+        # 3. Calculate Semantic Similarity (only against the documents just added)
+        logger.info("Step 3: Calculating Semantic Similarity with JD...")
+        results = job_db.search(jd_clean, k=len(resume_docs), filter={"filename": {"$in": list(resume_texts)}})
+
+    semantic_scores = {}
+    for doc, score in results:
+        sim = max(0.0, 1.0 - (score / 1.5))
+        fname = doc.metadata.get("filename")
+        semantic_scores[fname] = sim
+    return semantic_scores
+
+def _score_candidates(resume_texts: Dict[str, str], resume_pages: Dict[str, int], semantic_scores: Dict[str, float], jd_data: dict,
+                      keyword_ratios: Dict[str, float] = None, token: job_service.CancelToken = None):
+    final_results = []
+    rejected_candidates = []
+    keyword_ratios = keyword_ratios or {}
+
+    for fname, r_text in resume_texts.items():
+        _checkpoint(token)
+        sem_score = semantic_scores.get(fname, 0.0)
+        page_cnt = resume_pages.get(fname, 1)
+        score_data = calculate_score(r_text, jd_data, sem_score, page_count=page_cnt, keyword_ratio=keyword_ratios.get(fname))
+        cand_name = utils.extract_name(r_text, filename=fname)
+
+        if score_data.get("is_rejected", False):
+            reason = score_data.get("rejection_reason", "Unknown Reason")
+            logger.debug(f"   ❌ REJECTED: {fname} | Reason: {reason}")
+            rejected_candidates.append({
+                "filename": fname,
+                "name": cand_name,
+                "reason": reason,
+                "score": 0
+            })
+            continue
+
+        logger.debug(f"   ➡️ Candidate: {fname} ({cand_name}) | Hybrid Score: {score_data['total']:.2f}")
+
+        final_results.append({
+            "filename": fname,
+            "name": cand_name,
+            "score": score_data,
+            "semantic_score": sem_score
+        })
+    logger.info(f"   Scored {len(final_results)} candidates, rejected {len(rejected_candidates)}.")
+    return final_results, rejected_candidates
+
+def _parse_llm_response(llm_response: str) -> list:
+    try:
+        json_str = llm_response
+        match = re.search(r"```json(.*?)```", llm_response, re.DOTALL)
+        if match:
+            json_str = match.group(1).strip()
+        if not match:
+            start = llm_response.find("{")
+            end = llm_response.rfind("}")
+            if start != -1 and end != -1:
+                json_str = llm_response[start:end+1]
+
+        parsed_obj = LLMOutput.model_validate_json(json_str)
+        if hasattr(parsed_obj, 'model_dump'):
+            return [c.model_dump() for c in parsed_obj.candidates]
+        return [c.dict() for c in parsed_obj.candidates]
+    except Exception as e:
+        logger.warning(f"Failed to parse LLM JSON: {e}")
+        return [{"candidate_name": "AI Parsing Error", "reasoning": "Could not parse AI response.", "filename": "report", "strengths": [], "weaknesses": [], "status": "Report"}]
+
+async def _run_ai_reasoner(jd_clean: str, resume_texts: Dict[str, str], top_candidates: list, remaining_candidates: list,
+                           not_selected_limit: int = None) -> list:
+    logger.info("Step 6: Sending Candidates to Llama 3.3 for structured analysis...")
+    if not_selected_limit is None:
+        not_selected_limit = settings.llm_not_selected_limit
+    not_selected = remaining_candidates[:not_selected_limit]
+
+    # Note: Hard Rejected candidates are EXCLUDED from AI analysis
+    if not top_candidates and not remaining_candidates:
+        logger.warning("No valid candidates to analyze.")
+        return []
+
+    # Anonymize all candidates concurrently (async Groq client)
+    anon_texts = await asyncio.gather(*[
+        ai_service.ai_service.aanonymize(resume_texts[cand["filename"]])
+        for cand in top_candidates + not_selected
+    ])
+    top_anon, rest_anon = anon_texts[:len(top_candidates)], anon_texts[len(top_candidates):]
+
+    candidates_text = ""
+    # Add Shortlisted (Top N)
+    for cand, anon_text in zip(top_candidates, top_anon):
+        candidates_text += f"\n--- Candidate (SHORTLISTED - TOP RANK) ---\nFilename: {cand['filename']}\nScore: {cand['score']['total']}\nContent:\n{anon_text[:3000]}\n"
+
+    # Add Not Selected (Valid but Low Score) - Limit llm_not_selected_limit
+    for cand, anon_text in zip(not_selected, rest_anon):
+        candidates_text += f"\n--- Candidate (NOT SELECTED - LOWER SCORE) ---\nFilename: {cand['filename']}\nScore: {cand['score']['total']}\nContent:\n{anon_text[:2000]}\n"
+
+    prompt = f"""
+    You are a Senior Technical Recruiter. Analyze these candidates for the Job Description below.
+
+    JD Summary: {jd_clean[:1500]}
+
+    Candidates:
+    {candidates_text}
+
+    TASK:
+    Return a JSON OBJECT with a key "candidates" containing a list of objects.
+
+    For SHORTLISTED candidates: Status = "Recommended" or "Potential".
+    For NOT SELECTED candidates: Status = "Rejected". Explain why they were not selected.
+
+    Each object must have:
+    - "filename": exact filename from input
+    - "candidate_name": extracted name
+    - "status": "Recommended", "Potential", or "Rejected"
+    - "reasoning": Detailed specific feedback comparing the candidate strictly against the JD constraints.
+    - "strengths": List of strings.
+    - "weaknesses": List of strings.
+
+    Ensure the JSON is valid.
+    """
+    llm_response = await ai_service.ai_service.aquery(prompt, json_mode=True)
+
+    # Pydantic Parsing
+    return _parse_llm_response(llm_response)
+
+def _write_report_packet(report_dir: str, file_buffers: Dict[str, bytes], top_candidates: list, remaining_candidates: list,
+                         rejected_candidates: list, img_analysis: list, jd_source_name: str,
+                         prefiltered_candidates: list = None, stored_files: Dict[str, dict] = None) -> str:
+    prefiltered_candidates = prefiltered_candidates or []
+    stored_files = stored_files or {}
+    os.makedirs(report_dir, exist_ok=True)
+
+    # Resumes go to the content-addressed blob store once; category folders are hardlinks
+    top_filenames = [c['filename'] for c in top_candidates]
+    rej_filenames = [c['filename'] for c in rejected_candidates]
+    rem_filenames = [c['filename'] for c in remaining_candidates + prefiltered_candidates]
+    report_store.report_store.write_packet(report_dir, file_buffers, {
+        "All_Resumes": list(stored_files) + [f for f in file_buffers if f not in stored_files],
+        "Shortlisted_Resumes": top_filenames,
+        "Rejected_Resumes": rej_filenames,
+        # NOT Selected (But Valid) Resumes, including funnel prefilter drop-outs
+        "Not_Selected_Resumes": rem_filenames
+    }, stored=stored_files)
+
+    # Markdown (single template pass) + JSON/CSV exports
+    report_service.write_report_files(report_dir, jd_source_name, top_candidates, remaining_candidates,
+                                      rejected_candidates, prefiltered_candidates, img_analysis)
+    return report_dir
+
+# --- Campaign state (enables incremental re-analysis) ---
+
+def _build_campaign_state(jd_source_name: str, jd_clean: str, jd_data: dict, top_n: int, resume_texts: Dict[str, str],
+                          resume_pages: Dict[str, int], final_results: list, rejected_candidates: list,
+                          prefiltered_candidates: list, img_analysis: list) -> dict:
+    resumes = {}
+    for cand in final_results:
+        fname = cand["filename"]
+        resumes[fname] = {
+            "status": "ranked", "name": cand["name"], "text": resume_texts[fname],
+            "pages": resume_pages.get(fname, 1), "score": cand["score"], "semantic_score": cand["semantic_score"]
+        }
+    for rej in rejected_candidates:
+        resumes[rej["filename"]] = {"status": "rejected", "name": rej["name"], "reason": rej["reason"]}
+    for pre in prefiltered_candidates:
+        resumes[pre["filename"]] = {"status": "prefiltered", "name": pre["name"], "reason": pre["reason"],
+                                    "lexical_score": pre["lexical_score"]}
+
+    final_results.sort(key=lambda x: x["score"]["total"], reverse=True)
+    return {
+        "jd_source_name": jd_source_name,
+        "jd_clean": jd_clean,
+        "jd_data": jd_data,
+        "top_n": top_n,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "resumes": resumes,
+        "llm_verdicts": {item["filename"]: item for item in img_analysis if item.get("filename") in resumes},
+        "shortlist": [c["filename"] for c in final_results[:top_n]]
+    }
+
+def _rank_campaign(state: dict):
+    """Rebuild (ranked, rejected, prefiltered) candidate lists from a campaign state."""
+    ranked, rejected, prefiltered = [], [], []
+    for fname, r in state["resumes"].items():
+        if r["status"] == "ranked":
+            ranked.append({"filename": fname, "name": r["name"], "score": r["score"], "semantic_score": r["semantic_score"]})
+        elif r["status"] == "rejected":
+            rejected.append({"filename": fname, "name": r["name"], "reason": r["reason"], "score": 0})
+        else:
+            prefiltered.append({"filename": fname, "name": r["name"], "reason": r["reason"], "lexical_score": r.get("lexical_score", 0.0)})
+    ranked.sort(key=lambda x: x["score"]["total"], reverse=True)
+    return ranked, rejected, prefiltered
+
+# Background report builds, keyed by campaign id (strong refs so tasks aren't garbage-collected)
+report_tasks: Dict[str, asyncio.Task] = {}
+# One append at a time per campaign (load -> merge -> save); entries vanish once no job holds them
+campaign_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _campaign_lock(campaign_id: str) -> asyncio.Lock:
+    lock = campaign_locks.get(campaign_id)
+    if lock is None:
+        lock = campaign_locks[campaign_id] = asyncio.Lock()
+    return lock
+
+async def _build_report(campaign_id: str, report_dir: str, file_buffers: Dict[str, bytes], top_candidates: list,
+                        remaining_candidates: list, rejected: list, img_analysis: list, jd_source_name: str,
+                        prefiltered: list, funnel, stored_files: Dict[str, dict] = None):
+    report_service.report_status.set(campaign_id, "running")
+    try:
+        with funnel.stage("report", len(set(file_buffers) | set(stored_files or {}))):
+            await run_io(
+                _write_report_packet, report_dir, file_buffers, top_candidates, remaining_candidates,
+                rejected, img_analysis, jd_source_name, prefiltered, stored_files
+            )
+        report_service.report_status.set(campaign_id, "ready")
+        logger.info(f"📁 Report packet ready: {report_dir}")
+        logger.info(f"📉 Funnel: {funnel.summary()}")
+    except Exception as e:
+        logger.error(f"❌ REPORT ERROR ({campaign_id}): {str(e)}")
+        report_service.report_status.set(campaign_id, "failed", str(e))
+    finally:
+        report_tasks.pop(campaign_id, None)
+
+async def _wait_for_report(campaign_id: str):
+    task = report_tasks.get(campaign_id)
+    if task:
+        await asyncio.shield(task)
+
+# Profiles written after their campaign's report build (strong refs, as for report_tasks)
+profile_tasks = set()
+
+async def _save_profile(campaign_id: str, profiler, out_dir: str, prefix: str):
+    try:
+        await _wait_for_report(campaign_id)
+        saved = await asyncio.to_thread(profiler.save, out_dir, prefix)
+        logger.info(f"   Profile saved: {saved['summary']}")
+    except Exception as e:
+        logger.error(f"❌ PROFILE SAVE ERROR ({campaign_id}): {str(e)}")
+
+async def _finalize_campaign(campaign_id: str, state: dict, file_buffers: Dict[str, bytes], funnel, extra_analysis: list = None,
+                             stored_files: Dict[str, dict] = None) -> dict:
+    """
+    Persist campaign state, schedule the report packet in the background and build the API response.
+    `stored_files` are resumes already in the report store (appends), linked by digest.
+    """
+    top_n = state["top_n"]
+    ranked, rejected, prefiltered = _rank_campaign(state)
+    top_candidates, remaining_candidates = ranked[:top_n], ranked[top_n:]
+    verdicts = state["llm_verdicts"]
+    img_analysis = [verdicts[c["filename"]] for c in ranked if c["filename"] in verdicts] + (extra_analysis or [])
+
+    report_dir = campaign_service.campaign_store.report_dir(campaign_id)
+    await run_io(campaign_service.campaign_store.save, campaign_id, state)
+
+    # Resumes + Markdown + exports are written after the ranking is returned
+    await _wait_for_report(campaign_id)
+    report_service.report_status.set(campaign_id, "pending")
+    report_tasks[campaign_id] = asyncio.create_task(_build_report(
+        campaign_id, report_dir, file_buffers, top_candidates, remaining_candidates,
+        rejected, img_analysis, state["jd_source_name"], prefiltered, funnel, stored_files
+    ))
+
+    return {
+        "status": "success",
+        "campaign_id": campaign_id,
+        "candidates": ranked,
+        "rejected_count": len(rejected),
+        "rejected_candidates": rejected,
+        "ai_analysis": img_analysis,
+        "top_candidates": top_candidates,
+        "prefiltered_count": len(prefiltered),
+        "prefiltered_candidates": prefiltered,
+        "funnel": funnel.to_list(),
+        "report_path": os.path.abspath(report_dir),
+        "report_status": report_service.report_status.get(campaign_id)["status"]
+    }
+
+async def _run_append_pipeline(campaign_id: str, new_buffers: Dict[str, bytes], token: job_service.CancelToken = None):
+    """
+    Incremental re-analysis: only the new resumes are extracted, embedded and scored.
+    They are merged into the stored ranking and the LLM is called only for candidates
+    that are new to the LLM window or whose shortlist status changed.
+    (No lexical prefilter here: append batches are small and fully scored.)
+    Appends to one campaign run one at a time; a cancelled or failed append removes
+    the vectors it added.
+    """
+    async with _campaign_lock(campaign_id):
+        added_ids = []
+        try:
+            return await _append_batch(campaign_id, new_buffers, added_ids, token)
+        except BaseException as e:
+            if isinstance(e, (job_service.JobCancelled, asyncio.CancelledError)):
+                logger.warning(f"🛑 APPEND CANCELLED ({campaign_id}): {token.reason if token else 'task cancelled'}")
+            if added_ids:
+                await asyncio.shield(run_io(
+                    vector_service.vector_service.delete_job_vectors, campaign_id, added_ids
+                ))
+            raise
+
+async def _append_batch(campaign_id: str, new_buffers: Dict[str, bytes], added_ids: list, token: job_service.CancelToken = None):
+    store = campaign_service.campaign_store
+    state = await run_io(store.load, campaign_id)
+    jd_clean, jd_data, top_n = state["jd_clean"], state["jd_data"], state["top_n"]
+    funnel = funnel_service.FunnelReport()
+
+    skipped = [f for f in new_buffers if f in state["resumes"]]
+    new_buffers = {f: c for f, c in new_buffers.items() if f not in state["resumes"]}
+    if skipped:
+        logger.info(f"   Skipping {len(skipped)} resumes already in campaign {campaign_id}.")
+    logger.info(f"➕ APPEND to campaign {campaign_id}: {len(new_buffers)} new resumes.")
+
+    with funnel.stage("extract", len(new_buffers)) as stage:
+        resume_texts, resume_pages, early_rejections = await run_cpu(_extract_resumes, new_buffers, token=token)
+        stage["out"] = len(resume_texts)
+
+    with funnel.stage("embed", len(resume_texts)):
+        semantic_scores = await run_cpu(_compute_semantic_scores, jd_clean, resume_texts, campaign_id,
+                                        token=token, added_ids=added_ids)
+
+    # BM25 ratios are pool-relative: recompute over the merged pool and rescore stored candidates too
+    keyword_ratios = None
+    stored_ranked = {f: r for f, r in state["resumes"].items() if r["status"] == "ranked"}
+    if settings.keyword_scorer == "bm25":
+        pool_texts = dict({f: r["text"] for f, r in stored_ranked.items()}, **resume_texts)
+        keyword_ratios = await run_cpu(bm25_service.keyword_ratios, pool_texts, jd_data["keywords"])
+        rescored, _ = await run_cpu(
+            _score_candidates, {f: r["text"] for f, r in stored_ranked.items()},
+            {f: r["pages"] for f, r in stored_ranked.items()},
+            {f: r["semantic_score"] for f, r in stored_ranked.items()}, jd_data, keyword_ratios, token=token
+        )
+        for cand in rescored:
+            state["resumes"][cand["filename"]]["score"] = cand["score"]
+
+    with funnel.stage("score", len(resume_texts)) as stage:
+        final_results, rejected_candidates = await run_cpu(_score_candidates, resume_texts, resume_pages, semantic_scores, jd_data, keyword_ratios, token=token)
+        stage["out"] = len(final_results)
+
+    # Merge new resumes into the campaign
+    new_state = _build_campaign_state(state["jd_source_name"], jd_clean, jd_data, top_n, resume_texts, resume_pages,
+                                      final_results, early_rejections + rejected_candidates, [], [])
+    state["resumes"].update(new_state["resumes"])
+
+    # Decide who needs a (new) LLM verdict
+    ranked, _, _ = _rank_campaign(state)
+    old_shortlist, verdicts = set(state["shortlist"]), state["llm_verdicts"]
+    window = top_n + settings.llm_not_selected_limit
+    to_llm_top, to_llm_rest = [], []
+    for idx, cand in enumerate(ranked):
+        fname, in_short = cand["filename"], idx < top_n
+        needs_verdict = idx < window and fname not in verdicts
+        status_changed = (fname in verdicts or fname in old_shortlist) and in_short != (fname in old_shortlist)
+        if needs_verdict or status_changed:
+            (to_llm_top if in_short else to_llm_rest).append(cand)
+
+    _checkpoint(token)
+    extra_analysis = []
+    with funnel.stage("llm", len(ranked)) as stage:
+        stage["out"] = len(to_llm_top) + len(to_llm_rest)
+        if to_llm_top or to_llm_rest:
+            texts = {c["filename"]: state["resumes"][c["filename"]]["text"] for c in to_llm_top + to_llm_rest}
+            analysis = await _run_ai_reasoner(jd_clean, texts, to_llm_top, to_llm_rest, not_selected_limit=len(to_llm_rest))
+            for item in analysis:
+                if item.get("filename") in state["resumes"]:
+                    verdicts[item["filename"]] = item
+                else:
+                    extra_analysis.append(item)
+        logger.info(f"   LLM re-evaluated {stage['out']} candidates (new or shortlist status changed).")
+    state["shortlist"] = [c["filename"] for c in ranked[:top_n]]
+
+    _checkpoint(token)
+    report_dir = store.report_dir(campaign_id)
+    await _wait_for_report(campaign_id)
+    # Earlier resumes stay in the blob store; only their manifest entries are carried over
+    stored_files = await run_io(report_store.report_store.stored_files, report_dir)
+    result = await _finalize_campaign(campaign_id, state, new_buffers, funnel, extra_analysis, stored_files)
+    result["appended_count"] = len(new_buffers)
+    result["skipped_existing"] = skipped
+    result["llm_reevaluated"] = [c["filename"] for c in to_llm_top + to_llm_rest]
+    return result
+
+async def _run_analysis_pipeline(jd_text: str, file_buffers: Dict[str, bytes], top_n: int, jd_source_name: str,
+                                 token: job_service.CancelToken = None):
     """
     Core Logic: Processing -> Scoring -> AI Analysis -> Reporting
+    Every blocking stage is awaited in an executor so the event loop stays responsive.
+    `token` adds cancellation checkpoints between stages and inside the per-resume loops.
     """
+    funnel = funnel_service.FunnelReport()
+    campaign_id = campaign_service.campaign_store.new_id()
     try:
         # 1. Process JD
-        jd_clean = utils.clean_text(jd_text)
-        logger.info(f"   JD Length: {len(jd_clean)} chars")
-        
-        # Extract JD Metadata
-        jd_keywords = utils.extract_keywords(jd_clean)
-        jd_years = utils.extract_years_of_experience(jd_clean)
-        logger.info(f"   Extracted {len(jd_keywords)} Keywords | Required Exp: {jd_years} Years")
-        
-        jd_data = {
-            "keywords": jd_keywords,
-            "required_years": jd_years,
-            "location": "Remote" if "remote" in jd_clean.lower() else "" 
-        }
+        jd_clean, jd_data = await run_cpu(_prepare_jd, jd_text)
+
+        # 2. Process Resumes (page-count pre-pass + text extraction)
+        logger.info("Step 2: Extracting & Vectorizing Resumes...")
+        with funnel.stage("extract", len(file_buffers)) as stage:
+            resume_texts, resume_pages, early_rejections = await run_cpu(_extract_resumes, file_buffers, token=token)
+            stage["out"] = len(resume_texts)
+
+        # Optional BM25 keyword relevance for the whole pool (one inverted-index pass)
+        keyword_ratios = None
+        if settings.keyword_scorer == "bm25":
+            with funnel.stage("bm25_index", len(resume_texts)):
+                keyword_ratios = await run_cpu(bm25_service.keyword_ratios, resume_texts, jd_data["keywords"])
+
+        # Funnel Stage 1: cheap lexical prefilter against JD keywords
+        _checkpoint(token)
+        prefiltered_candidates = []
+        if settings.enable_funnel:
+            with funnel.stage("prefilter", len(resume_texts)) as stage:
+                resume_texts, prefiltered_candidates = await run_cpu(_apply_prefilter, resume_texts, jd_data, keyword_ratios)
+                stage["out"] = len(resume_texts)
+
+        # Funnel Stage 2: embeddings + hybrid scoring for survivors only
+        with funnel.stage("embed", len(resume_texts)):
+            semantic_scores = await run_cpu(_compute_semantic_scores, jd_clean, resume_texts, campaign_id, token=token)
 
-        # 2. Process Resumes & Vectorize
-        logger.info("Step 2: Vectorizing Resumes...")
-        vector_service.vector_service.reset()
-        resume_texts = {}
-        resume_docs = []
-        resume_metas = []
-        resume_pages = {}
-        
-        for fname, content in file_buffers.items():
-            if fname.lower().endswith(".pdf"):
-                text, pages = pdf_service.pdf_service.extract_text(content)
-            else:
-                text = content.decode("utf-8", errors="ignore")
-                pages = 1
-            
-            clean = utils.clean_text(text)
-            resume_texts[fname] = clean
-            resume_pages[fname] = pages
-            resume_docs.append(clean)
-            resume_metas.append({"filename": fname})
-
-        # Add to Vector DB
-        logger.info(f"   Creating Vector Embeddings for {len(resume_docs)} documents...")
-        vector_service.vector_service.add_texts(resume_docs, resume_metas)
-        
-        # 3. Calculate Semantic Similarity
-        logger.info("Step 3: Calculating Semantic Similarity with JD...")
-        results = vector_service.vector_service.search(jd_clean, k=len(file_buffers))
-        
-        semantic_scores = {}
-        for doc, score in results:
-            sim = max(0.0, 1.0 - (score / 1.5))
-            fname = doc.metadata.get("filename")
-            semantic_scores[fname] = sim
-            
         # 4. Calculate Final Scores
         logger.info("Step 4: Running Hybrid Scoring Engine...")
-        final_results = []
-        rejected_candidates = []
-        
-        for fname, r_text in resume_texts.items():
-            sem_score = semantic_scores.get(fname, 0.0)
-            page_cnt = resume_pages.get(fname, 1)
-            score_data = calculate_score(r_text, jd_data, sem_score, page_count=page_cnt)
-            cand_name = utils.extract_name(r_text, filename=fname)
-            
-            if score_data.get("is_rejected", False):
-                reason = score_data.get("rejection_reason", "Unknown Reason")
-                logger.warning(f"   ❌ REJECTED: {fname} | Reason: {reason}")
-                rejected_candidates.append({
-                    "filename": fname,
-                    "name": cand_name,
-                    "reason": reason,
-                    "score": 0
-                })
-                continue
-            
-            logger.info(f"   ➡️ Candidate: {fname} ({cand_name}) | Hybrid Score: {score_data['total']:.2f}")
-            
-            final_results.append({
-                "filename": fname,
-                "name": cand_name,
-                "score": score_data,
-                "semantic_score": sem_score
-            })
-            
+        with funnel.stage("score", len(resume_texts)) as stage:
+            final_results, rejected_candidates = await run_cpu(_score_candidates, resume_texts, resume_pages, semantic_scores, jd_data, keyword_ratios, token=token)
+            rejected_candidates = early_rejections + rejected_candidates
+            stage["out"] = len(final_results)
+
         # 5. Rank & Filter
         final_results.sort(key=lambda x: x["score"]["total"], reverse=True)
         top_candidates = final_results[:top_n]
         remaining_candidates = final_results[top_n:]
         logger.info(f"Step 5: Generated Shortlist (Top {top_n}). Remaining: {len(remaining_candidates)}")
-        
-        # 6. AI Reasoner
-        logger.info("Step 6: Sending Candidates to Llama 3.3 for structured analysis...")
-        candidates_text = ""
-        
-        # Add Shortlisted (Top N)
-        for i, cand in enumerate(top_candidates):
-            anon_text = ai_service.ai_service.anonymize(resume_texts[cand["filename"]])
-            candidates_text += f"\n--- Candidate (SHORTLISTED - TOP RANK) ---\nFilename: {cand['filename']}\nScore: {cand['score']['total']}\nContent:\n{anon_text[:3000]}\n"
-        
-        # Add Not Selected (Valid but Low Score) - Limit 10
-        for i, cand in enumerate(remaining_candidates[:10]):
-            anon_text = ai_service.ai_service.anonymize(resume_texts[cand["filename"]])
-            candidates_text += f"\n--- Candidate (NOT SELECTED - LOWER SCORE) ---\nFilename: {cand['filename']}\nScore: {cand['score']['total']}\nContent:\n{anon_text[:2000]}\n"
-
-        # Note: Hard Rejected candidates are EXCLUDED from AI analysis
-        
-        if not top_candidates and not remaining_candidates:
-             logger.warning("No valid candidates to analyze.")
-             img_analysis = []
-        else:
-            prompt = f"""
-            You are a Senior Technical Recruiter. Analyze these candidates for the Job Description below.
-            
-            JD Summary: {jd_clean[:1500]}
-            
-            Candidates:
-            {candidates_text}
-            
-            TASK:
-            Return a JSON OBJECT with a key "candidates" containing a list of objects.
-            
-            For SHORTLISTED candidates: Status = "Recommended" or "Potential".
-            For NOT SELECTED candidates: Status = "Rejected". Explain why they were not selected.
-            
-            Each object must have:
-            - "filename": exact filename from input
-            - "candidate_name": extracted name
-            - "status": "Recommended", "Potential", or "Rejected"
-            - "reasoning": Detailed specific feedback comparing the candidate strictly against the JD constraints.
-            - "strengths": List of strings.
-            - "weaknesses": List of strings.
-            
-            Ensure the JSON is valid.
-            """
-            llm_response = ai_service.ai_service.query(prompt, json_mode=True)
-            
-            # Pydantic Parsing
-            img_analysis = []
-            try:
-                json_str = llm_response
-                match = re.search(r"```json(.*?)```", llm_response, re.DOTALL)
-                if match:
-                    json_str = match.group(1).strip()
-                if not match:
-                    start = llm_response.find("{")
-                    end = llm_response.rfind("}")
-                    if start != -1 and end != -1:
-                        json_str = llm_response[start:end+1]
-                
-                parsed_obj = LLMOutput.model_validate_json(json_str)
-                if hasattr(parsed_obj, 'model_dump'):
-                    img_analysis = [c.model_dump() for c in parsed_obj.candidates]
-                else:
-                    img_analysis = [c.dict() for c in parsed_obj.candidates]
-            except Exception as e:
-                logger.warning(f"Failed to parse LLM JSON: {e}")
-                img_analysis = [{"candidate_name": "AI Parsing Error", "reasoning": "Could not parse AI response.", "filename": "report", "strengths": [], "weaknesses": [], "status": "Report"}]
 
+        # 6. AI Reasoner (Funnel Stage 3: only the shortlist + next-best go to the LLM)
+        _checkpoint(token)
+        with funnel.stage("llm", len(final_results)) as stage:
+            img_analysis = await _run_ai_reasoner(jd_clean, resume_texts, top_candidates, remaining_candidates)
+            stage["out"] = len(top_candidates) + min(len(remaining_candidates), settings.llm_not_selected_limit)
+
+        _checkpoint(token)
         logger.info("✅ ANALYSIS COMPLETE. Generating Report Packet...")
 
-        # 7. Generate Campaign Report Packet
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        report_dir = f"Reports/Campaign_{timestamp}"
-        os.makedirs(f"{report_dir}/All_Resumes", exist_ok=True)
-        os.makedirs(f"{report_dir}/Shortlisted_Resumes", exist_ok=True)
-        
-        # Save All Resumes
-        for fname, content in file_buffers.items():
-            with open(f"{report_dir}/All_Resumes/{fname}", "wb") as f:
-                f.write(content)
-                
-        # Save Selected Resumes
-        top_filenames = [c['filename'] for c in top_candidates]
-        for fname, content in file_buffers.items():
-            if fname in top_filenames:
-                 with open(f"{report_dir}/Shortlisted_Resumes/{fname}", "wb") as f:
-                    f.write(content)
-
-        # Save Rejected Resumes
-        if rejected_candidates:
-            os.makedirs(f"{report_dir}/Rejected_Resumes", exist_ok=True)
-            rej_filenames = [c['filename'] for c in rejected_candidates]
-            for fname, content in file_buffers.items():
-                    with open(f"{report_dir}/Rejected_Resumes/{fname}", "wb") as f:
-                        f.write(content)
-
-        # Save NOT Selected (But Valid) Resumes
-        if remaining_candidates:
-             os.makedirs(f"{report_dir}/Not_Selected_Resumes", exist_ok=True)
-             rem_filenames = [c['filename'] for c in remaining_candidates]
-             for fname, content in file_buffers.items():
-                 if fname in rem_filenames:
-                     with open(f"{report_dir}/Not_Selected_Resumes/{fname}", "wb") as f:
-                         f.write(content)
-        
-        # Generate Markdown
-        executive_summary = ""
-        for item in img_analysis:
-            if item.get("filename") == "report": 
-                 executive_summary += f"{item.get('reasoning')}\n\n"
-            else:
-                executive_summary += f"### 👤 {item.get('candidate_name', 'Unnamed')} ({item.get('status', 'Analyzed')})\n"
-                executive_summary += f"**Reasoning:** {item.get('reasoning')}\n\n"
-                if item.get("strengths"):
-                    executive_summary += "**✅ Strengths:**\n" + "\n".join([f"- {s}" for s in item.get("strengths")]) + "\n\n"
-                if item.get("weaknesses"):
-                    executive_summary += "**⚠️ Weaknesses:**\n" + "\n".join([f"- {w}" for w in item.get("weaknesses")]) + "\n\n"
-                executive_summary += "---\n"
-        
-        md_content = f"""# 🧬 RecruitAI Screening Report
-**Date:** {timestamp}
-**Job Description:** {jd_source_name}
-
-## 🎯 Executive Summary
-{executive_summary}
-
-## 📊 Shortlisted Candidates (Top {len(top_candidates)})
-| Rank | Candidate | Match Score | Semantic Fit | Experience |
-|---|---|---|---|---|
-"""
-        for i, cand in enumerate(top_candidates):
-            c_name = cand.get("name", "Unknown")
-            md_content += f"| {i+1} | **{c_name}**<br>_{cand['filename']}_ | **{cand['score']['total']:.1f}** | {cand['semantic_score']:.2f} | {cand['score']['experience_score']:.1f} |\n"
-            
-        if rejected_candidates:
-            md_content += "\n## 🚫 Rejected Candidates\n"
-            md_content += "| Candidate | Reason |\n|---|---|\n"
-            for rej in rejected_candidates:
-                md_content += f"| **{rej['name']}**<br>_{rej['filename']}_ | ⚠️ {rej['reason']} |\n"
-
-        md_content += "\n## 🔍 Detailed Analysis Log\n"
-        
-        with open(f"{report_dir}/Analysis_Report.md", "w", encoding="utf-8") as f:
-            f.write(md_content)
-            
-        return {
-            "status": "success",
-            "candidates": final_results, 
-            "rejected_count": len(rejected_candidates),
-            "rejected_candidates": rejected_candidates,
-            "ai_analysis": img_analysis, 
-            "top_candidates": top_candidates,
-            "report_path": os.path.abspath(report_dir)
-        }
+        # 7. Persist campaign state + generate Campaign Report Packet (disk I/O in worker threads)
+        state = _build_campaign_state(jd_source_name, jd_clean, jd_data, top_n, resume_texts, resume_pages,
+                                      final_results, rejected_candidates, prefiltered_candidates, img_analysis)
+        extra_analysis = [item for item in img_analysis if item.get("filename") not in state["resumes"]]
+        return await _finalize_campaign(campaign_id, state, file_buffers, funnel, extra_analysis)
 
+    except (job_service.JobCancelled, asyncio.CancelledError):
+        logger.warning(f"🛑 PIPELINE CANCELLED: {token.reason if token else 'task cancelled'}")
+        await run_io(vector_service.vector_service.drop_job_collection, campaign_id)
+        raise
     except Exception as e:
         logger.error(f"❌ PIPELINE ERROR: {str(e)}")
+        # A campaign that was never saved cannot be appended to, so its embeddings go too
+        if not await run_io(campaign_service.campaign_store.exists, campaign_id):
+            await run_io(vector_service.vector_service.drop_job_collection, campaign_id)
         raise e
 
+async def _collect_resumes(resume_files: List[UploadFile], start_date: str, end_date: str,
+                           token: job_service.CancelToken = None) -> Dict[str, bytes]:
+    file_buffers = {}
+
+    # Source A: Manual Uploads
+    if resume_files:
+        logger.info(f"📥 Processing {len(resume_files)} Manual Uploads...")
+        for file in resume_files:
+            content = await file.read()
+            file_buffers[file.filename] = content
+
+    # Source B: Gmail Fetch (blocking Google client -> worker thread)
+    if start_date and end_date:
+        logger.info(f"📧 Fetching Emails from {start_date} to {end_date}...")
+        gmail_resumes = await run_io(
+            gmail_service.gmail_service.fetch_resumes, start_date, end_date, ingest_service.attachment_cache,
+            checkpoint=token.check if token else None
+        )
+        if gmail_resumes:
+            logger.info(f"   found {len(gmail_resumes)} resumes in Gmail.")
+            for item in gmail_resumes:
+                # Avoid overwriting if same filename exists (append suffix if needed, but simple overwrite for now)
+                file_buffers[f"[Email] {item['filename']}"] = item["content"]
+        else:
+            logger.warning("   No resumes found in Gmail for this range.")
+    return file_buffers
+
+def _charge_fetched(file_buffers: Dict[str, bytes]) -> int:
+    """Charge Gmail attachments (not part of the request body) to the admission byte budget."""
+    fetched = sum(len(content) for fname, content in file_buffers.items() if fname.startswith("[Email] "))
+    admission_service.admission_controller.charge(fetched)
+    return fetched
+
+def _stream_archive(archive, start: int = 0, end: int = None):
+    """Stream a range of the archive, releasing its pinned files when done or disconnected."""
+    try:
+        yield from archive.iter_range(start, end)
+    finally:
+        archive.close()
+
 @app.post("/analyze")
 async def analyze_resumes(
+    request: Request,
     jd_file: UploadFile = File(None),
     jd_text_input: str = Form(None),
     resume_files: List[UploadFile] = File(None),
     start_date: str = Form(None),
     end_date: str = Form(None),
-    top_n: int = Form(5)
+    top_n: int = Form(5),
+    profile: bool = Form(False),
+    job_id: str = Form(None),
+    x_profile: str = Header(None)
 ):
+    # Admission control: wait for a job slot (or 429 when the queue is full)
+    nbytes = _request_bytes(request)
+    try:
+        await admission_service.admission_controller.acquire(nbytes)
+    except admission_service.AdmissionRejected as e:
+        return _busy_response(e)
+    started = time.monotonic()
+    token, watcher = _start_job(request, job_id)
+
     try:
         # 1. Prepare JD
         if jd_file:
             logger.info(f"Processing JD File: {jd_file.filename}")
             jd_bytes = await jd_file.read()
             if jd_file.filename.endswith(".pdf"):
-                jd_text, _ = pdf_service.pdf_service.extract_text(jd_bytes)
+                jd_text, _ = await run_cpu(pdf_service.pdf_service.extract_text, jd_bytes)
             else:
                 jd_text = jd_bytes.decode("utf-8")
             jd_name = jd_file.filename
@@ -331,39 +780,157 @@ async def analyze_resumes(
         else:
              raise HTTPException(status_code=400, detail="Job Description (File or Text) is required.")
 
-        file_buffers = {}
-
-        # 2. Source A: Manual Uploads
-        if resume_files:
-            logger.info(f"📥 Processing {len(resume_files)} Manual Uploads...")
-            for file in resume_files:
-                content = await file.read()
-                file_buffers[file.filename] = content
-
-        # 3. Source B: Gmail Fetch
-        if start_date and end_date:
-            logger.info(f"📧 Fetching Emails from {start_date} to {end_date}...")
-            gmail_resumes = gmail_service.gmail_service.fetch_resumes(start_date, end_date)
-            if gmail_resumes:
-                logger.info(f"   found {len(gmail_resumes)} resumes in Gmail.")
-                for item in gmail_resumes:
-                    # Avoid overwriting if same filename exists (append suffix if needed, but simple overwrite for now)
-                    file_buffers[f"[Email] {item['filename']}"] = item["content"]
-            else:
-                logger.warning("   No resumes found in Gmail for this range.")
+        # 2-3. Sources: Manual Uploads + Gmail Fetch
+        file_buffers = await _collect_resumes(resume_files, start_date, end_date, token)
+        nbytes += _charge_fetched(file_buffers)
 
         # 4. Validation
         if not file_buffers:
              raise HTTPException(status_code=400, detail="No resumes provided! Upload files OR select a Date Range for Gmail.")
-            
-        logger.info(f"🚀 STARTING ANALYSIS: Total {len(file_buffers)} Resumes.")
 
-        # 5. Run Pipeline
-        return await _run_analysis_pipeline(jd_text, file_buffers, top_n, jd_name)
+        logger.info(f"🚀 STARTING ANALYSIS: Total {len(file_buffers)} Resumes. (job {token.job_id})")
+
+        # 5. Run Pipeline (optionally under the sampling profiler)
+        run_pipeline = lambda: token.run(_run_analysis_pipeline(jd_text, file_buffers, top_n, jd_name, token))
+        profiling_requested = profile or (x_profile or "").lower() in ("1", "true", "yes")
+        if not profiling_requested:
+            return dict(await run_pipeline(), job_id=token.job_id)
 
+        if not settings.enable_profiling:
+            logger.warning("Profiling requested but disabled in config ([profiling] enable_profiling). Running normally.")
+            return dict(await run_pipeline(), job_id=token.job_id)
+
+        logger.info(f"🔬 Profiling enabled for this request (interval {settings.profiling_interval_ms}ms)")
+        profiler = profile_service.SamplingProfiler(
+            interval=settings.profiling_interval_ms / 1000, tag=logging_config.trace_id_var.get()
+        ).start()
+        try:
+            result = await run_pipeline()
+        finally:
+            profiler.stop()
+        # The report packet is still being written into report_path; the profile goes in once it is done
+        prefix = f"profile_{token.job_id}"
+        result["profile"] = dict(profiler.describe(result["report_path"], prefix), status="pending")
+        task = asyncio.create_task(_save_profile(result["campaign_id"], profiler, result["report_path"], prefix))
+        profile_tasks.add(task)
+        task.add_done_callback(profile_tasks.discard)
+        return dict(result, job_id=token.job_id)
+
+    except job_service.JobCancelled as e:
+        logger.warning(f"🛑 Analysis {token.job_id} cancelled: {e}")
+        return {"status": "cancelled", "job_id": token.job_id, "message": str(e)}
     except Exception as e:
         logger.error(f"Error in analyze: {str(e)}")
         return {"status": "error", "message": str(e)}
+    finally:
+        admission_service.admission_controller.release(nbytes, time.monotonic() - started)
+        watcher.cancel()
+        job_service.job_registry.unregister(token.job_id)
+
+@app.post("/campaigns/{campaign_id}/append")
+async def append_to_campaign(
+    request: Request,
+    campaign_id: str,
+    resume_files: List[UploadFile] = File(None),
+    start_date: str = Form(None),
+    end_date: str = Form(None),
+    job_id: str = Form(None)
+):
+    """Screen newly arrived resumes against an existing campaign without re-running it."""
+    nbytes = _request_bytes(request)
+    try:
+        await admission_service.admission_controller.acquire(nbytes)
+    except admission_service.AdmissionRejected as e:
+        return _busy_response(e)
+    started = time.monotonic()
+    token, watcher = _start_job(request, job_id)
+
+    try:
+        if not campaign_service.campaign_store.exists(campaign_id):
+            raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found.")
+
+        file_buffers = await _collect_resumes(resume_files, start_date, end_date, token)
+        nbytes += _charge_fetched(file_buffers)
+        if not file_buffers:
+            raise HTTPException(status_code=400, detail="No resumes provided! Upload files OR select a Date Range for Gmail.")
+
+        return dict(await token.run(_run_append_pipeline(campaign_id, file_buffers, token)), job_id=token.job_id)
+
+    except job_service.JobCancelled as e:
+        logger.warning(f"🛑 Append {token.job_id} cancelled: {e}")
+        return {"status": "cancelled", "job_id": token.job_id, "message": str(e)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in append: {str(e)}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        admission_service.admission_controller.release(nbytes, time.monotonic() - started)
+        watcher.cancel()
+        job_service.job_registry.unregister(token.job_id)
+
+
+@app.get("/campaigns/{campaign_id}/report")
+async def campaign_report_status(campaign_id: str):
+    """Status of the background report build (pending / running / ready / failed)."""
+    try:
+        report_dir = campaign_service.campaign_store.report_dir(campaign_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    status = report_service.report_status.get(campaign_id, report_dir)
+    if status["status"] == "unknown" and not campaign_service.campaign_store.exists(campaign_id):
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found.")
+    status["campaign_id"] = campaign_id
+    status["report_path"] = os.path.abspath(report_dir)
+    if status["status"] == "ready":
+        status["files"] = [report_service.REPORT_FILE, report_service.JSON_EXPORT, report_service.CSV_EXPORT]
+    return status
+
+@app.get("/campaigns/{campaign_id}/download")
+async def download_campaign(campaign_id: str, request: Request):
+    """
+    Stream the campaign packet (report, exports, resumes) as a ZIP built on the fly.
+    Supports `Range` (single range) and `If-Range` so large downloads can be resumed.
+    """
+    try:
+        report_dir = campaign_service.campaign_store.report_dir(campaign_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.isdir(report_dir):
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found.")
+    status = report_service.report_status.get(campaign_id, report_dir)["status"]
+    if status in ("pending", "running"):
+        raise HTTPException(status_code=409, detail="Report packet is still being generated.", headers={"Retry-After": "2"})
+
+    # Campaign state holds raw resume text for incremental appends; it is not part of the packet.
+    # Resumes are read from their blobs and the other files stay open, so an append that
+    # rebuilds the packet mid-download does not change what this response sends.
+    sources = await run_io(report_store.report_store.packet_sources, report_dir)
+    archive = await run_io(zip_stream.ZipStream, report_dir, (campaign_service.STATE_FILE,), sources)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Content-Disposition": f'attachment; filename="Campaign_{campaign_id}.zip"'
+    }
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != archive.etag:
+        range_header = None  # Packet changed since the partial download: send it whole
+    try:
+        byte_range = zip_stream.parse_range(range_header, archive.size)
+    except ValueError:
+        archive.close()
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{archive.size}", **headers})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(archive.size)
+        return StreamingResponse(_stream_archive(archive), media_type="application/zip", headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_stream_archive(archive, start, end), status_code=206, media_type="application/zip", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,173 @@
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from ..core.config import get_settings
+
+settings = get_settings()
+
+class AdmissionRejected(Exception):
+    """Raised when a job can be neither started nor queued; maps to HTTP 429."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Gatekeeper for screening jobs: at most `max_jobs` run at once and their uploads
+    may hold at most `max_bytes` in memory. Jobs over the limit wait in a FIFO queue
+    (bounded by `max_queue` and `queue_timeout`); beyond that they are rejected.
+    A single job larger than `max_bytes` still runs, but only when nothing else does.
+    Runs entirely on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_jobs: int, max_bytes: int, max_queue: int, queue_timeout: float):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active_jobs = 0
+        self.inflight_bytes = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self._avg_job_seconds = None
+        self._waiters = deque()  # [nbytes, future]
+
+    def _fits(self, nbytes: int) -> bool:
+        if self.active_jobs >= self.max_jobs:
+            return False
+        return self.active_jobs == 0 or self.inflight_bytes + nbytes <= self.max_bytes
+
+    def _grant(self, nbytes: int):
+        self.active_jobs += 1
+        self.inflight_bytes += nbytes
+        self.admitted_total += 1
+
+    def _wake(self):
+        while self._waiters and self._fits(self._waiters[0][0]):
+            nbytes, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._grant(nbytes)
+            future.set_result(True)
+
+    def retry_after(self) -> int:
+        avg = self._avg_job_seconds or 30.0
+        return max(1, math.ceil(avg * (len(self._waiters) + 1) / self.max_jobs))
+
+    def _reject(self, reason: str):
+        self.rejected_total += 1
+        raise AdmissionRejected(reason, self.retry_after())
+
+    async def acquire(self, nbytes: int):
+        if not self._waiters and self._fits(nbytes):
+            self._grant(nbytes)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject(f"Server busy: {self.active_jobs} jobs running, {len(self._waiters)} queued.")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [nbytes, future]
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                return  # Granted just as the timeout fired
+            self._waiters.remove(entry)
+            future.cancel()
+            self._reject(f"Server busy: waited {self.queue_timeout:.0f}s in queue.")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(nbytes)
+            else:
+                self._waiters.remove(entry)
+                future.cancel()
+            raise
+
+    def release(self, nbytes: int, seconds: float = None):
+        self.active_jobs -= 1
+        self.inflight_bytes -= nbytes
+        if seconds is not None:
+            self._avg_job_seconds = seconds if self._avg_job_seconds is None else 0.8 * self._avg_job_seconds + 0.2 * seconds
+        self._wake()
+
+    def charge(self, nbytes: int):
+        """
+        Account bytes a running job buffered after admission (attachments fetched from
+        Gmail). They hold back later jobs; the caller adds them to what it release()s.
+        """
+        self.inflight_bytes += nbytes
+
+    def snapshot(self) -> dict:
+        return {
+            "active_jobs": self.active_jobs,
+            "max_concurrent_jobs": self.max_jobs,
+            "inflight_bytes": self.inflight_bytes,
+            "max_inflight_bytes": self.max_bytes,
+            "queue_depth": len(self._waiters),
+            "max_queued_jobs": self.max_queue,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "avg_job_seconds": round(self._avg_job_seconds, 2) if self._avg_job_seconds else None
+        }
+
+class RateLimiter:
+    """
+    Sliding-window limiter for outbound LLM calls (`limit` per `window` seconds).
+    Callers reserve the next free slot and sleep until it; slots are handed out FIFO.
+    Thread-safe, usable from both the event loop and worker threads. limit <= 0 disables it.
+    """
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self._slots = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        if self.limit <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            while self._slots and self._slots[0] <= now - self.window:
+                self._slots.popleft()
+            slot = now
+            if len(self._slots) >= self.limit:
+                slot = self._slots[-self.limit] + self.window
+            if self._slots:
+                slot = max(slot, self._slots[-1])
+            self._slots.append(slot)
+            return slot - now
+
+    def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            recent = [s for s in self._slots if now - self.window < s <= now]
+            waiting = [s for s in self._slots if s > now]
+        return {
+            "llm_calls_per_minute": self.limit,
+            "llm_calls_last_window": len(recent),
+            "llm_calls_waiting": len(waiting)
+        }
+
+admission_controller = AdmissionController(
+    max_jobs=settings.max_concurrent_jobs,
+    max_bytes=int(settings.max_inflight_mb * 1024 * 1024),
+    max_queue=settings.max_queued_jobs,
+    queue_timeout=settings.queue_timeout_seconds
+)
+llm_rate_limiter = RateLimiter(settings.llm_calls_per_minute, window=60.0)
@@ -1,38 +1,55 @@
 
 import os
-from groq import Groq
+import logging
+from groq import Groq, AsyncGroq
 from ..core.config import get_settings
+from .admission_service import llm_rate_limiter
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 class AIService:
     def __init__(self):
         self.client = Groq(api_key=settings.groq_api_key)
+        self.async_client = AsyncGroq(api_key=settings.groq_api_key)
         self.model = settings.llm_model
 
+    def _request_kwargs(self, prompt: str, temperature: float, json_mode: bool) -> dict:
+        kwargs = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful HR assistant designed to analyze resumes. " + ("You MUST output valid JSON." if json_mode else "")},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": 2000,
+        }
+
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
     def query(self, prompt: str, temperature: float = 0.3, json_mode: bool = False) -> str:
         try:
-            kwargs = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": "You are a helpful HR assistant designed to analyze resumes. " + ("You MUST output valid JSON." if json_mode else "")},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": temperature,
-                "max_tokens": 2000,
-            }
-            
-            if json_mode:
-                kwargs["response_format"] = {"type": "json_object"}
-
-            completion = self.client.chat.completions.create(**kwargs)
+            llm_rate_limiter.wait()
+            completion = self.client.chat.completions.create(**self._request_kwargs(prompt, temperature, json_mode))
             return completion.choices[0].message.content.strip()
         except Exception as e:
-            print(f"Groq API Error: {e}")
+            logger.error(f"Groq API Error: {e}")
             return ""
 
-    def anonymize(self, text: str) -> str:
-        prompt = f"""
+    async def aquery(self, prompt: str, temperature: float = 0.3, json_mode: bool = False) -> str:
+        """Async variant of query() for use inside the event loop."""
+        try:
+            await llm_rate_limiter.acquire()
+            completion = await self.async_client.chat.completions.create(**self._request_kwargs(prompt, temperature, json_mode))
+            return completion.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Groq API Error: {e}")
+            return ""
+
+    def _anonymize_prompt(self, text: str) -> str:
+        return f"""
         Task: Anonymize the following resume text.
         Instructions:
         1. Replace the Candidate Name with [CANDIDATE_NAME].
@@ -42,11 +59,16 @@ class AIService:
         5. Replace University Names (e.g. 'Harvard University') with [UNIVERSITY].
         6. DO NOT remove Skills, Experience, Projects, or Job Titles.
         7. Return ONLY the anonymized text. Do not add any preamble.
-        
+
         Resume Text:
         {text[:2500]}
         """
-        return self.query(prompt, temperature=0.1)
+
+    def anonymize(self, text: str) -> str:
+        return self.query(self._anonymize_prompt(text), temperature=0.1)
+
+    async def aanonymize(self, text: str) -> str:
+        return await self.aquery(self._anonymize_prompt(text), temperature=0.1)
 
     def extract_location(self, text: str) -> str:
         prompt = f"""
@@ -54,7 +76,7 @@ class AIService:
         If Remote, return 'Remote'.
         If multiple locations, return the primary one.
         Return ONLY the location string.
-        
+
         Job Description:
         {text[:1000]}
         """
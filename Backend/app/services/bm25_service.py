@@ -0,0 +1,72 @@
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """
+    Inverted index over a resume corpus with Okapi BM25 scoring.
+    Scoring a query walks only the posting lists of its terms, so the whole pool is
+    ranked in a single traversal instead of one substring scan per (keyword, resume).
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency)]
+        self.doc_ids = []
+        self.doc_lens = []
+        self.avg_len = 0.0
+
+    @classmethod
+    def build(cls, docs: Dict[str, str], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        for doc_id, text in docs.items():
+            index.add(doc_id, text)
+        return index
+
+    def add(self, doc_id: str, text: str):
+        tokens = tokenize(text)
+        idx = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_lens.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append((idx, tf))
+        self.avg_len = sum(self.doc_lens) / len(self.doc_lens)
+
+    def idf(self, term: str) -> float:
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_ids) - n + 0.5) / (n + 0.5))
+
+    def score(self, query_terms: Iterable[str]) -> Dict[str, float]:
+        scores = [0.0] * len(self.doc_ids)
+        avg_len = self.avg_len or 1.0
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for idx, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[idx] / avg_len)
+                scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return dict(zip(self.doc_ids, scores))
+
+def keyword_ratios(resume_texts: Dict[str, str], keywords: Iterable[str]) -> Dict[str, float]:
+    """
+    BM25 keyword relevance for every resume, normalised to 0-1 against the best
+    resume in the pool. Drop-in replacement for the exact-match keyword ratio.
+    """
+    terms = [t for kw in keywords for t in tokenize(kw)]
+    if not resume_texts or not terms:
+        return {fname: 0.0 for fname in resume_texts}
+    scores = BM25Index.build(resume_texts).score(terms)
+    best = max(scores.values())
+    if best <= 0:
+        return {fname: 0.0 for fname in scores}
+    return {fname: s / best for fname, s in scores.items()}
@@ -0,0 +1,56 @@
+
+import json
+import os
+import re
+import uuid
+from datetime import datetime
+
+STATE_FILE = "campaign_state.json"
+CAMPAIGN_ID_PATTERN = re.compile(r"^[\w\-]+$")
+
+class CampaignStore:
+    """
+    Persists the screening state of each campaign next to its report packet
+    (Reports/Campaign_<id>/campaign_state.json): JD profile, per-resume scores,
+    LLM verdicts and the current shortlist. Embeddings stay in the campaign's
+    vector collection. Together they allow incremental "append" runs.
+    """
+
+    def __init__(self, root: str = "Reports"):
+        self.root = root
+
+    def new_id(self) -> str:
+        return f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:6]}"
+
+    def report_dir(self, campaign_id: str) -> str:
+        if not CAMPAIGN_ID_PATTERN.match(campaign_id or ""):
+            raise ValueError(f"Invalid campaign id: {campaign_id!r}")
+        return os.path.join(self.root, f"Campaign_{campaign_id}")
+
+    def exists(self, campaign_id: str) -> bool:
+        return os.path.exists(os.path.join(self.report_dir(campaign_id), STATE_FILE))
+
+    def save(self, campaign_id: str, state: dict):
+        report_dir = self.report_dir(campaign_id)
+        os.makedirs(report_dir, exist_ok=True)
+        state = dict(state, campaign_id=campaign_id, updated_at=datetime.now().isoformat(timespec="seconds"))
+        tmp_path = os.path.join(report_dir, STATE_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, os.path.join(report_dir, STATE_FILE))
+
+    def load(self, campaign_id: str) -> dict:
+        path = os.path.join(self.report_dir(campaign_id), STATE_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Campaign {campaign_id} not found")
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        state["jd_data"]["keywords"] = set(state["jd_data"].get("keywords", []))
+        return state
+
+def _json_default(obj):
+    if isinstance(obj, set):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+campaign_store = CampaignStore()
@@ -0,0 +1,55 @@
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+class FunnelReport:
+    """Collects per-stage candidate counts and timings for one analysis run."""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str, count_in: int):
+        entry = {"stage": name, "in": count_in, "out": count_in, "seconds": 0.0}
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 3)
+            self.stages.append(entry)
+
+    def summary(self) -> str:
+        return " -> ".join(f"{s['stage']} {s['in']}→{s['out']} ({s['seconds']:.2f}s)" for s in self.stages)
+
+    def to_list(self) -> List[dict]:
+        return list(self.stages)
+
+def lexical_scores(resume_texts: Dict[str, str], keywords: Iterable[str]) -> Dict[str, float]:
+    """Share of JD keywords found verbatim in each resume (0-1)."""
+    kws = [kw.lower() for kw in keywords]
+    if not kws:
+        return {fname: 0.0 for fname in resume_texts}
+    scores = {}
+    for fname, text in resume_texts.items():
+        lower = text.lower()
+        scores[fname] = sum(1 for kw in kws if kw in lower) / len(kws)
+    return scores
+
+def lexical_prefilter(resume_texts: Dict[str, str], keywords: Iterable[str], keep_percent: float,
+                      min_keep: int, scores: Dict[str, float] = None) -> Tuple[List[str], List[Tuple[str, float]]]:
+    """
+    Stage 1 of the funnel: keep the top `keep_percent`% of resumes by keyword overlap
+    (never fewer than `min_keep`). Returns (kept filenames, [(dropped filename, score)]).
+    Pass precomputed `scores` (e.g. BM25 ratios) to skip the exact-match scan.
+    """
+    if scores is None:
+        scores = lexical_scores(resume_texts, keywords)
+    else:
+        scores = {fname: scores.get(fname, 0.0) for fname in resume_texts}
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    keep = max(min_keep, math.ceil(len(ranked) * keep_percent / 100.0))
+    if keep >= len(ranked):
+        return [fname for fname, _ in ranked], []
+    return [fname for fname, _ in ranked[:keep]], ranked[keep:]
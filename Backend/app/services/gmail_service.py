@@ -6,6 +6,7 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 import logging
+from .job_service import JobCancelled
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
@@ -53,11 +54,13 @@ class GmailService:
             token.write(self.creds.to_json())
         return self.creds
 
-    def fetch_resumes(self, start_date: str, end_date: str):
+    def fetch_resumes(self, start_date: str, end_date: str, cache=None, checkpoint=None):
         """
         Fetches PDFs from Gmail within date range (YYYY/MM/DD).
         Handles direct PDF attachments and nested PDFs within .eml attachments.
         Adjusts dates to be inclusive (Start - 1 day, End + 1 day) for Gmail API.
+        `cache` (ingest_service.AttachmentCache) skips emails whose attachments were already downloaded.
+        `checkpoint()` is called per listed page and per message; a JobCancelled it raises stops the fetch.
         """
         if not self.creds:
             try:
@@ -91,76 +94,117 @@ class GmailService:
         logger.info(f"Searching Gmail with query: {query}")
         
         try:
-            results = service.users().messages().list(userId='me', q=query).execute()
-            messages = results.get('messages', [])
-            
+            messages = []
+            page_token = None
+            while True:
+                if checkpoint:
+                    checkpoint()
+                results = service.users().messages().list(userId='me', q=query, pageToken=page_token).execute()
+                messages.extend(results.get('messages', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+
             logger.info(f"Found {len(messages)} matching emails.")
             resume_files = [] # List of (filename, bytes)
-            
+            cache_hits = 0
+
             for msg in messages:
+                if checkpoint:
+                    checkpoint()
                 msg_id = msg['id']
-                try:
-                    message = service.users().messages().get(userId='me', id=msg_id).execute()
-                    payload = message.get('payload', {})
-                    parts = payload.get('parts', [])
-                    
-                    if not parts:
-                        logger.info(f"Email {msg_id} has no parts. Skipping.")
-                        continue
-
-                    found_attachment = False
-                    for part in parts:
-                        filename = part.get('filename', '')
-                        mime_type = part.get('mimeType', '')
-                        
-                        # Case 1: Direct PDF Attachment
-                        if filename and filename.lower().endswith('.pdf'):
-                            content = self._download_attachment(service, 'me', msg_id, part)
-                            if content:
-                                resume_files.append({
-                                    "filename": filename,
-                                    "content": content,
-                                    "email_id": msg_id
-                                })
-                                logger.info(f"   ✅ Downloaded PDF: {filename}")
-                                found_attachment = True
-                        
-                        # Case 2: Attached Email (.eml) - Recursive Search
-                        elif (filename and filename.lower().endswith('.eml')) or mime_type == 'message/rfc822':
-                            logger.info(f"   [Email {msg_id}] Found .eml attachment: {filename}. Parsing...")
-                            eml_content = self._download_attachment(service, 'me', msg_id, part)
-                            if eml_content:
-                                # Parse the EML content
-                                try:
-                                    msg_obj = email.message_from_bytes(eml_content)
-                                    # Walk through the EML to find PDF attachments
-                                    for sub_part in msg_obj.walk():
-                                        sub_fname = sub_part.get_filename()
-                                        if sub_fname and sub_fname.lower().endswith('.pdf'):
-                                            sub_content = sub_part.get_payload(decode=True)
-                                            if sub_content:
-                                                resume_files.append({
-                                                    "filename": f"[Extracted] {sub_fname}",
-                                                    "content": sub_content,
-                                                    "email_id": msg_id
-                                                })
-                                                logger.info(f"      ✅ Extracted PDF from EML: {sub_fname}")
-                                                found_attachment = True
-                                except Exception as e:
-                                    logger.error(f"      ❌ Failed to parse .eml {filename}: {e}")
-
-                    if not found_attachment:
-                        logger.info(f"   No valid PDF or .eml attachments found in email {msg_id}")
+                # Already ingested (e.g. by the background poller): no Gmail round trips
+                cached = cache.get(msg_id) if cache is not None else None
+                if cached is not None:
+                    resume_files.extend(cached)
+                    cache_hits += 1
+                    continue
+                attachments, complete = self._message_attachments(service, msg_id)
+                if cache is not None and complete:
+                    cache.put(msg_id, attachments)
+                resume_files.extend(attachments)
 
-                except Exception as e:
-                    logger.error(f"Error processing message {msg_id}: {e}")
-            
+            if cache is not None:
+                logger.info(f"Gmail attachment cache: {cache_hits}/{len(messages)} emails served from cache.")
+            logger.info(f"Downloaded {len(resume_files)} resume attachments from {len(messages)} emails.")
             return resume_files
 
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Gmail Fetch Error: {e}")
             return []
 
+    def _message_attachments(self, service, msg_id: str):
+        """
+        PDF resumes attached to one email (direct PDFs and PDFs inside attached .eml files).
+        Returns (resume_files, complete); incomplete results are not cached, so a failed
+        download is retried on the next fetch.
+        """
+        resume_files = []
+        complete = True
+        try:
+            message = service.users().messages().get(userId='me', id=msg_id).execute()
+            payload = message.get('payload', {})
+            parts = payload.get('parts', [])
+
+            if not parts:
+                logger.debug(f"Email {msg_id} has no parts. Skipping.")
+                return resume_files, complete
+
+            found_attachment = False
+            for part in parts:
+                filename = part.get('filename', '')
+                mime_type = part.get('mimeType', '')
+
+                # Case 1: Direct PDF Attachment
+                if filename and filename.lower().endswith('.pdf'):
+                    content = self._download_attachment(service, 'me', msg_id, part)
+                    if content:
+                        resume_files.append({
+                            "filename": filename,
+                            "content": content,
+                            "email_id": msg_id
+                        })
+                        logger.debug(f"   ✅ Downloaded PDF: {filename}")
+                        found_attachment = True
+                    else:
+                        complete = False
+
+                # Case 2: Attached Email (.eml) - Recursive Search
+                elif (filename and filename.lower().endswith('.eml')) or mime_type == 'message/rfc822':
+                    logger.debug(f"   [Email {msg_id}] Found .eml attachment: {filename}. Parsing...")
+                    eml_content = self._download_attachment(service, 'me', msg_id, part)
+                    if eml_content:
+                        # Parse the EML content
+                        try:
+                            msg_obj = email.message_from_bytes(eml_content)
+                            # Walk through the EML to find PDF attachments
+                            for sub_part in msg_obj.walk():
+                                sub_fname = sub_part.get_filename()
+                                if sub_fname and sub_fname.lower().endswith('.pdf'):
+                                    sub_content = sub_part.get_payload(decode=True)
+                                    if sub_content:
+                                        resume_files.append({
+                                            "filename": f"[Extracted] {sub_fname}",
+                                            "content": sub_content,
+                                            "email_id": msg_id
+                                        })
+                                        logger.debug(f"      ✅ Extracted PDF from EML: {sub_fname}")
+                                        found_attachment = True
+                        except Exception as e:
+                            logger.error(f"      ❌ Failed to parse .eml {filename}: {e}")
+                    else:
+                        complete = False
+
+            if not found_attachment:
+                logger.debug(f"   No valid PDF or .eml attachments found in email {msg_id}")
+
+        except Exception as e:
+            logger.error(f"Error processing message {msg_id}: {e}")
+            complete = False
+        return resume_files, complete
+
     def _download_attachment(self, service, user_id, msg_id, part):
         """Helper to download and decode attachment data."""
         try:
@@ -0,0 +1,297 @@
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from ..core.config import get_settings
+from . import pdf_service, utils
+from .report_store import ReportStore
+from .score_service import check_page_limits, JUNIOR_MAX_PAGES
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+INGEST_DIR = os.path.join(settings.data_dir, "ingest")
+# Bump when extract_features() changes so stale cached features are not reused
+FEATURES_VERSION = 1
+
+def extract_features(fname: str, content: bytes) -> dict:
+    """
+    Page-count pre-pass + text extraction for one resume.
+    Resumes that break a hard page rule are rejected before full extraction;
+    2-page PDFs only need page 1 to decide the junior rule.
+    Returns {pages, text, reason}; `reason` is set for pre-pass rejections
+    (then `text` holds only what was read to decide, possibly "").
+    """
+    if not fname.lower().endswith(".pdf"):
+        return {"pages": 1, "text": utils.clean_text(content.decode("utf-8", errors="ignore")), "reason": ""}
+
+    pages = pdf_service.pdf_service.count_pages(content)
+    reason = check_page_limits(pages)
+    if reason:
+        return {"pages": pages, "text": "", "reason": reason}
+
+    if pages > JUNIOR_MAX_PAGES:
+        first_page, _ = pdf_service.pdf_service.extract_text(content, max_pages=1)
+        first_clean = utils.clean_text(first_page)
+        first_years = utils.extract_years_of_experience(first_clean, default=None)
+        # An explicit junior mention on page 1 decides it; otherwise we need the full text
+        reason = check_page_limits(pages, first_years) if first_years is not None else ""
+        if reason:
+            return {"pages": pages, "text": first_clean, "reason": reason}
+        rest, _ = pdf_service.pdf_service.extract_text(content, start_page=1)
+        text = first_page + rest
+    else:
+        text, _ = pdf_service.pdf_service.extract_text(content)
+    return {"pages": pages, "text": utils.clean_text(text), "reason": ""}
+
+class FeatureCache:
+    """
+    Extracted resume features keyed by the sha256 of the file bytes, so the same PDF
+    (re-sent, or pre-ingested from Gmail) is parsed once. One JSON file per resume
+    under data/ingest/features_v<N>/, with an LRU in-memory layer of `max_memory` entries
+    in front. A file's mtime is its last use, which gc() goes by.
+    """
+
+    def __init__(self, root: str, max_memory: int = 512):
+        self.root = root
+        self.max_memory = max_memory
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.json")
+
+    def _remember(self, digest: str, features: dict):
+        with self._lock:
+            self._memory[digest] = features
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def get(self, digest: str) -> Optional[dict]:
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+        path = self._path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                features = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self._remember(digest, features)
+        return features
+
+    def put(self, digest: str, features: dict):
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(features, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._remember(digest, features)
+
+    def features(self, fname: str, content: bytes) -> dict:
+        """Cached extract_features()."""
+        # Non-PDF files are decoded as plain text, so the file type is part of the key
+        digest = hashlib.sha256(content).hexdigest() + ("" if fname.lower().endswith(".pdf") else "-txt")
+        features = self.get(digest)
+        if features is not None:
+            self.hits += 1
+            return features
+        self.misses += 1
+        features = extract_features(fname, content)
+        self.put(digest, features)
+        return features
+
+    def gc(self, keep_days: float, dry_run: bool = False) -> dict:
+        """Delete feature files not read or written for more than `keep_days`."""
+        cutoff = time.time() - keep_days * 86400
+        removed, freed_bytes = 0, 0
+        if not os.path.isdir(self.root):
+            return {"removed": 0, "freed_bytes": 0}
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            for name in os.listdir(shard_dir):
+                path = os.path.join(shard_dir, name)
+                stat = os.stat(path)
+                if stat.st_mtime >= cutoff:
+                    continue
+                removed += 1
+                freed_bytes += stat.st_size
+                if not dry_run:
+                    os.remove(path)
+                    with self._lock:
+                        self._memory.pop(name[:-len(".json")], None)
+            if not dry_run and not os.listdir(shard_dir):
+                os.rmdir(shard_dir)
+        return {"removed": removed, "freed_bytes": freed_bytes}
+
+class AttachmentCache:
+    """
+    Gmail message id -> resume attachments already downloaded from it.
+    Attachment bytes live in a content-addressed blob store; the index is one JSON file.
+    A date-range fetch then only lists message ids and downloads messages it has not seen.
+    """
+
+    def __init__(self, root: str):
+        self.blobs = ReportStore(root)
+        self.index_path = os.path.join(root, "gmail_index.json")
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _load(self) -> dict:
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                try:
+                    with open(self.index_path, "r", encoding="utf-8") as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Gmail index unreadable, starting fresh: {e}")
+        return self._index
+
+    def get(self, msg_id: str) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._load().get(msg_id)
+        if entry is None:
+            return None
+        try:
+            return [{"filename": a["filename"], "content": self.blobs.get(a["sha256"]), "email_id": msg_id}
+                    for a in entry["attachments"]]
+        except FileNotFoundError:
+            return None
+
+    def _save(self, index: dict):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def put(self, msg_id: str, attachments: List[dict]):
+        entry = {
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "attachments": [{"filename": a["filename"], "sha256": self.blobs.put(a["content"])} for a in attachments]
+        }
+        with self._lock:
+            index = self._load()
+            index[msg_id] = entry
+            self._save(index)
+
+    def gc(self, keep_days: float, dry_run: bool = False) -> dict:
+        """
+        Forget messages fetched more than `keep_days` ago (they are downloaded again if
+        still in a fetch window), then delete the attachment blobs no entry references.
+        """
+        cutoff = datetime.now() - timedelta(days=keep_days)
+        with self._lock:
+            index = self._load()
+            expired = [msg_id for msg_id, entry in index.items()
+                       if datetime.fromisoformat(entry.get("fetched_at", "1970-01-01")) < cutoff]
+            kept = {msg_id: entry for msg_id, entry in index.items() if msg_id not in expired}
+            if expired and not dry_run:
+                self._index = kept
+                self._save(kept)
+            refs = {a["sha256"] for entry in kept.values() for a in entry["attachments"]}
+        # Blobs are written before their index entry (possibly by another process), so recent ones stay
+        removed_blobs, freed_bytes = self.blobs.sweep_blobs(refs, dry_run, older_than=cutoff.timestamp())
+        return {"removed_messages": len(expired), "removed_blobs": removed_blobs, "freed_bytes": freed_bytes}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+feature_cache = FeatureCache(os.path.join(INGEST_DIR, f"features_v{FEATURES_VERSION}"), settings.feature_cache_memory_entries)
+attachment_cache = AttachmentCache(INGEST_DIR)
+
+class IngestDaemon:
+    """
+    Background Gmail poller: every `interval` seconds it pulls resumes from the last
+    `lookback_days`, then pre-extracts features and pre-embeds the text. A later
+    Gmail-sourced /analyze mostly hits the attachment, feature and embedding caches.
+    """
+
+    def __init__(self, interval: float, lookback_days: int):
+        self.interval = interval
+        self.lookback_days = lookback_days
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"polls": 0, "last_poll": None, "last_error": None, "resumes_seen": 0, "resumes_warmed": 0}
+        self._warmed = set()
+
+    def _warm(self, items: List[dict]) -> int:
+        from . import vector_service  # Loads the embedding model; only needed once the daemon runs
+
+        texts = []
+        for item in items:
+            features = feature_cache.features(item["filename"], item["content"])
+            key = hashlib.sha256(item["content"]).hexdigest()
+            if not features["reason"] and features["text"] and key not in self._warmed:
+                texts.append(features["text"])
+                self._warmed.add(key)
+        if texts:
+            vector_service.vector_service.embeddings.embed_documents(texts)
+        return len(texts)
+
+    async def poll_once(self, gmail) -> int:
+        end = datetime.now()
+        start = end - timedelta(days=self.lookback_days)
+        items = await asyncio.to_thread(
+            gmail.fetch_resumes, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), attachment_cache
+        )
+        warmed = await asyncio.to_thread(self._warm, items)
+        self.stats["polls"] += 1
+        self.stats["last_poll"] = datetime.now().isoformat(timespec="seconds")
+        self.stats["resumes_seen"] = len(items)
+        self.stats["resumes_warmed"] += warmed
+        logger.info(f"📬 Ingest poll: {len(items)} resumes in window, {warmed} newly warmed.")
+        return warmed
+
+    async def _run(self, gmail):
+        while True:
+            try:
+                await self.poll_once(gmail)
+                self.stats["last_error"] = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                logger.error(f"Ingest poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, gmail):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(gmail))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return dict(
+            self.stats,
+            running=self._task is not None and not self._task.done(),
+            interval_s=self.interval,
+            lookback_days=self.lookback_days,
+            cached_messages=len(attachment_cache),
+            feature_cache_hits=feature_cache.hits,
+            feature_cache_misses=feature_cache.misses
+        )
+
+ingest_daemon = IngestDaemon(settings.ingest_poll_interval_seconds, settings.ingest_lookback_days)
@@ -0,0 +1,84 @@
+
+import asyncio
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+class JobCancelled(Exception):
+    """Raised at a cancellation checkpoint once a job has been cancelled."""
+
+class CancelToken:
+    """
+    Cooperative cancellation for one analysis job.
+    Worker threads poll `check()` between units of work; the asyncio task running
+    the pipeline is cancelled directly, which aborts pending LLM calls at once.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.created_at = time.time()
+        self.reason = None
+        self._event = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise JobCancelled(self.reason or "cancelled")
+
+    def cancel(self, reason: str = "cancelled"):
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+        if self._task is not None and not self._task.done():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    async def run(self, coro):
+        """Run the pipeline coroutine as a cancellable task; JobCancelled if cancel() hits it."""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.ensure_future(coro)
+        if self.cancelled:
+            self._task.cancel()
+        try:
+            return await self._task
+        except asyncio.CancelledError:
+            if self.cancelled and self._task.cancelled():
+                raise JobCancelled(self.reason)
+            raise
+
+class JobRegistry:
+    """In-flight jobs by id, so `DELETE /jobs/{id}` can reach them."""
+
+    def __init__(self):
+        self._jobs: Dict[str, CancelToken] = {}
+
+    def register(self, job_id: str = None) -> CancelToken:
+        # A client-chosen id that is already taken gets a fresh one (returned in the response)
+        if not job_id or job_id in self._jobs:
+            job_id = uuid.uuid4().hex
+        token = CancelToken(job_id)
+        self._jobs[job_id] = token
+        return token
+
+    def unregister(self, job_id: str):
+        self._jobs.pop(job_id, None)
+
+    def cancel(self, job_id: str, reason: str = "cancelled by user") -> bool:
+        token = self._jobs.get(job_id)
+        if token is None:
+            return False
+        token.cancel(reason)
+        return True
+
+    def list(self) -> list:
+        now = time.time()
+        return [{"job_id": t.job_id, "running_s": round(now - t.created_at, 1), "cancelled": t.cancelled}
+                for t in self._jobs.values()]
+
+job_registry = JobRegistry()
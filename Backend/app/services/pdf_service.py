@@ -3,10 +3,16 @@ import io
 from pypdf import PdfReader
 
 class PDFService:
-    def extract_text(self, file_content: bytes) -> tuple[str, int]:
+    def count_pages(self, file_content: bytes) -> int:
+        """Cheap page count: reads the xref/trailer and the page tree's /Count only."""
+        pdf = PdfReader(io.BytesIO(file_content))
+        return len(pdf.pages)
+
+    def extract_text(self, file_content: bytes, start_page: int = 0, max_pages: int = None) -> tuple[str, int]:
+        """Extract text from pages [start_page, max_pages). Returns (text, total page count)."""
         pdf = PdfReader(io.BytesIO(file_content))
         text = ""
-        for page in pdf.pages:
+        for page in pdf.pages[start_page:max_pages]:
             text += page.extract_text()
         return text, len(pdf.pages)
 
@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+# thread ident -> tag (job / trace id) of the work that thread is running right now
+_thread_tags: Dict[int, str] = {}
+
+def run_tagged(tag: str, fn, *args, **kwargs):
+    """Run fn in the current (worker) thread marked as working for `tag`, so a profiler for that tag samples it."""
+    tid = threading.get_ident()
+    previous = _thread_tags.get(tid)
+    _thread_tags[tid] = tag
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        if previous is None:
+            _thread_tags.pop(tid, None)
+        else:
+            _thread_tags[tid] = previous
+
+class SamplingProfiler:
+    """
+    Lightweight stack-sampling profiler (stdlib only).
+    A daemon thread snapshots thread stacks each `interval` seconds, so it also sees
+    work running in executor threads. With a `tag`, only threads currently inside
+    run_tagged(tag, ...) are sampled, so concurrent requests do not leak into the
+    profile (time spent on the shared event loop is then not attributed).
+    Nothing is installed unless start() is called.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128, tag: str = None):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.tag = tag
+        self.samples = Counter()  # (thread_name, frame labels root->leaf) -> count
+        self.sample_count = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own_id or (self.tag is not None and _thread_tags.get(tid) != self.tag):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(tid, str(tid)), tuple(stack))] += 1
+            self.sample_count += 1
+
+    def folded(self) -> str:
+        """Collapsed-stack format (flamegraph.pl / speedscope / inferno compatible)."""
+        lines = []
+        for (thread_name, stack), count in self.samples.most_common():
+            lines.append(";".join((thread_name,) + stack).replace(" ", "_") + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def top_functions(self, limit: int = 40) -> str:
+        self_counts, total_counts = Counter(), Counter()
+        for (_, stack), count in self.samples.items():
+            if not stack:
+                continue
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+
+        total = sum(self.samples.values()) or 1
+        out = [
+            f"Sampling profile: {self.sample_count} ticks over {self.duration:.2f}s "
+            f"(interval {self.interval * 1000:.1f} ms, {'all threads' if self.tag is None else f'threads of job {self.tag}'})",
+            "",
+            f"{'self%':>7} {'total%':>7}  function",
+        ]
+        for label, count in self_counts.most_common(limit):
+            out.append(f"{100 * count / total:>6.1f}% {100 * total_counts[label] / total:>6.1f}%  {label}")
+        return "\n".join(out) + "\n"
+
+    def describe(self, out_dir: str, prefix: str = "profile") -> dict:
+        """Where save() writes, plus the sample stats (available before the files exist)."""
+        return {
+            "folded": os.path.abspath(os.path.join(out_dir, f"{prefix}.folded")),
+            "summary": os.path.abspath(os.path.join(out_dir, f"{prefix}_top.txt")),
+            "samples": self.sample_count,
+            "duration_s": round(self.duration, 3),
+        }
+
+    def save(self, out_dir: str, prefix: str = "profile") -> dict:
+        os.makedirs(out_dir, exist_ok=True)
+        info = self.describe(out_dir, prefix)
+        with open(info["folded"], "w", encoding="utf-8") as f:
+            f.write(self.folded())
+        with open(info["summary"], "w", encoding="utf-8") as f:
+            f.write(self.top_functions())
+        return info
@@ -0,0 +1,104 @@
+
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Dict, List
+
+from jinja2 import Environment, FileSystemLoader
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+REPORT_FILE = "Analysis_Report.md"
+JSON_EXPORT = "candidates.json"
+CSV_EXPORT = "candidates.csv"
+
+CSV_FIELDS = [
+    "rank", "category", "filename", "name", "total_score", "semantic_score",
+    "keyword_score", "experience_score", "education_score", "location_score",
+    "format_score", "visual_score", "llm_status", "reason"
+]
+
+# Compiled once at import; every report is a single render() pass
+_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), trim_blocks=True, lstrip_blocks=True, autoescape=False)
+_report_template = _env.get_template("analysis_report.md.j2")
+
+class ReportStatus:
+    """In-memory status of background report builds, keyed by campaign id."""
+
+    def __init__(self):
+        self._status: Dict[str, dict] = {}
+
+    def set(self, campaign_id: str, status: str, error: str = None):
+        self._status[campaign_id] = {
+            "status": status,
+            "error": error,
+            "updated_at": datetime.now().isoformat(timespec="seconds")
+        }
+
+    def get(self, campaign_id: str, report_dir: str = None) -> dict:
+        if campaign_id in self._status:
+            return dict(self._status[campaign_id])
+        # Built by an earlier process
+        if report_dir and os.path.exists(os.path.join(report_dir, REPORT_FILE)):
+            return {"status": "ready", "error": None, "updated_at": None}
+        return {"status": "unknown", "error": None, "updated_at": None}
+
+report_status = ReportStatus()
+
+def render_markdown(jd_source_name: str, top_candidates: list, rejected_candidates: list,
+                    prefiltered_candidates: list, img_analysis: list) -> str:
+    return _report_template.render(
+        timestamp=datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+        jd_source_name=jd_source_name,
+        img_analysis=img_analysis,
+        top_candidates=top_candidates,
+        rejected_candidates=rejected_candidates,
+        prefiltered_candidates=prefiltered_candidates
+    )
+
+def export_rows(top_candidates: list, remaining_candidates: list, rejected_candidates: list,
+                prefiltered_candidates: list, img_analysis: list) -> List[dict]:
+    """One flat row per resume, in ranking order, for the JSON/CSV exports."""
+    verdicts = {item.get("filename"): item for item in img_analysis}
+    rows = []
+    ranked = [("shortlisted", c) for c in top_candidates] + [("not_selected", c) for c in remaining_candidates]
+    for rank, (category, cand) in enumerate(ranked, start=1):
+        score = cand["score"]
+        rows.append({
+            "rank": rank,
+            "category": category,
+            "filename": cand["filename"],
+            "name": cand.get("name", "Unknown"),
+            "total_score": round(score["total"], 2),
+            "semantic_score": round(cand["semantic_score"], 4),
+            "keyword_score": round(score["keyword_score"], 2),
+            "experience_score": round(score["experience_score"], 2),
+            "education_score": round(score["education_score"], 2),
+            "location_score": round(score["location_score"], 2),
+            "format_score": round(score["format_score"], 2),
+            "visual_score": round(score["visual_score"], 2),
+            "llm_status": verdicts.get(cand["filename"], {}).get("status", ""),
+            "reason": ""
+        })
+    for category, cands in (("rejected", rejected_candidates), ("prefiltered", prefiltered_candidates)):
+        for cand in cands:
+            row = dict.fromkeys(CSV_FIELDS, "")
+            row.update(category=category, filename=cand["filename"], name=cand.get("name", "Unknown"), reason=cand["reason"])
+            rows.append(row)
+    return rows
+
+def write_report_files(report_dir: str, jd_source_name: str, top_candidates: list, remaining_candidates: list,
+                       rejected_candidates: list, prefiltered_candidates: list, img_analysis: list):
+    """Analysis_Report.md plus candidates.json / candidates.csv exports."""
+    md_content = render_markdown(jd_source_name, top_candidates, rejected_candidates, prefiltered_candidates, img_analysis)
+    with open(os.path.join(report_dir, REPORT_FILE), "w", encoding="utf-8") as f:
+        f.write(md_content)
+
+    rows = export_rows(top_candidates, remaining_candidates, rejected_candidates, prefiltered_candidates, img_analysis)
+    with open(os.path.join(report_dir, JSON_EXPORT), "w", encoding="utf-8") as f:
+        json.dump({"jd_source_name": jd_source_name, "candidates": rows, "ai_analysis": img_analysis},
+                  f, ensure_ascii=False, indent=2)
+    with open(os.path.join(report_dir, CSV_EXPORT), "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,239 @@
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable
+
+BLOB_DIR = ".blobs"
+MANIFEST_FILE = "manifest.json"
+CAMPAIGN_PREFIX = "Campaign_"
+
+class ReportStore:
+    """
+    Content-addressed storage for campaign report packets.
+
+    Every resume is stored once under Reports/.blobs/<ab>/<sha256>, no matter how many
+    campaigns or categories reference it. Category folders (All_Resumes, Shortlisted_Resumes, ...)
+    hold hardlinks to the blob (a copy only if the filesystem refuses links) and each campaign's
+    manifest.json records filename -> sha256 per category.
+    """
+
+    def __init__(self, root: str = "Reports"):
+        self.root = root
+        self.blob_root = os.path.join(root, BLOB_DIR)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_root, digest[:2], digest)
+
+    def put(self, content: bytes) -> str:
+        """Store content once; returns its sha256."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            # Reused blob: refresh its mtime so gc treats it as part of this write
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with open(self.blob_path(digest), "rb") as f:
+            return f.read()
+
+    def link(self, digest: str, dest: str):
+        if os.path.lexists(dest):
+            os.remove(dest)
+        try:
+            os.link(self.blob_path(digest), dest)
+        except OSError:
+            shutil.copyfile(self.blob_path(digest), dest)
+
+    def write_packet(self, report_dir: str, file_buffers: Dict[str, bytes], categories: Dict[str, Iterable[str]],
+                     stored: Dict[str, dict] = None) -> dict:
+        """
+        Materialise category folders for one campaign.
+        `categories` maps folder name -> filenames; folders are rebuilt from scratch.
+        `stored` (filename -> manifest entry, see stored_files) adds resumes already in
+        the blob store without reading them back.
+        """
+        entries = dict(stored or {})
+        for fname, content in file_buffers.items():
+            entries[fname] = {"filename": fname, "sha256": self.put(content), "size": len(content)}
+        digests = {fname: entry["sha256"] for fname, entry in entries.items()}
+        manifest = {"files": [], "categories": {}}
+        for fname, entry in entries.items():
+            manifest["files"].append({"filename": fname, "sha256": entry["sha256"], "size": entry["size"]})
+
+        for category, fnames in categories.items():
+            folder = os.path.join(report_dir, category)
+            shutil.rmtree(folder, ignore_errors=True)
+            fnames = [f for f in fnames if f in digests]
+            if not fnames:
+                continue
+            os.makedirs(folder, exist_ok=True)
+            for fname in fnames:
+                self.link(digests[fname], os.path.join(folder, fname))
+            manifest["categories"][category] = sorted(fnames)
+
+        tmp_path = os.path.join(report_dir, MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(report_dir, MANIFEST_FILE))
+        return manifest
+
+    def load_manifest(self, report_dir: str) -> dict:
+        path = os.path.join(report_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"files": [], "categories": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def packet_sources(self, report_dir: str) -> Dict[str, str]:
+        """Category file ("Shortlisted_Resumes/cv.pdf") -> blob path, per the current manifest."""
+        manifest = self.load_manifest(report_dir)
+        digests = {entry["filename"]: entry["sha256"] for entry in manifest["files"]}
+        return {
+            f"{category}/{fname}": self.blob_path(digests[fname])
+            for category, fnames in manifest["categories"].items() for fname in fnames if fname in digests
+        }
+
+    def stored_files(self, report_dir: str) -> Dict[str, dict]:
+        """
+        filename -> manifest entry for every resume of a campaign. Packets written before
+        the manifest existed are moved into the blob store one file at a time.
+        """
+        manifest = self.load_manifest(report_dir)
+        if manifest["files"]:
+            return {entry["filename"]: entry for entry in manifest["files"]}
+
+        entries = {}
+        all_dir = os.path.join(report_dir, "All_Resumes")
+        if os.path.isdir(all_dir):
+            for fname in os.listdir(all_dir):
+                with open(os.path.join(all_dir, fname), "rb") as f:
+                    content = f.read()
+                entries[fname] = {"filename": fname, "sha256": self.put(content), "size": len(content)}
+        return entries
+
+    # --- Retention / garbage collection ---
+
+    def campaign_dirs(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if name.startswith(CAMPAIGN_PREFIX) and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def _last_modified(self, report_dir: str) -> float:
+        paths = [os.path.join(report_dir, name) for name in ("campaign_state.json", MANIFEST_FILE)]
+        times = [os.path.getmtime(p) for p in paths if os.path.exists(p)]
+        return max(times) if times else os.path.getmtime(report_dir)
+
+    def gc(self, keep_days: float, dry_run: bool = False, drop_collection=None) -> dict:
+        """
+        Delete campaigns untouched for more than `keep_days`, then every blob no
+        remaining manifest references. `drop_collection(campaign_id)` is called for
+        each removed campaign so its vector collection goes too.
+        Blobs newer than the cutoff are kept: write_packet stores blobs before the
+        manifest, so a packet being written would otherwise lose its resumes.
+        """
+        cutoff = time.time() - keep_days * 86400
+        expired, refs = [], set()
+        for report_dir in self.campaign_dirs():
+            if self._last_modified(report_dir) < cutoff:
+                expired.append(report_dir)
+            else:
+                refs.update(entry["sha256"] for entry in self.load_manifest(report_dir)["files"])
+
+        removed_campaigns = [os.path.basename(d)[len(CAMPAIGN_PREFIX):] for d in expired]
+        if not dry_run:
+            for report_dir, campaign_id in zip(expired, removed_campaigns):
+                shutil.rmtree(report_dir, ignore_errors=True)
+                if drop_collection:
+                    drop_collection(campaign_id)
+
+        removed_blobs, freed_bytes = self.sweep_blobs(refs, dry_run, older_than=cutoff)
+        return {
+            "removed_campaigns": removed_campaigns,
+            "removed_blobs": removed_blobs,
+            "freed_bytes": freed_bytes,
+            "dry_run": dry_run
+        }
+
+    def sweep_blobs(self, refs: set, dry_run: bool = False, older_than: float = None) -> tuple:
+        """
+        Delete every blob whose digest is not in `refs`; returns (removed, freed_bytes).
+        With `older_than` (a timestamp), newer blobs are kept: they may belong to a write
+        whose manifest or index entry has not been saved yet.
+        """
+        removed, freed_bytes = 0, 0
+        if not os.path.isdir(self.blob_root):
+            return removed, freed_bytes
+        for shard in os.listdir(self.blob_root):
+            shard_dir = os.path.join(self.blob_root, shard)
+            for digest in os.listdir(shard_dir):
+                if digest in refs:
+                    continue
+                path = os.path.join(shard_dir, digest)
+                stat = os.stat(path)
+                if older_than is not None and stat.st_mtime >= older_than:
+                    continue
+                removed += 1
+                freed_bytes += stat.st_size
+                if not dry_run:
+                    os.remove(path)
+            if not dry_run and not os.listdir(shard_dir):
+                os.rmdir(shard_dir)
+        return removed, freed_bytes
+
+report_store = ReportStore()
+
+def main(argv=None):
+    from ..core.config import get_settings
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Campaign report storage maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc_parser = sub.add_parser("gc", help="Delete old campaigns and unreferenced resume blobs.")
+    gc_parser.add_argument("--keep-days", type=float, default=settings.report_retention_days)
+    gc_parser.add_argument("--dry-run", action="store_true")
+    gc_parser.add_argument("--keep-vectors", action="store_true", help="Do not drop the campaigns' vector collections.")
+    gc_parser.add_argument("--cache-days", type=float, default=settings.cache_retention_days,
+                           help="Also drop cached Gmail attachments, resume features and embeddings older than this many days.")
+    gc_parser.add_argument("--keep-caches", action="store_true", help="Leave the attachment, feature and embedding caches alone.")
+    args = parser.parse_args(argv)
+
+    vectors = None
+    if not (args.keep_vectors and args.keep_caches):
+        # Imported lazily: loads the embedding model
+        from . import vector_service
+        vectors = vector_service.vector_service
+    drop_collection = vectors.drop_job_collection if vectors and not args.keep_vectors and not args.dry_run else None
+
+    result = report_store.gc(args.keep_days, dry_run=args.dry_run, drop_collection=drop_collection)
+    prefix = "[dry run] " if args.dry_run else ""
+    print(f"{prefix}🧹 Removed {len(result['removed_campaigns'])} campaigns, "
+          f"{result['removed_blobs']} blobs ({result['freed_bytes'] / 1024 / 1024:.1f} MB freed).")
+    for campaign_id in result["removed_campaigns"]:
+        print(f"   - Campaign_{campaign_id}")
+
+    if not args.keep_caches:
+        from .ingest_service import attachment_cache, feature_cache
+        attachments = attachment_cache.gc(args.cache_days, dry_run=args.dry_run)
+        print(f"{prefix}🧹 Removed {attachments['removed_messages']} cached Gmail messages, "
+              f"{attachments['removed_blobs']} attachment blobs ({attachments['freed_bytes'] / 1024 / 1024:.1f} MB freed).")
+        features = feature_cache.gc(args.cache_days, dry_run=args.dry_run)
+        embeddings = vectors.embeddings.gc(args.cache_days, dry_run=args.dry_run)
+        print(f"{prefix}🧹 Removed {features['removed']} cached feature files "
+              f"({features['freed_bytes'] / 1024 / 1024:.1f} MB) and {embeddings['removed']} cached embeddings.")
+
+if __name__ == "__main__":
+    main()
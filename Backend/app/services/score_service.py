@@ -5,8 +5,26 @@ import re
 
 settings = get_settings()
 
-def calculate_score(resume_text: str, jd_data: dict, semantic_score: float, page_count: int = 1) -> dict:
+MAX_PAGES = 2
+JUNIOR_MAX_PAGES = 1
+JUNIOR_YEARS = 3
+
+def check_page_limits(page_count: int, cand_years: float = None) -> str:
+    """
+    Hard page-limit rules. Returns the rejection reason, or "" if the resume passes.
+    `cand_years=None` means experience is unknown (text not extracted yet): only the
+    absolute limit can be applied.
+    """
+    if cand_years is not None and cand_years < JUNIOR_YEARS and page_count > JUNIOR_MAX_PAGES:
+        return f"REJECTED: Junior Candidate ({cand_years}y exp) exceeds {JUNIOR_MAX_PAGES} Page limit (Has {page_count} pages)."
+    if page_count > MAX_PAGES:
+        return f"REJECTED: Resume exceeds {MAX_PAGES} Page limit (Has {page_count} pages)."
+    return ""
+
+def calculate_score(resume_text: str, jd_data: dict, semantic_score: float, page_count: int = 1,
+                    keyword_ratio: float = None) -> dict:
     # JD Data = {keywords: set, required_years: int, location: str}
+    # keyword_ratio: precomputed 0-1 keyword relevance (e.g. BM25); None = exact substring matching
     settings = get_settings()
     
     breakdown = {
@@ -25,11 +43,13 @@ def calculate_score(resume_text: str, jd_data: dict, semantic_score: float, page
     resume_lower = resume_text.lower()
     
     if jd_kws:
-        for kw in jd_kws:
-            if kw.lower() in resume_lower:
-                exact_matches += 1
-        
-        exact_ratio = exact_matches / len(jd_kws)
+        if keyword_ratio is not None:
+            exact_ratio = keyword_ratio
+        else:
+            for kw in jd_kws:
+                if kw.lower() in resume_lower:
+                    exact_matches += 1
+            exact_ratio = exact_matches / len(jd_kws)
         # Hybrid Formula: (Exact * 0.5) + (Semantic * 0.5)
         raw_kw_score = (exact_ratio * 0.5) + (semantic_score * 0.5)
         breakdown["keyword_score"] = min(raw_kw_score * settings.keyword_weight, settings.keyword_weight)
@@ -70,15 +90,11 @@ def calculate_score(resume_text: str, jd_data: dict, semantic_score: float, page
     breakdown["rejection_reason"] = ""
     
     # REJECTION RULES
-    if cand_years < 3 and page_count > 1:
+    rejection_reason = check_page_limits(page_count, cand_years)
+    if rejection_reason:
         breakdown["is_rejected"] = True
-        breakdown["rejection_reason"] = f"REJECTED: Junior Candidate ({cand_years}y exp) exceeds 1 Page limit (Has {page_count} pages)."
+        breakdown["rejection_reason"] = rejection_reason
         return breakdown # Return immediately if rejected
-        
-    if page_count > 2:
-        breakdown["is_rejected"] = True
-        breakdown["rejection_reason"] = f"REJECTED: Resume exceeds 2 Page limit (Has {page_count} pages)."
-        return breakdown
 
     # Penalties for formatting issues (if not rejected)
     format_penalty = 0
@@ -27,8 +27,8 @@ def extract_keywords(text: str) -> Set[str]:
     keywords.update(chunks)
     return keywords
 
-def extract_years_of_experience(text: str) -> float:
-    """Extract experience using regex logic."""
+def extract_years_of_experience(text: str, default: float = 0.0) -> float:
+    """Extract experience using regex logic. Returns `default` when no mention is found."""
     # Pattern: "5+ years", "5 years", "5 yrs"
     match = re.search(r'(\d+)[\+]?\s*(?:-\s*\d+)?\s*(?:years?|yrs?)', text, re.IGNORECASE)
     if match:
@@ -36,7 +36,7 @@ def extract_years_of_experience(text: str) -> float:
             return float(match.group(1))
         except:
             return 0.0
-    return 0.0
+    return default
 
 def extract_education_level(text: str) -> int:
     """Determine education weight (0-10) based on keywords."""
@@ -1,50 +1,187 @@
 
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+from contextlib import contextmanager
 from ..core.config import get_settings
+from .campaign_service import campaign_store
+import chromadb
+import hashlib
+import logging
 import os
 import shutil
+import time
+import uuid
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+JOB_COLLECTION_PREFIX = "job_"
+EMBEDDING_CACHE_COLLECTION = "embedding_cache"
+
+class CachedEmbeddings(Embeddings):
+    """
+    Persistent embedding cache in front of the HuggingFace model, keyed by
+    sha256(model name + text). Pre-ingested or re-submitted resumes are embedded once;
+    every later collection reuses the stored vector. Only misses reach the model.
+    Each entry records when it was last used (`used_at`), which gc() goes by.
+    """
+
+    def __init__(self, model: Embeddings, client, model_name: str):
+        self.model = model
+        self.model_name = model_name
+        self.cache = client.get_or_create_collection(EMBEDDING_CACHE_COLLECTION)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts):
+        keys = [self._key(t) for t in texts]
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            cached = self.cache.get(ids=unique_keys, include=["embeddings"])
+            found = {k: [float(x) for x in e] for k, e in zip(cached["ids"], cached["embeddings"])}
+        except Exception as e:
+            logger.warning(f"Embedding cache read warning: {e}")
+
+        misses = {k: t for k, t in zip(keys, texts) if k not in found}
+        now = time.time()
+        if found:
+            try:
+                hits = list(found)
+                self.cache.update(ids=hits, metadatas=[{"used_at": now}] * len(hits))
+            except Exception as e:
+                logger.warning(f"Embedding cache touch warning: {e}")
+        if misses:
+            vectors = self.model.embed_documents(list(misses.values()))
+            found.update(zip(misses.keys(), vectors))
+            try:
+                self.cache.upsert(ids=list(misses.keys()), embeddings=[list(v) for v in vectors],
+                                  metadatas=[{"used_at": now}] * len(misses))
+            except Exception as e:
+                logger.warning(f"Embedding cache write warning: {e}")
+        logger.debug(f"Embeddings: {len(unique_keys) - len(misses)} cached, {len(misses)} computed.")
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str):
+        return self.model.embed_query(text)
+
+    def gc(self, keep_days: float, dry_run: bool = False, page_size: int = 5000) -> dict:
+        """Delete cached embeddings unused for more than `keep_days` (entries from before `used_at` count as unused)."""
+        cutoff = time.time() - keep_days * 86400
+        stale, offset = [], 0
+        while True:
+            page = self.cache.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            stale.extend(i for i, m in zip(page["ids"], page["metadatas"]) if (m or {}).get("used_at", 0) < cutoff)
+            offset += len(page["ids"])
+        if not dry_run:
+            for start in range(0, len(stale), page_size):
+                self.cache.delete(ids=stale[start:start + page_size])
+        return {"removed": len(stale)}
+
+class JobCollection:
+    """A request-scoped Chroma collection. Concurrent analyses each get their own."""
+
+    def __init__(self, db: Chroma, job_id: str):
+        self.db = db
+        self.job_id = job_id
+
+    def add_texts(self, texts, metadatas):
+        return self.db.add_texts(texts=texts, metadatas=metadatas)
+
+    def search(self, query: str, k: int = 5, filter: dict = None):
+        return self.db.similarity_search_with_score(query, k=k, filter=filter)
+
+    def delete_ids(self, ids):
+        try:
+            self.db.delete(ids=list(ids))
+        except Exception as e:
+            logger.warning(f"Job vector delete warning ({self.job_id}): {e}")
+
+    def delete(self):
+        try:
+            self.db.delete_collection()
+        except Exception as e:
+            logger.warning(f"Job collection delete warning ({self.job_id}): {e}")
 
 class VectorService:
     def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(model_name=settings.embedding_model)
         self.persist_directory = settings.db_persist_dir
-        
+
         # Ensure directory exists or create fresh instance
         if not os.path.exists(self.persist_directory):
             os.makedirs(self.persist_directory)
-            
-        self.db = Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embeddings
+
+        # One shared client; every collection (per-job + embedding cache) lives in it
+        self.client = chromadb.PersistentClient(path=self.persist_directory)
+        self.embeddings = CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name=settings.embedding_model), self.client, settings.embedding_model
         )
+        self.purge_job_collections()
 
-    def add_texts(self, texts, metadatas):
-        """Add documents to the vector store."""
-        return self.db.add_texts(texts=texts, metadatas=metadatas)
+    @contextmanager
+    def job_collection(self, job_id: str = None, keep: bool = False):
+        """
+        Yield a namespaced collection for one analysis job and drop it afterwards,
+        so two `/analyze` calls never see (or wipe) each other's vectors.
+        With keep=True the collection outlives the request (campaign embeddings
+        reused by incremental appends) until drop_job_collection() is called.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        db = Chroma(
+            client=self.client,
+            collection_name=f"{JOB_COLLECTION_PREFIX}{job_id}",
+            embedding_function=self.embeddings,
+            collection_metadata={"created_at": time.time(), "keep": keep}
+        )
+        collection = JobCollection(db, job_id)
+        try:
+            yield collection
+        finally:
+            if not keep:
+                collection.delete()
 
-    def search(self, query: str, k: int = 5):
-        """Perform semantic search."""
-        return self.db.similarity_search_with_score(query, k=k)
-
-    def reset(self):
-        """Clear the vector database completely."""
-        try:
-            # Soft reset: Delete collection content instead of folder
-            if self.db:
-                try:
-                    self.db.delete_collection()
-                except Exception as e:
-                    print(f"Collection delete warning: {e}")
-            
-            # Re-initialize
-            self.db = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings
-            )
+    def drop_job_collection(self, job_id: str):
+        try:
+            self.client.delete_collection(f"{JOB_COLLECTION_PREFIX}{job_id}")
         except Exception as e:
-            print(f"Vector DB Reset Error: {e}")
+            logger.warning(f"Job collection delete warning ({job_id}): {e}")
+
+    def delete_job_vectors(self, job_id: str, ids):
+        """Remove specific vectors from a job collection (e.g. those added by a cancelled append)."""
+        try:
+            self.client.get_collection(f"{JOB_COLLECTION_PREFIX}{job_id}").delete(ids=list(ids))
+        except Exception as e:
+            logger.warning(f"Job vector delete warning ({job_id}): {e}")
+
+    def purge_job_collections(self, max_age_seconds: float = 3600):
+        """
+        Remove job collections left behind by a crashed process, and campaign collections
+        (keep=True) whose campaign no longer exists: never saved, deleted, or removed by
+        `report_store gc --keep-vectors`.
+        """
+        try:
+            for col in self.client.list_collections():
+                name = getattr(col, "name", col)
+                if not name.startswith(JOB_COLLECTION_PREFIX):
+                    continue
+                metadata = self.client.get_collection(name).metadata or {}
+                if time.time() - metadata.get("created_at", 0) <= max_age_seconds:
+                    continue
+                if metadata.get("keep") and self._campaign_exists(name[len(JOB_COLLECTION_PREFIX):]):
+                    continue
+                self.client.delete_collection(name)
+        except Exception as e:
+            logger.warning(f"Job collection purge warning: {e}")
+
+    @staticmethod
+    def _campaign_exists(campaign_id: str) -> bool:
+        try:
+            return campaign_store.exists(campaign_id)
+        except ValueError:
+            return False
 
 vector_service = VectorService()
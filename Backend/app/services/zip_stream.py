@@ -0,0 +1,197 @@
+
+import hashlib
+import os
+import re
+import struct
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+ZIP32_LIMIT = 0xFFFFFFFF
+FLAG_UTF8 = 0x0800
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# CRC-32 per (path, size, mtime): report packets are immutable once built, so repeat downloads skip the pre-pass
+_crc_cache = {}
+
+def _file_crc32(source, size: int, mtime: float) -> int:
+    """CRC-32 of a file, given its path or an open file (read from the start)."""
+    key = (source if isinstance(source, str) else source.name, size, mtime)
+    if key not in _crc_cache:
+        f = open(source, "rb") if isinstance(source, str) else source
+        try:
+            crc, pos = 0, 0
+            for chunk in iter(lambda: os.pread(f.fileno(), CHUNK_SIZE, pos), b""):
+                crc = zlib.crc32(chunk, crc)
+                pos += len(chunk)
+        finally:
+            if f is not source:
+                f.close()
+        _crc_cache[key] = crc & 0xFFFFFFFF
+    return _crc_cache[key]
+
+def _dos_datetime(mtime: float) -> Tuple[int, int]:
+    t = time.localtime(max(mtime, 315532800))  # ZIP dates start in 1980
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+class ZipStream:
+    """
+    Uncompressed (STORED) ZIP archive of a directory, generated on the fly.
+
+    CRCs and sizes are computed up front, so the exact archive length is known
+    before the first byte is sent. That gives a Content-Length, and any byte range
+    can be produced by seeking into the right file. Only one chunk is ever held in memory.
+    Entries or offsets past 4 GB get ZIP64 records.
+
+    The content is pinned when the stream is built. `sources` maps archive names to
+    immutable copies (the report store's blobs); every other file is opened here and
+    read through that descriptor. A packet rebuilt mid-download therefore does not
+    change the bytes being sent. Call close() once the archive has been streamed.
+    """
+
+    def __init__(self, root: str, exclude: Tuple[str, ...] = (), sources: Optional[Dict[str, str]] = None):
+        self.root = root
+        self.segments: List[Tuple[int, int, object]] = []  # (offset, length, bytes | file path | open file)
+        self.size = 0
+        self._files = []
+        try:
+            self._build(exclude, sources or {})
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        for f in self._files:
+            f.close()
+        self._files = []
+
+    def _add(self, length: int, payload):
+        self.segments.append((self.size, length, payload))
+        self.size += length
+
+    def _pin(self, arcname: str, path: str, sources: Dict[str, str]):
+        """(payload, size, mtime) for one entry, fixed for the lifetime of this stream."""
+        source = sources.get(arcname)
+        if source and os.path.exists(source):
+            stat = os.stat(source)
+            return source, stat.st_size, stat.st_mtime
+        f = open(path, "rb")
+        self._files.append(f)
+        stat = os.fstat(f.fileno())
+        return f, stat.st_size, stat.st_mtime
+
+    def _build(self, exclude: Tuple[str, ...], sources: Dict[str, str]):
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for fname in sorted(filenames):
+                if fname.endswith(".tmp") or fname in exclude:
+                    continue
+                path = os.path.join(dirpath, fname)
+                arcname = os.path.relpath(path, self.root).replace(os.sep, "/")
+                try:
+                    payload, size, mtime = self._pin(arcname, path, sources)
+                except FileNotFoundError:
+                    continue  # Removed between the listing and the open
+                entries.append((arcname, payload, size, mtime))
+
+        central = []
+        digest = hashlib.sha1()
+        for arcname, payload, size, mtime in entries:
+            name = arcname.encode("utf-8")
+            crc = _file_crc32(payload, size, mtime)
+            dos_time, dos_date = _dos_datetime(mtime)
+            offset = self.size
+
+            # ZIP64: oversized fields hold 0xFFFFFFFF and the real value moves to extra field 0x0001
+            large = size >= ZIP32_LIMIT
+            local_extra = struct.pack("<HHQQ", 0x0001, 16, size, size) if large else b""
+            central_values = [size, size] if large else []
+            if offset >= ZIP32_LIMIT:
+                central_values.append(offset)
+            central_extra = struct.pack(f"<HH{len(central_values)}Q", 0x0001, 8 * len(central_values), *central_values) if central_values else b""
+            version = 45 if central_values else 20
+            size32 = ZIP32_LIMIT if large else size
+
+            local_header = struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, version, FLAG_UTF8, 0, dos_time, dos_date,
+                crc, size32, size32, len(name), len(local_extra)
+            ) + name + local_extra
+            self._add(len(local_header), local_header)
+            self._add(size, payload)
+
+            central.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, version, version, FLAG_UTF8, 0, dos_time, dos_date,
+                crc, size32, size32, len(name), len(central_extra), 0, 0, 0, 0o100644 << 16, min(offset, ZIP32_LIMIT)
+            ) + name + central_extra)
+            digest.update(f"{arcname}:{size}:{crc}:{mtime}\n".encode("utf-8"))
+
+        cd_offset = self.size
+        cd_bytes = b"".join(central)
+        count = len(central)
+        zip64_end = b""
+        if count >= 0xFFFF or len(cd_bytes) >= ZIP32_LIMIT or cd_offset >= ZIP32_LIMIT:
+            zip64_offset = cd_offset + len(cd_bytes)
+            zip64_end = struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, len(cd_bytes), cd_offset
+            ) + struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1)
+        end_record = struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(len(cd_bytes), ZIP32_LIMIT), min(cd_offset, ZIP32_LIMIT), 0
+        )
+        tail = cd_bytes + zip64_end + end_record
+        self._add(len(tail), tail)
+        self.etag = f'"{digest.hexdigest()}"'
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield archive bytes [start, end] (inclusive) in chunks of at most CHUNK_SIZE."""
+        end = self.size - 1 if end is None else end
+        for offset, length, payload in self.segments:
+            seg_end = offset + length - 1
+            if seg_end < start or offset > end:
+                continue
+            lo, hi = max(start, offset) - offset, min(end, seg_end) - offset + 1
+            if isinstance(payload, bytes):
+                for i in range(lo, hi, CHUNK_SIZE):
+                    yield payload[i:min(i + CHUNK_SIZE, hi)]
+            else:
+                # Blob paths are opened per range; pinned files are read in place
+                f = open(payload, "rb") if isinstance(payload, str) else payload
+                try:
+                    pos = lo
+                    while pos < hi:
+                        chunk = os.pread(f.fileno(), min(CHUNK_SIZE, hi - pos), pos)
+                        if not chunk:
+                            raise IOError(f"{f.name} changed while streaming")
+                        pos += len(chunk)
+                        yield chunk
+                finally:
+                    if f is not payload:
+                        f.close()
+
+def parse_range(header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `Range: bytes=a-b` header into an inclusive (start, end).
+    Returns None for no/unsupported ranges (serve the whole body) and raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, total - length), total - 1
+    start = int(first)
+    end = min(int(last), total - 1) if last else total - 1
+    if start >= total or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
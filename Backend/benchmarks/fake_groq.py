@@ -0,0 +1,126 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGroqServer:
+    """
+    Local stand-in for the Groq chat completions API (OpenAI compatible).
+    Point the SDK at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+    - latency_ms / jitter_ms: simulated inference time per request.
+    - JSON-mode prompts get a {"candidates": [...]} object built from the
+      "Filename:" lines in the prompt, so the pipeline's parsing path is exercised.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 300.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sleep(self):
+        delay = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _reply(self, body: dict) -> str:
+        messages = body.get("messages", [])
+        prompt = messages[-1]["content"] if messages else ""
+        if body.get("response_format", {}).get("type") == "json_object":
+            entries = re.findall(r"--- Candidate \((.*?)\) ---\s*Filename:\s*(.+)", prompt)
+            candidates = []
+            for i, (label, fname) in enumerate(entries):
+                candidates.append({
+                    "filename": fname.strip(),
+                    "candidate_name": f"Candidate {i + 1}",
+                    "status": "Recommended" if label.startswith("SHORTLISTED") else "Rejected",
+                    "reasoning": "Synthetic verdict from the fake Groq server.",
+                    "strengths": ["Relevant skills"],
+                    "weaknesses": ["Synthetic data"],
+                })
+            return json.dumps({"candidates": candidates})
+        # Plain prompts (anonymize / extract_location) echo the tail of the prompt.
+        return prompt.strip().splitlines()[-1] if prompt.strip() else ""
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    body = {}
+                with server._lock:
+                    server.request_count += 1
+                server._sleep()
+
+                content = server._reply(body)
+                payload = json.dumps({
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake-llama"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a local fake Groq API server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    srv = FakeGroqServer(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    print(f"🧪 Fake Groq listening on {srv.base_url} (latency {args.latency_ms}ms)")
+    print(f"   export GROQ_BASE_URL={srv.base_url}")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        srv.stop()
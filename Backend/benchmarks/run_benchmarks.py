@@ -0,0 +1,290 @@
+"""
+Offline benchmark suite for the Resume Screening backend.
+
+Runs every service and the full /analyze endpoint against a synthetic resume corpus
+and a local fake Groq server, so no API key or Gmail inbox is needed.
+
+Usage (from the Backend/ directory):
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000 --latency-ms 300
+    python -m benchmarks.run_benchmarks --sizes 100 --only pdf_service calculate_score --compare bench_results/old.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from .fake_groq import FakeGroqServer
+from .synthetic_corpus import SAMPLE_JD, generate_corpus
+
+ALL_BENCHMARKS = ["pdf_service", "utils", "vector_service", "calculate_score", "keyword_scorer", "analyze"]
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _record(results, name, n, seconds, **extra):
+    entry = {
+        "benchmark": name,
+        "n": n,
+        "seconds": round(seconds, 4),
+        "per_item_ms": round(seconds * 1000 / n, 3) if n else 0.0,
+        "throughput_per_s": round(n / seconds, 2) if seconds > 0 else None,
+    }
+    entry.update(extra)
+    results.append(entry)
+    print(f"   {name:<32} n={n:<5} {entry['seconds']:>9.3f}s  {entry['per_item_ms']:>9.3f} ms/item")
+    return entry
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def _extract_all(pdf_service, corpus):
+    texts, pages = {}, {}
+    for fname, content in corpus.items():
+        if fname.lower().endswith(".pdf"):
+            texts[fname], pages[fname] = pdf_service.extract_text(content)
+        else:
+            texts[fname], pages[fname] = content.decode("utf-8", errors="ignore"), 1
+    return texts, pages
+
+
+def bench_services(names, n, corpus, results):
+    from app.services import pdf_service, utils
+    from app.services.score_service import calculate_score
+
+    raw_texts, pages = _extract_all(pdf_service.pdf_service, corpus)
+    if "pdf_service" in names:
+        pdfs = {k: v for k, v in corpus.items() if k.lower().endswith(".pdf")}
+        secs, _ = _timed(_extract_all, pdf_service.pdf_service, pdfs)
+        _record(results, "pdf_service.extract_text", len(pdfs), secs,
+                corpus_bytes=sum(len(v) for v in pdfs.values()))
+
+    clean_texts = {k: utils.clean_text(v) for k, v in raw_texts.items()}
+    jd_clean = utils.clean_text(SAMPLE_JD)
+    jd_data = {
+        "keywords": utils.extract_keywords(jd_clean),
+        "required_years": utils.extract_years_of_experience(jd_clean),
+        "location": "Remote",
+    }
+
+    if "utils" in names:
+        secs, _ = _timed(lambda: [utils.clean_text(t) for t in raw_texts.values()])
+        _record(results, "utils.clean_text", n, secs)
+        secs, _ = _timed(lambda: [utils.extract_years_of_experience(t) for t in clean_texts.values()])
+        _record(results, "utils.extract_years_of_experience", n, secs)
+        secs, _ = _timed(lambda: [utils.extract_education_level(t) for t in clean_texts.values()])
+        _record(results, "utils.extract_education_level", n, secs)
+        secs, _ = _timed(lambda: [utils.extract_name(t, filename=f) for f, t in clean_texts.items()])
+        _record(results, "utils.extract_name", n, secs)
+        secs, _ = _timed(utils.extract_keywords, jd_clean)
+        _record(results, "utils.extract_keywords (JD)", 1, secs)
+
+    if "vector_service" in names:
+        from app.services import vector_service
+        vs = vector_service.vector_service
+        docs = list(clean_texts.values())
+        metas = [{"filename": f} for f in clean_texts]
+        with vs.job_collection() as job_db:
+            secs, _ = _timed(job_db.add_texts, docs, metas)
+            _record(results, "vector_service.add_texts", n, secs)
+            secs, _ = _timed(job_db.search, jd_clean, k=n)
+            _record(results, "vector_service.search", n, secs)
+        # Same documents again: served from the embedding cache
+        with vs.job_collection() as job_db:
+            secs, _ = _timed(job_db.add_texts, docs, metas)
+            _record(results, "vector_service.add_texts (cached)", n, secs)
+
+    if "keyword_scorer" in names:
+        from app.services import bm25_service, funnel_service
+        secs, _ = _timed(funnel_service.lexical_scores, clean_texts, jd_data["keywords"])
+        _record(results, "keyword_scorer.exact_loop", n, secs, keywords=len(jd_data["keywords"]))
+        secs, _ = _timed(bm25_service.keyword_ratios, clean_texts, jd_data["keywords"])
+        _record(results, "keyword_scorer.bm25_index", n, secs, keywords=len(jd_data["keywords"]))
+
+    if "calculate_score" in names:
+        secs, _ = _timed(lambda: [calculate_score(t, jd_data, 0.5, page_count=pages[f]) for f, t in clean_texts.items()])
+        _record(results, "score_service.calculate_score", n, secs)
+
+
+def bench_analyze(n, corpus, results, top_n: int):
+    import requests
+    import uvicorn
+    from app.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        files = [("resume_files", (fname, content, "application/pdf" if fname.endswith(".pdf") else "text/plain"))
+                 for fname, content in corpus.items()]
+        data = {"jd_text_input": SAMPLE_JD, "top_n": str(top_n)}
+
+        # Probe the health check while the campaign runs: it must stay responsive
+        probe_latencies, stop_probe = [], threading.Event()
+        def probe():
+            session = requests.Session()
+            while not stop_probe.is_set():
+                t0 = time.perf_counter()
+                session.get(f"http://127.0.0.1:{port}/", timeout=30)
+                probe_latencies.append((time.perf_counter() - t0) * 1000)
+                stop_probe.wait(0.05)
+        prober = threading.Thread(target=probe, daemon=True)
+        prober.start()
+
+        start = time.perf_counter()
+        resp = requests.post(f"http://127.0.0.1:{port}/analyze", data=data, files=files, timeout=3600)
+        secs = time.perf_counter() - start
+        stop_probe.set()
+        prober.join()
+        body = resp.json()
+        _record(results, "POST /analyze", n, secs,
+                status=body.get("status"), rejected=body.get("rejected_count"),
+                upload_bytes=sum(len(v) for v in corpus.values()))
+
+        if probe_latencies:
+            ordered = sorted(probe_latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            results.append({
+                "benchmark": "GET / during /analyze",
+                "n": n,
+                "probes": len(ordered),
+                "p50_ms": round(ordered[len(ordered) // 2], 2),
+                "p95_ms": round(p95, 2),
+                "max_ms": round(ordered[-1], 2),
+                "p95_under_50ms": p95 < 50,
+            })
+            print(f"   {'GET / during /analyze':<32} n={n:<5} p50={ordered[len(ordered) // 2]:.1f}ms p95={p95:.1f}ms max={ordered[-1]:.1f}ms")
+        # Report packet is built in the background: time until it is ready
+        if body.get("campaign_id"):
+            status_url = f"http://127.0.0.1:{port}/campaigns/{body['campaign_id']}/report"
+            while requests.get(status_url, timeout=30).json().get("status") in ("pending", "running"):
+                time.sleep(0.05)
+            _record(results, "report packet (background)", n, time.perf_counter() - start - secs)
+        if body.get("report_path") and os.path.isdir(body["report_path"]):
+            shutil.rmtree(body["report_path"], ignore_errors=True)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    base = {(r["benchmark"], r["n"]): r for r in baseline.get("results", [])}
+    print(f"\n📊 Comparison against {baseline_path} ({baseline.get('meta', {}).get('git_commit', '?')})")
+    for r in current["results"]:
+        old = base.get((r["benchmark"], r["n"]))
+        if not old or not old.get("seconds") or "seconds" not in r:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        flag = "⚠️ SLOWER" if ratio > 1.10 else ("✅ faster" if ratio < 0.90 else "")
+        print(f"   {r['benchmark']:<32} n={r['n']:<5} {old['seconds']:>9.3f}s -> {r['seconds']:>9.3f}s  x{ratio:.2f} {flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Resume Screening backend.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--only", nargs="+", choices=ALL_BENCHMARKS, default=ALL_BENCHMARKS)
+    parser.add_argument("--pages", type=int, default=1, help="Minimum pages per synthetic resume")
+    parser.add_argument("--max-pages", type=int, default=3, help="Maximum pages (exercises rejection rules)")
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--pdf-ratio", type=float, default=0.9)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Fake Groq latency per call")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--llm-calls-per-minute", type=int, default=0,
+                        help="LLM rate limit during the run (default 0 = off; config.ini's limit is meant for real Groq)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="JSON results path (default: bench_results/<version>_<time>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    fake_groq = FakeGroqServer(latency_ms=args.latency_ms).start()
+    os.environ["GROQ_BASE_URL"] = fake_groq.base_url
+    os.environ.setdefault("GROQ_API_KEY", "bench-fake-key")
+    # Fresh feature/attachment/embedding caches so every run starts cold
+    cache_root = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ["DATA_DIR"] = os.path.join(cache_root, "data")
+    os.environ["DB_PERSIST_DIR"] = os.path.join(cache_root, "chroma_db")
+
+    from app.core.config import get_settings
+    from app.services import admission_service
+    settings = get_settings()
+    # The fake server has no quota; with config.ini's limit, consecutive sizes would time limiter sleeps
+    settings.llm_calls_per_minute = args.llm_calls_per_minute
+    admission_service.llm_rate_limiter.limit = args.llm_calls_per_minute
+
+    results = []
+    started = datetime.now()
+    print(f"🚀 Benchmarking v{settings.version} | sizes={args.sizes} | fake Groq at {fake_groq.base_url}")
+    try:
+        for n in args.sizes:
+            print(f"\n📦 Corpus: {n} resumes")
+            corpus = generate_corpus(n, args.pages, args.words_per_page, args.pdf_ratio, args.max_pages, args.seed)
+            service_names = [b for b in args.only if b != "analyze"]
+            if service_names:
+                bench_services(service_names, n, corpus, results)
+            if "analyze" in args.only:
+                bench_analyze(n, corpus, results, args.top_n)
+    finally:
+        fake_groq.stop()
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "app_version": settings.version,
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "started_at": started.isoformat(timespec="seconds"),
+            "fake_groq_latency_ms": args.latency_ms,
+            "llm_calls_per_minute": args.llm_calls_per_minute,
+            "fake_groq_requests": fake_groq.request_count,
+            "params": vars(args),
+        },
+        "results": results,
+    }
+    try:
+        import resource
+        report["meta"]["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+
+    out = args.output or os.path.join("bench_results", f"bench_v{settings.version}_{started.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
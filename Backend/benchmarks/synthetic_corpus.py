@@ -0,0 +1,146 @@
+import random
+from typing import Dict, List
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Sneha", "Vikram", "Ananya", "Rohan", "Kavya", "Arjun", "Meera",
+               "John", "Emily", "Carlos", "Sofia", "Wei", "Yuki", "Omar", "Fatima", "Liam", "Olivia"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Singh", "Das", "Mehta",
+              "Smith", "Brown", "Garcia", "Rossi", "Chen", "Tanaka", "Khan", "Ali", "Walker", "Moore"]
+SKILLS = ["Python", "FastAPI", "Django", "Flask", "React", "Node.js", "TypeScript", "Docker", "Kubernetes",
+          "AWS", "GCP", "Azure", "PostgreSQL", "MongoDB", "Redis", "Kafka", "Spark", "TensorFlow", "PyTorch",
+          "LangChain", "NLP", "Computer Vision", "Machine Learning", "Deep Learning", "SQL", "Pandas",
+          "Microservices", "REST APIs", "GraphQL", "CI/CD", "Terraform", "Linux", "Java", "Go", "Rust"]
+DEGREES = ["B.Tech in Computer Science", "Bachelor of Engineering", "Master of Science in Data Science",
+           "MBA", "M.Tech in Artificial Intelligence", "PhD in Machine Learning", "Diploma in IT"]
+CITIES = ["Bangalore", "Pune", "Hyderabad", "Raipur", "Mumbai", "Delhi", "Chennai", "Remote"]
+VERBS = ["Built", "Designed", "Led", "Optimized", "Migrated", "Automated", "Deployed", "Maintained", "Scaled"]
+NOUNS = ["data pipelines", "REST services", "ML models", "dashboards", "microservices", "search features",
+         "ETL jobs", "recommendation engines", "CI/CD workflows", "LLM agents"]
+
+SAMPLE_JD = """
+AI Engineer (3+ years) - Remote
+We are hiring an AI Engineer to design and deploy LLM agents and machine learning services.
+Requirements: 3+ years of experience with Python, FastAPI, LangChain, PyTorch, Docker, Kubernetes,
+PostgreSQL, Redis and AWS. Experience with NLP, vector databases and REST APIs is a plus.
+Education: Bachelor or Master degree in Computer Science.
+Responsibilities: build ML models, scale microservices, maintain CI/CD workflows and data pipelines.
+"""
+
+
+def _resume_lines(rng: random.Random, words_per_page: int, pages: int) -> List[str]:
+    """Build plain-text resume lines sized to roughly `words_per_page * pages` words."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    years = rng.randint(0, 12)
+    skills = rng.sample(SKILLS, k=rng.randint(5, 14))
+    lines = [
+        name,
+        f"{name.split()[0].lower()}.{rng.randint(10, 99)}@example.com | +91 9{rng.randint(100000000, 999999999)}",
+        f"Location: {rng.choice(CITIES)}",
+        "SUMMARY",
+        f"Software engineer with {years}+ years of experience in {', '.join(skills[:3])}.",
+        "SKILLS",
+        ", ".join(skills),
+        "EDUCATION",
+        rng.choice(DEGREES),
+        "EXPERIENCE",
+    ]
+    target_words = words_per_page * pages
+    words = sum(len(l.split()) for l in lines)
+    while words < target_words:
+        bullet = f"- {rng.choice(VERBS)} {rng.choice(NOUNS)} using {rng.choice(skills)} and {rng.choice(skills)}."
+        lines.append(bullet)
+        words += len(bullet.split())
+        if rng.random() < 0.08:
+            lines.append(rng.choice(["PROJECTS", "CERTIFICATIONS", "ACHIEVEMENTS"]))
+    return lines
+
+
+def _escape_pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(lines: List[str], pages: int) -> bytes:
+    """
+    Minimal PDF writer (Helvetica text only) so the corpus needs no extra dependency.
+    Lines are split evenly across `pages` pages; pypdf extracts them like a real resume.
+    """
+    pages = max(1, pages)
+    per_page = max(1, -(-len(lines) // pages))
+    chunks = [lines[i * per_page:(i + 1) * per_page] for i in range(pages)]
+
+    objects = []  # index 0 -> object 1
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"")  # Pages placeholder, filled once kids are known
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    kids = []
+    for chunk in chunks:
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td\n"
+        stream += "\n".join(f"({_escape_pdf_text(l[:110])}) Tj T*" for l in chunk)
+        stream += "\nET"
+        data = stream.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref_pos = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_pos)
+    return bytes(out)
+
+
+def generate_corpus(count: int, pages: int = 1, words_per_page: int = 350, pdf_ratio: float = 1.0,
+                    max_pages: int = None, seed: int = 42) -> Dict[str, bytes]:
+    """
+    Generate `count` synthetic resumes as {filename: bytes}.
+    `pdf_ratio` controls the share of PDFs vs .txt files; `max_pages` (if set) draws page
+    counts uniformly from [pages, max_pages] so rejection rules get exercised too.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    for i in range(count):
+        n_pages = rng.randint(pages, max_pages) if max_pages and max_pages > pages else pages
+        lines = _resume_lines(rng, words_per_page, n_pages)
+        stem = lines[0].replace(" ", "_")
+        if rng.random() < pdf_ratio:
+            corpus[f"{stem}_Resume_{i:05d}.pdf"] = build_pdf(lines, n_pages)
+        else:
+            corpus[f"{stem}_Resume_{i:05d}.txt"] = "\n".join(lines).encode("utf-8")
+    return corpus
+
+
+def write_corpus(corpus: Dict[str, bytes], out_dir: str):
+    import os
+    os.makedirs(out_dir, exist_ok=True)
+    for fname, content in corpus.items():
+        with open(os.path.join(out_dir, fname), "wb") as f:
+            f.write(content)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--pdf-ratio", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="data/synthetic_resumes")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.count, args.pages, args.words_per_page, args.pdf_ratio, args.max_pages, args.seed)
+    write_corpus(corpus, args.out)
+    print(f"✅ Wrote {len(corpus)} synthetic resumes to {args.out}")
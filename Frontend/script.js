@@ -8,6 +8,7 @@ let jdFile = null;
 let resumeFiles = [];
 let lastAnalysisData = null;
 let currentReportPath = "";
+let currentCampaignId = "";
 
 // --- Initialization & Stepper Logic ---
 document.addEventListener('DOMContentLoaded', () => {
@@ -184,6 +185,7 @@ window.switchAnalysisFilter = function (filter) {
 function renderResults(data) {
     lastAnalysisData = data;
     currentReportPath = data.report_path;
+    currentCampaignId = data.campaign_id;
     document.getElementById('results-area').classList.remove('hidden');
     
     // Default filter
@@ -264,6 +266,22 @@ function renderAnalysisContent(filter) {
                 container.appendChild(card);
             });
         }
+
+        // Resumes the funnel's keyword prefilter dropped before scoring
+        const prefiltered = lastAnalysisData.prefiltered_candidates || [];
+        if (prefiltered.length > 0) {
+            const prefilterHeader = document.createElement('h3');
+            prefilterHeader.textContent = `Keyword Prefilter (${prefiltered.length} not scored)`;
+            prefilterHeader.style.margin = "40px 0 20px 0";
+            container.appendChild(prefilterHeader);
+
+            prefiltered.forEach(r => {
+                const card = document.createElement('div');
+                card.className = 'candidate-card status-rejected';
+                card.innerHTML = `<h4>${r.name || r.filename}</h4><p>${r.reason}</p>`;
+                container.appendChild(card);
+            });
+        }
     }
 }
 
@@ -302,12 +320,24 @@ function showNotification(message, type = "info") {
     alert(message);
 }
 
-// Open Folder Link
+// Download Campaign Packet (ZIP streamed by the backend once the report is built)
 document.getElementById('open-report-btn').addEventListener('click', async () => {
-    if (!currentReportPath) return;
-    const formData = new FormData();
-    formData.append('path', currentReportPath);
-    fetch('http://localhost:8000/open_report', { method: 'POST', body: formData });
+    if (!currentCampaignId) return;
+    const base = `http://localhost:8000/campaigns/${currentCampaignId}`;
+    try {
+        let status = (await (await fetch(`${base}/report`)).json()).status;
+        while (status === 'pending' || status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            status = (await (await fetch(`${base}/report`)).json()).status;
+        }
+        if (status === 'failed') {
+            showNotification("Report generation failed. Check the backend logs.", "error");
+            return;
+        }
+        window.location.href = `${base}/download`;
+    } catch (error) {
+        showNotification("Could not download the campaign packet.", "error");
+    }
 });
 
 // Modal Logic placeholder
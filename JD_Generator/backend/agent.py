@@ -1,18 +1,14 @@
 import os
-from groq import Groq
+from groq import AsyncGroq
 from dotenv import load_dotenv
 # Load environment variables
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, "../../.env"))
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
 
-async def generate_jd_ai(data: dict):
-    """
-    AI Agent to generate a professional, ATS-friendly JD based on structured inputs.
-    """
-    
-    prompt = f"""
+def build_jd_prompt(data: dict) -> str:
+    return f"""
     You are an expert HR Specialist and Technical Recruiter. 
     Generate a professional and ATS-friendly Job Description based on the following structured input:
 
@@ -64,13 +60,20 @@ async def generate_jd_ai(data: dict):
     - Response should only contain the JD text.
     """
 
+def jd_messages(data: dict) -> list:
+    return [
+        {"role": "system", "content": "You are a professional JD writer robot."},
+        {"role": "user", "content": build_jd_prompt(data)}
+    ]
+
+async def generate_jd_ai(data: dict):
+    """
+    AI Agent to generate a professional, ATS-friendly JD based on structured inputs.
+    """
     try:
-        completion = client.chat.completions.create(
+        completion = await client.chat.completions.create(
             model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a professional JD writer robot."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=jd_messages(data),
             temperature=0.7,
             max_tokens=1000,
         )
@@ -78,3 +81,17 @@ async def generate_jd_ai(data: dict):
         return completion.choices[0].message.content
     except Exception as e:
         return f"Error generating JD: {str(e)}"
+
+async def stream_jd_ai(data: dict):
+    """Same as generate_jd_ai, but yields the JD text as Groq streams it."""
+    stream = await client.chat.completions.create(
+        model="llama-3.3-70b-versatile",
+        messages=jd_messages(data),
+        temperature=0.7,
+        max_tokens=1000,
+        stream=True,
+    )
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
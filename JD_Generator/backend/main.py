@@ -1,8 +1,10 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
 import logging
+import json
 import os
 from dotenv import load_dotenv
 
@@ -15,7 +17,7 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, "../../.env"))
 logger.info(f"GROQ_API_KEY Found: {'Yes' if os.getenv('GROQ_API_KEY') else 'No'}")
 
-from agent import generate_jd_ai
+from agent import generate_jd_ai, stream_jd_ai
 
 app = FastAPI(title="JD Generator API")
 
@@ -54,6 +56,28 @@ async def generate_jd_endpoint(request: JDRequest):
         logger.error(f"Error during JD Generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/generate-jd/stream")
+async def generate_jd_stream(request: JDRequest):
+    """Server-sent events: `token` for each text delta, then `done` with the full JD (or `error`)."""
+    logger.info(f"Received streaming JD Generation Request for Role: {request.roleTitle} at {request.companyName}")
+
+    async def events():
+        parts = []
+        try:
+            async for delta in stream_jd_ai(request.model_dump()):
+                parts.append(delta)
+                yield sse("token", {"text": delta})
+            logger.info("JD successfully streamed by AI Agent.")
+            yield sse("done", {"status": "success", "jd": "".join(parts)})
+        except Exception as e:
+            logger.error(f"Error during JD Streaming: {str(e)}")
+            yield sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -162,20 +162,27 @@ jdForm.addEventListener('submit', async (e) => {
     };
 
     try {
-        const response = await fetch('http://127.0.0.1:8001/generate-jd', {
+        const response = await fetch('http://127.0.0.1:8001/generate-jd/stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(formData)
         });
-
-        const result = await response.json();
-        
-        if (result.status === 'success') {
-            displayResult(result.jd);
-            clearStep2Fields(); // Reset Step 2 after successful generation
-        } else {
-            throw new Error(result.detail || "Generation failed");
-        }
+        if (!response.ok) throw new Error("Generation failed");
+
+        // Render the JD as it is written; the final `done` event carries the full text
+        let jdText = '';
+        await readEventStream(response, (event, data) => {
+            if (event === 'token') {
+                if (!jdText) loader.classList.add('hidden');
+                jdText += data.text;
+                displayResult(jdText, false);
+            } else if (event === 'done') {
+                displayResult(data.jd, false);
+                clearStep2Fields(); // Reset Step 2 after successful generation
+            } else if (event === 'error') {
+                throw new Error(data.detail || "Generation failed");
+            }
+        });
 
     } catch (error) {
         console.error("Backend Error:", error);
@@ -186,7 +193,30 @@ jdForm.addEventListener('submit', async (e) => {
     }
 });
 
-function displayResult(content) {
+// Minimal server-sent events reader for a fetch() response (EventSource cannot POST)
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message', data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : null);
+        }
+    }
+}
+
+function displayResult(content, scroll = true) {
     // 1. Clean up excessive newlines
     content = content.replace(/\n{3,}/g, '\n\n').trim();
 
@@ -206,8 +236,9 @@ function displayResult(content) {
     f = f.replace(/(<\/div>)\n/g, '$1');
 
     jdOutput.innerHTML = f;
+    const wasHidden = resultSection.classList.contains('hidden');
     resultSection.classList.remove('hidden');
-    resultSection.scrollIntoView({ behavior: 'smooth' });
+    if (scroll || wasHidden) resultSection.scrollIntoView({ behavior: 'smooth' });
 }
 
 // --- Actions ---